@@ -0,0 +1 @@
+# Офлайн-бенчмарки парсера и бота
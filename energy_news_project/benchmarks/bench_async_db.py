@@ -0,0 +1,102 @@
+# benchmarks/bench_async_db.py
+"""Event-loop stalls from database writes: direct SafeNewsDB calls vs AsyncNewsDB.
+
+Simulates moderators pressing buttons: each "callback" updates the status of
+a record and deletes it, as approve/reject do. A probe task sleeps 1 ms in a
+loop and records how late it wakes up, which is what every other update
+waiting on the loop experiences:
+
+    python -m benchmarks.bench_async_db --size 10000 --callbacks 200
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_db_backends import populate_json
+from benchmarks.corpus import load_corpus, percentile
+from bot.async_database import AsyncNewsDB
+from bot.database import SafeNewsDB
+
+
+async def _probe(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def _run_callbacks(handle, count: int, concurrency: int) -> list:
+    timings = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await handle(i)
+            timings.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return timings
+
+
+async def _scenario(db, mode: str, count: int, concurrency: int):
+    if mode == "async":
+        facade = AsyncNewsDB(db)
+
+        async def handle(i):
+            news_id = f"{i:016x}"
+            await facade.update_news(news_id, {"status": "published"})
+            await facade.delete_news(news_id)
+    else:
+        async def handle(i):
+            news_id = f"{i:016x}"
+            db.update_news(news_id, {"status": "published"})
+            db.delete_news(news_id)
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(_probe(stop, lags))
+    timings = await _run_callbacks(handle, count, concurrency)
+    stop.set()
+    await probe
+
+    if mode == "async":
+        facade.close()
+    else:
+        db.close()
+    return timings, lags
+
+
+def run(size: int, count: int, concurrency: int, durability: str):
+    corpus = load_corpus()
+    for mode in ("direct", "async"):
+        directory = tempfile.mkdtemp(prefix="bench_async_db_")
+        try:
+            populate_json(directory, corpus, size, -1)
+            db = SafeNewsDB(os.path.join(directory, "news_db.json"), os.path.join(directory, "sent_ids.json"),
+                            durability=durability)
+            timings, lags = asyncio.run(_scenario(db, mode, count, concurrency))
+            print(f"{mode:<7} callback p50 {percentile(timings, 0.50) * 1000:>8.1f} ms  "
+                  f"p99 {percentile(timings, 0.99) * 1000:>8.1f} ms   "
+                  f"loop lag p99 {percentile(lags, 0.99) * 1000:>8.1f} ms  max {max(lags) * 1000:>8.1f} ms")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Event-loop impact of database writes")
+    cli.add_argument("--size", type=int, default=10_000, help="Records in the database")
+    cli.add_argument("--callbacks", type=int, default=200)
+    cli.add_argument("--concurrency", type=int, default=8)
+    cli.add_argument("--durability", choices=("sync", "deferred"), default="sync")
+    args = cli.parse_args(argv)
+    print(f"{args.size} records, {args.callbacks} callbacks, durability={args.durability}")
+    run(args.size, args.callbacks, args.concurrency, args.durability)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/bench_callbacks.py
+"""Approve/Reject handler latency: work done inline vs handed to JobRunner.
+
+Presses Approve and Reject on freshly loaded news through BotHandlers with a
+stand-in Bot whose API calls take ``--api-latency`` ms. "inline" runs the
+jobs inside the handler (JobRunner with workers=0, the old behaviour), "jobs"
+only records the action and lets the worker pool publish and clean up.
+Handler time is what python-telegram-bot waits for before it processes the
+next update; "done" is when the last news item left the store:
+
+    python -m benchmarks.bench_callbacks --presses 50 --api-latency 150
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.corpus import load_corpus, percentile
+from bot.async_database import AsyncNewsDB
+from bot.database import SafeNewsDB
+from bot.handlers import BotHandlers
+from bot.jobs import JobRunner
+from bot.services.telegram_service import TelegramService
+from config import TelegramConfig
+
+_message_ids = itertools.count(1000)
+
+
+class _Message:
+    def __init__(self, chat_id, message_id=None):
+        self.chat_id = chat_id
+        self.message_id = message_id if message_id is not None else next(_message_ids)
+
+
+class FakeBot:
+    """Bot API stand-in: every call sleeps ``latency`` seconds and succeeds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def _call(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._call()
+        return _Message(chat_id)
+
+    async def edit_message_text(self, **kwargs):
+        await self._call()
+        return True
+
+    async def delete_message(self, chat_id, message_id):
+        await self._call()
+        return True
+
+    async def delete_messages(self, chat_id, message_ids):
+        await self._call()
+        return True
+
+
+class _Query:
+    def __init__(self, bot, data: str, chat_id):
+        self.data = data
+        self.message = _Message(chat_id)
+        self._bot = bot
+
+    async def answer(self, *args, **kwargs):
+        await self._bot._call()
+
+    async def edit_message_text(self, *args, **kwargs):
+        await self._bot._call()
+
+
+class _Update:
+    def __init__(self, query):
+        self.callback_query = query
+
+
+class _Context:
+    def __init__(self, bot):
+        self.bot = bot
+        self.user_data = {}
+
+
+async def _scenario(db: AsyncNewsDB, mode: str, presses: int, latency: float):
+    bot = FakeBot(latency)
+    # Limits high enough that the scheduler does not dominate what is measured
+    telegram = TelegramService(TelegramConfig(global_rate=1000, chat_rate_per_minute=60_000, chat_burst=100))
+    jobs = JobRunner(db, workers=0 if mode == "inline" else 3)
+    handlers = BotHandlers(db, telegram, jobs)
+    await jobs.start(bot)
+
+    channel = telegram.config.moderation_channel
+    ids = sorted(db.get_all_news_ids())[:presses]
+    context = _Context(bot)
+    timings = []
+
+    async def press(i, news_id):
+        action = "approve" if i % 2 == 0 else "reject"
+        start = time.perf_counter()
+        await handlers.button_handler(_Update(_Query(bot, f"{action}|{news_id}", channel)), context)
+        timings.append(time.perf_counter() - start)
+
+    # python-telegram-bot handles updates one after another by default
+    start = time.perf_counter()
+    for i, news_id in enumerate(ids):
+        await press(i, news_id)
+    while any(news_id in db for news_id in ids):
+        await asyncio.sleep(0.005)
+    done = time.perf_counter() - start
+
+    await jobs.stop()
+    await telegram.close()
+    return timings, done, bot.calls
+
+
+def run(presses: int, latency: float):
+    corpus = load_corpus()
+    for mode in ("inline", "jobs"):
+        directory = tempfile.mkdtemp(prefix="bench_callbacks_")
+        try:
+            db = AsyncNewsDB(SafeNewsDB(os.path.join(directory, "news_db.json"),
+                                        os.path.join(directory, "sent_ids.json"), durability="deferred"))
+            db.db.add_many((f"{i:016x}", corpus[i % len(corpus)], 100 + i, TelegramConfig().moderation_channel)
+                           for i in range(presses))
+            timings, done, calls = asyncio.run(_scenario(db, mode, presses, latency))
+            db.close()
+            print(f"{mode:<7} handler p50 {percentile(timings, 0.50) * 1000:>8.1f} ms  "
+                  f"p99 {percentile(timings, 0.99) * 1000:>8.1f} ms   "
+                  f"all done {done:>6.2f} s  ({calls} API calls)")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Callback handler latency with and without the job runner")
+    cli.add_argument("--presses", type=int, default=50, help="Approve/Reject presses (alternating)")
+    cli.add_argument("--api-latency", type=float, default=150.0, help="Simulated Bot API round trip, ms")
+    args = cli.parse_args(argv)
+    print(f"{args.presses} presses, Bot API latency {args.api_latency:.0f} ms")
+    run(args.presses, args.api_latency / 1000)
+
+
+if __name__ == "__main__":
+    main()
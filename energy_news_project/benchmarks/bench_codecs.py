@@ -0,0 +1,110 @@
+# benchmarks/bench_codecs.py
+"""Save/load time, file size and load memory of the news_db codecs.
+
+Records look like what SafeNewsDB writes (bodies are blob references), so
+the numbers are those of the main file. "json-indent" is the format used
+before codecs existed; "json (stdlib)" is the compact codec without orjson:
+
+    python -m benchmarks.bench_codecs --size 100000
+"""
+import argparse
+import gc
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import bot.serialization as serialization
+from benchmarks.bench_db_backends import _make_item
+from benchmarks.corpus import load_corpus
+from bot.serialization import get_codec
+
+
+def _records(size: int) -> dict:
+    corpus = load_corpus()
+    now = datetime.now().isoformat()
+    records = {}
+    for i in range(size):
+        news_data = _make_item(corpus, i, -1)
+        news_data.pop("full_text", None)
+        news_data["full_text_ref"] = f"{i:064x}"
+        records[f"{i:016x}"] = {"news_data": news_data, "message_id": i, "channel_id": "-100",
+                                "status": "pending", "created_at": now, "updated_at": now}
+    return records
+
+
+@contextmanager
+def _orjson(enabled: bool):
+    saved = serialization.orjson
+    if not enabled:
+        serialization.orjson = None
+    try:
+        yield
+    finally:
+        serialization.orjson = saved
+
+
+def _variants():
+    yield "json-indent", "json-indent", False
+    if serialization.orjson is not None:
+        yield "json (orjson)", "json", True
+    yield "json (stdlib)", "json", False
+    if serialization.msgpack is not None:
+        yield "msgpack", "msgpack", False
+
+
+def _load(codec, path: str) -> dict:
+    with open(path, "rb") as f:
+        return dict(codec.iter_records(f))
+
+
+def run(size: int):
+    records = _records(size)
+    directory = tempfile.mkdtemp(prefix="bench_codecs_")
+    try:
+        print(f"{size} records")
+        print(f"{'codec':<15} {'save s':>8} {'load s':>8} {'size MB':>9} {'load peak MB':>13}")
+        baseline = None
+        for label, name, use_orjson in _variants():
+            path = os.path.join(directory, f"news_db.{name}")
+            codec = get_codec(name)
+            with _orjson(use_orjson):
+                start = time.perf_counter()
+                with open(path, "wb", buffering=1024 * 1024) as f:
+                    codec.dump(records.items(), f)
+                save_seconds = time.perf_counter() - start
+
+                gc.collect()
+                start = time.perf_counter()
+                loaded = _load(codec, path)
+                load_seconds = time.perf_counter() - start
+                assert len(loaded) == size
+                del loaded
+
+                gc.collect()
+                tracemalloc.start()
+                _load(codec, path)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            baseline = baseline or (save_seconds, load_seconds, size_mb)
+            print(f"{label:<15} {save_seconds:>8.2f} {load_seconds:>8.2f} {size_mb:>9.1f} {peak / 1024 / 1024:>13.1f}"
+                  f"   (x{baseline[0] / save_seconds:.1f} save, x{baseline[1] / load_seconds:.1f} load,"
+                  f" {size_mb / baseline[2]:.0%} size)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="news_db codec benchmark")
+    cli.add_argument("--size", type=int, default=100_000, help="Records in the database")
+    args = cli.parse_args(argv)
+    run(args.size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/bench_db_backends.py
+"""Per-operation latency of the news stores at different database sizes.
+
+Each size is pre-populated from the corpus (JSON files written directly, the
+SQLite store imported from them through its one-shot migration), then
+add/get/update/delete/is_sent, stats and URL lookups are timed on a fresh
+temporary directory:
+
+    python -m benchmarks.bench_db_backends --sizes 1000 10000 100000 --ops 20
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.corpus import load_corpus, percentile
+from models import NewsItem
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def _make_item(corpus: List[Dict], i: int, body_chars: int) -> Dict:
+    item = dict(corpus[i % len(corpus)])
+    item["url"] = f"{item['url']}?n={i}"
+    if body_chars >= 0:
+        item["full_text"] = item.get("full_text", "")[:body_chars]
+    return item
+
+
+def populate_json(directory: str, corpus: List[Dict], size: int, body_chars: int):
+    now = datetime.now().isoformat()
+    news_db = {
+        f"{i:016x}": {
+            "news_data": _make_item(corpus, i, body_chars),
+            "message_id": i,
+            "channel_id": "-100",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(size)
+    }
+    with open(os.path.join(directory, "news_db.json"), "w", encoding="utf-8") as f:
+        json.dump(news_db, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(directory, "sent_ids.json"), "w", encoding="utf-8") as f:
+        json.dump(list(news_db), f, ensure_ascii=False, indent=2)
+
+
+def open_store(backend: str, directory: str):
+    db_file = os.path.join(directory, "news_db.json")
+    sent_ids_file = os.path.join(directory, "sent_ids.json")
+    if backend == "sqlite":
+        from bot.sqlite_database import SQLiteNewsDB
+        return SQLiteNewsDB(os.path.join(directory, "news_db.sqlite3"),
+                            json_db_file=db_file, json_sent_ids_file=sent_ids_file)
+
+    from bot.database import SafeNewsDB
+    return SafeNewsDB(db_file, sent_ids_file)
+
+
+def _timed(func, arguments) -> List[float]:
+    timings = []
+    for args in arguments:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_backend(backend: str, corpus: List[Dict], size: int, ops: int, body_chars: int) -> Dict:
+    directory = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        populate_json(directory, corpus, size, body_chars)
+
+        # First open converts the legacy files (SQLite import, JSON body move to blobs)
+        start = time.perf_counter()
+        open_store(backend, directory).close()
+        migrate_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        db = open_store(backend, directory)
+        open_seconds = time.perf_counter() - start
+
+        new_ids = [f"new{i:013x}" for i in range(ops)]
+        existing = [f"{(i * 7919) % size:016x}" for i in range(ops)]
+
+        results = {
+            "add_news": _timed(db.add_news, [
+                (news_id, NewsItem.from_dict(_make_item(corpus, size + i, body_chars)), i, "-100")
+                for i, news_id in enumerate(new_ids)
+            ]),
+            "get_news": _timed(db.get_news, [(news_id,) for news_id in existing]),
+            "is_sent": _timed(db.is_sent, [(news_id,) for news_id in existing]),
+            "update_news": _timed(db.update_news, [
+                (news_id, {"news_data.full_text": "edited", "news_data.edited": True}) for news_id in existing
+            ]),
+            "update_status": _timed(db.update_news, [(news_id, {"status": "published"}) for news_id in existing]),
+            "delete_news": _timed(db.delete_news, [(news_id,) for news_id in new_ids]),
+            "get_stats": _timed(db.get_stats, [()] * min(ops, 5)),
+            "find_by_url": _timed(db.find_by_url, [
+                (_make_item(corpus, (i * 7919) % size, 0)["url"],) for i in range(ops)
+            ]),
+        }
+        db.close()
+
+        main_file = "news_db.sqlite3" if backend == "sqlite" else "news_db.json"
+        return {
+            "backend": backend,
+            "size": size,
+            "migrate_seconds": round(migrate_seconds, 3),
+            "open_seconds": round(open_seconds, 3),
+            "main_file_mb": round(os.path.getsize(os.path.join(directory, main_file)) / 1024 / 1024, 2),
+            "ops": {
+                name: {
+                    "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+                    "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+                }
+                for name, timings in results.items()
+            },
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="News store per-operation latency benchmark")
+    cli.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    cli.add_argument("--backends", nargs="+", default=["json", "sqlite"])
+    cli.add_argument("--ops", type=int, default=20, help="Operations of each kind per size")
+    cli.add_argument("--body-chars", type=int, default=-1,
+                     help="Truncate full_text to this many characters (-1 keeps corpus bodies)")
+    cli.add_argument("--output", help="Write results as JSON to this file")
+    args = cli.parse_args(argv)
+
+    corpus = load_corpus()
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            result = run_backend(backend, corpus, size, args.ops, args.body_chars)
+            results.append(result)
+            print(f"{backend:<7} size={size:<7} migrate={result['migrate_seconds']:>8.3f} s  "
+                  f"open={result['open_seconds']:>8.3f} s  file={result['main_file_mb']:>8.2f} MB")
+            for name, timing in result["ops"].items():
+                print(f"    {name:<14} p50 {timing['p50_ms']:>10.3f} ms   p95 {timing['p95_ms']:>10.3f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
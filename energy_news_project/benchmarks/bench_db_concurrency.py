@@ -0,0 +1,106 @@
+# benchmarks/bench_db_concurrency.py
+"""Read latency under concurrent writes: reads behind the store lock vs snapshot reads.
+
+Writer threads keep updating record statuses while reader threads call
+get_news / is_sent / get_stats, as the handlers and /stats do. "locked" wraps
+each read in the store lock (how reads used to work); "snapshot" calls the
+lock-free read path:
+
+    python -m benchmarks.bench_db_concurrency --size 10000 --seconds 3
+
+``--shared`` opens the store in multi-process mode (file lock + change feed)
+to show what the cross-process coordination costs a single process.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_db_backends import populate_json
+from benchmarks.corpus import load_corpus, percentile
+from bot.database import SafeNewsDB
+
+STATUSES = ("pending", "published", "rejected")
+
+
+def _reader(db, ids, locked: bool, stop: threading.Event, timings: list, seed: int):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        news_id = rng.choice(ids)
+        start = time.perf_counter()
+        if locked:
+            with db._lock:
+                db.get_news(news_id)
+                db.is_sent(news_id)
+                db.get_stats()
+        else:
+            db.get_news(news_id)
+            db.is_sent(news_id)
+            db.get_stats()
+        timings.append(time.perf_counter() - start)
+
+
+def _writer(db, ids, stop: threading.Event, counter: list, seed: int):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        db.update_news(rng.choice(ids), {"status": rng.choice(STATUSES)})
+        counter[0] += 1
+
+
+def _scenario(db, ids, locked: bool, readers: int, writers: int, seconds: float):
+    stop = threading.Event()
+    timings = [[] for _ in range(readers)]
+    counters = [[0] for _ in range(writers)]
+    threads = [threading.Thread(target=_reader, args=(db, ids, locked, stop, timings[i], i))
+               for i in range(readers)]
+    threads += [threading.Thread(target=_writer, args=(db, ids, stop, counters[i], 1000 + i))
+                for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return [t for chunk in timings for t in chunk], sum(c[0] for c in counters)
+
+
+def run(size: int, readers: int, writers: int, seconds: float, durability: str, shared: bool = False):
+    corpus = load_corpus()
+    for mode in ("locked", "snapshot"):
+        directory = tempfile.mkdtemp(prefix="bench_db_concurrency_")
+        try:
+            populate_json(directory, corpus, size, -1)
+            db = SafeNewsDB(os.path.join(directory, "news_db.json"), os.path.join(directory, "sent_ids.json"),
+                            durability=durability, shared=shared)
+            ids = list(db.get_all_news_ids())
+            timings, writes = _scenario(db, ids, mode == "locked", readers, writers, seconds)
+            contention = db.get_contention_stats()
+            db.close()
+            print(f"{mode:<9} reads {len(timings) / seconds:>9.0f}/s  "
+                  f"p50 {percentile(timings, 0.50) * 1e6:>8.1f} us  "
+                  f"p99 {percentile(timings, 0.99) * 1e6:>9.1f} us  max {max(timings) * 1000:>7.1f} ms   "
+                  f"writes {writes / seconds:>7.0f}/s  "
+                  f"lock wait p99 {contention['lock_wait']['p99'] * 1000:.2f} ms")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="SafeNewsDB read latency under concurrent writes")
+    cli.add_argument("--size", type=int, default=10_000, help="Records in the database")
+    cli.add_argument("--readers", type=int, default=4)
+    cli.add_argument("--writers", type=int, default=1)
+    cli.add_argument("--seconds", type=float, default=3.0)
+    cli.add_argument("--durability", choices=("sync", "deferred"), default="deferred")
+    cli.add_argument("--shared", action="store_true", help="Multi-process mode")
+    args = cli.parse_args(argv)
+    print(f"{args.size} records, {args.readers} readers, {args.writers} writers, "
+          f"{args.seconds:g} s, durability={args.durability}, shared={args.shared}")
+    run(args.size, args.readers, args.writers, args.seconds, args.durability, args.shared)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# benchmarks/bench_hot_paths.py
+"""Micro-benchmarks for per-article and per-message text functions.
+
+Each benchmark runs its function over the whole data/energy_news_*.json corpus
+in ``--repeats`` independent sessions of ``--rounds`` rounds. The compared
+figure is the median of the sessions' fastest rounds, and the spread between
+sessions is stored with the baseline as that benchmark's noise: a run counts
+as a regression only when it is slower than the baseline by more than
+``--tolerance`` plus the noise, and still is after ``--confirm`` re-measurements.
+
+Results can be stored as a baseline (``--save -k`` updates only the selected
+benchmarks) and later compared against it. Exit codes: 1 when a hot path got
+measurably slower; 2 when there is no usable baseline, or when a selected
+benchmark has no baseline entry or was skipped (missing dependency) — use
+``--allow-missing`` to only warn about those:
+
+    python -m benchmarks.bench_hot_paths --save       # record baseline on this machine
+    python -m benchmarks.bench_hot_paths              # compare with stored baseline
+    python -m benchmarks.bench_hot_paths -k clean --rounds 15 --tolerance 0.15
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.corpus import load_corpus
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hot_paths.json")
+
+# name -> setup(corpus) returning a zero-argument callable that processes the whole corpus
+BENCHMARKS: Dict[str, Callable[[List[Dict]], Callable[[], None]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _telegram_service():
+    from config import TelegramConfig
+    from bot.services.telegram_service import TelegramService
+    return TelegramService(TelegramConfig())
+
+
+@benchmark("parser.utils.clean_text")
+def bench_clean_text(corpus):
+    from parser.utils import clean_text
+    texts = [item.get("full_text", "") for item in corpus]
+    return lambda: [clean_text(text) for text in texts]
+
+
+@benchmark("bot.formatters.safe_clean_text")
+def bench_safe_clean_text(corpus):
+    from bot.formatters import safe_clean_text
+    texts = [item.get("full_text", "") for item in corpus]
+    return lambda: [safe_clean_text(text) for text in texts]
+
+
+@benchmark("bot.formatters.format_news_for_publication")
+def bench_format_news_for_publication(corpus):
+    from bot.formatters import format_news_for_publication
+    return lambda: [format_news_for_publication(item) for item in corpus]
+
+
+@benchmark("TelegramService.safe_escape_text")
+def bench_safe_escape_text(corpus):
+    service = _telegram_service()
+    texts = [item.get("preview", "") for item in corpus]
+    return lambda: [service.safe_escape_text(text) for text in texts]
+
+
+@benchmark("TelegramService.format_moderation_message")
+def bench_format_moderation_message(corpus):
+    service = _telegram_service()
+    return lambda: [service.format_moderation_message(item, str(i)) for i, item in enumerate(corpus)]
+
+
+@benchmark("TelegramService.make_news_id")
+def bench_make_news_id(corpus):
+    service = _telegram_service()
+    return lambda: [service.make_news_id(item, i) for i, item in enumerate(corpus)]
+
+
+@benchmark("parser.nlp_filter.is_energy_related")
+def bench_is_energy_related(corpus):
+    from parser.nlp_filter import is_energy_related
+    texts = [f"{item.get('title', '')} {item.get('preview', '')} {item.get('full_text', '')}" for item in corpus]
+    return lambda: [is_energy_related(text) for text in texts]
+
+
+def measure(func: Callable[[], None], rounds: int, warmup: int = 1) -> Dict:
+    """Time ``rounds`` full passes over the corpus with the GC disabled (one session)."""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+        "rounds": rounds,
+    }
+
+
+def measure_sessions(func: Callable[[], None], rounds: int, repeats: int) -> Dict:
+    """``repeats`` sessions of ``measure``; "typical" is the median of their fastest rounds.
+
+    "noise" is the relative spread of the sessions' fastest rounds, i.e. how
+    much this benchmark moves between runs on an unchanged tree.
+    """
+    sessions = [measure(func, rounds) for _ in range(max(1, repeats))]
+    fastest = [session["min"] for session in sessions]
+    return {
+        "min": min(fastest),
+        "typical": statistics.median(fastest),
+        "median": statistics.median(session["median"] for session in sessions),
+        "max": max(session["max"] for session in sessions),
+        "noise": max(fastest) / min(fastest) - 1,
+        "rounds": rounds,
+        "repeats": len(sessions),
+    }
+
+
+def compare(result: Dict, previous: Dict) -> float:
+    """Relative slowdown of ``result`` vs the baseline entry (baselines without "typical" use "min")."""
+    return result["typical"] / previous.get("typical", previous["min"]) - 1
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Dict, corpus_size: int) -> int:
+    """Merge ``results`` into the baseline at ``path``; returns how many other entries were kept.
+
+    Entries recorded on a different corpus are dropped: they are not comparable.
+    """
+    existing = load_baseline(path) or {}
+    merged = {}
+    if existing.get("corpus_size") == corpus_size:
+        merged.update(existing.get("benchmarks", {}))
+    elif existing.get("benchmarks"):
+        print(f"⚠️ Dropping {len(existing['benchmarks'])} baseline entries recorded on a different corpus")
+    kept = len(set(merged) - set(results))
+    merged.update(results)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "corpus_size": corpus_size,
+        "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "benchmarks": merged,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    return kept
+
+
+def main(argv=None) -> int:
+    cli = argparse.ArgumentParser(description="Micro-benchmarks for text hot paths")
+    cli.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this string")
+    cli.add_argument("--rounds", type=int, default=9, help="Rounds per session")
+    cli.add_argument("--repeats", type=int, default=3, help="Independent sessions per benchmark")
+    cli.add_argument("--baseline", default=BASELINE_FILE)
+    cli.add_argument("--save", action="store_true", help="Store results in the baseline (merged by name)")
+    cli.add_argument("--tolerance", type=float, default=0.25,
+                     help="Allowed slowdown vs baseline on top of the measured noise (0.25 = 25%%)")
+    cli.add_argument("--confirm", type=int, default=2,
+                     help="Re-measure a suspected regression this many times before failing")
+    cli.add_argument("--allow-missing", action="store_true",
+                     help="Only warn about benchmarks without a baseline entry or skipped")
+    args = cli.parse_args(argv)
+
+    corpus = load_corpus()
+    baseline = None if args.save else load_baseline(args.baseline)
+    if baseline and baseline.get("corpus_size") != len(corpus):
+        print(f"⚠️ Corpus changed ({baseline.get('corpus_size')} -> {len(corpus)} items), "
+              f"re-run with --save to refresh the baseline")
+        baseline = None
+
+    results, regressions, missing, skipped = {}, [], [], []
+    print(f"Corpus: {len(corpus)} items, {args.repeats} x {args.rounds} rounds per benchmark")
+    for name, setup in BENCHMARKS.items():
+        if args.keyword and args.keyword not in name:
+            continue
+        try:
+            func = setup(corpus)
+        except ImportError as e:
+            print(f"{name:<45} skipped: {e}")
+            skipped.append(name)
+            continue
+
+        result = measure_sessions(func, args.rounds, args.repeats)
+        previous = (baseline or {}).get("benchmarks", {}).get(name)
+        if previous:
+            allowed = args.tolerance + max(previous.get("noise", 0.0), result["noise"])
+            change = compare(result, previous)
+            attempt = 0
+            while change > allowed and attempt < args.confirm:
+                # A slow run on a busy machine is not a regression until it repeats
+                attempt += 1
+                retry = measure_sessions(func, args.rounds, args.repeats)
+                if retry["typical"] < result["typical"]:
+                    result = retry
+                change = compare(result, previous)
+        elif baseline is not None:
+            missing.append(name)
+        result["per_item_us"] = result["typical"] / len(corpus) * 1e6
+        results[name] = result
+
+        line = (f"{name:<45} typical {result['typical'] * 1000:>8.2f} ms  noise {result['noise']:>5.1%}  "
+                f"{result['per_item_us']:>8.2f} µs/item")
+        if previous:
+            line += f"  {change:+.1%} vs baseline (allowed {allowed:.0%})"
+            if change > allowed:
+                regressions.append((name, change))
+                line += "  ❌ REGRESSION"
+        print(line)
+
+    if args.save:
+        kept = save_baseline(args.baseline, results, len(corpus))
+        print(f"Baseline saved to {args.baseline} ({len(results)} updated, {kept} kept)")
+        return 0
+
+    if baseline is None:
+        # Nothing was compared: do not let a regression gate pass silently
+        print(f"No usable baseline at {args.baseline}; run with --save to create one")
+        return 2
+
+    code = 0
+    if missing or skipped:
+        if missing:
+            print(f"\n⚠️ Not in the baseline (run with --save -k <name>): {', '.join(missing)}")
+        if skipped:
+            print(f"\n⚠️ Skipped, not compared: {', '.join(skipped)}")
+        if not args.allow_missing:
+            code = 2
+    if regressions:
+        print(f"\n{len(regressions)} hot path(s) slower than baseline by more than the allowed slowdown")
+        code = 1
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# benchmarks/bench_news_item_memory.py
+"""Memory footprint of news items as plain dicts vs NewsItem.
+
+Builds N items (100k by default) by decoding corpus records from JSON, as the
+bot and CLI do, and measures traced allocations for both representations,
+with and without the shared article bodies:
+
+    python -m benchmarks.bench_news_item_memory --count 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from benchmarks.corpus import load_corpus
+from models import NewsItem
+
+
+def _encoded_records(corpus, count, with_bodies):
+    records = []
+    for i in range(count):
+        item = dict(corpus[i % len(corpus)])
+        item["url"] = f"{item['url']}?n={i}"
+        item.setdefault("language", "ru")
+        if not with_bodies:
+            item["full_text"] = ""
+        records.append(json.dumps(item, ensure_ascii=False))
+    return records
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, current, elapsed
+
+
+def run(count: int, with_bodies: bool):
+    records = _encoded_records(load_corpus(), count, with_bodies)
+
+    dicts, dict_bytes, dict_time = _measure(lambda: [json.loads(r) for r in records])
+    del dicts
+    items, item_bytes, item_time = _measure(lambda: [NewsItem.from_dict(json.loads(r)) for r in records])
+
+    start = time.perf_counter()
+    for item in items:
+        item.to_dict()
+    to_dict_time = time.perf_counter() - start
+
+    label = "with bodies" if with_bodies else "metadata only"
+    print(f"{count} items, {label}:")
+    print(f"  dict      {dict_bytes / 1024 / 1024:>8.1f} MB  {dict_bytes / count:>8.0f} B/item  "
+          f"decode {dict_time:.2f} s")
+    print(f"  NewsItem  {item_bytes / 1024 / 1024:>8.1f} MB  {item_bytes / count:>8.0f} B/item  "
+          f"decode {item_time:.2f} s, to_dict {to_dict_time:.2f} s")
+    print(f"  saved     {(1 - item_bytes / dict_bytes):.1%}")
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="NewsItem vs dict memory benchmark")
+    cli.add_argument("--count", type=int, default=100_000)
+    args = cli.parse_args(argv)
+    run(args.count, with_bodies=False)
+    run(args.count, with_bodies=True)
+
+
+if __name__ == "__main__":
+    main()
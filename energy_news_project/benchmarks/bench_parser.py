@@ -0,0 +1,173 @@
+# benchmarks/bench_parser.py
+"""Offline end-to-end parser benchmark against the local feed farm.
+
+Drives ``AsyncRSSParser.parse_all_feeds`` and the synchronous ``parser.rss_parser``
+path at several feed counts and reports items/s, p95 latency per item, peak RSS
+and CPU time. Every scenario runs in a fresh process so RSS and CPU are not
+polluted by the farm or by previous scenarios:
+
+    python -m benchmarks.bench_parser --sizes 17 200 2000 --paths async sync \\
+        --latency 0.05 --error-rate 0.02 --throttle-rate 0.01
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from benchmarks.corpus import percentile
+from benchmarks.feed_farm import add_farm_arguments, serve
+
+DEFAULT_SIZES = (17, 200, 2000)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _summary(path: str, feeds: int, items: int, latencies: List[float],
+             wall: float, cpu: float) -> Dict:
+    return {
+        "path": path,
+        "feeds": feeds,
+        "items_processed": len(latencies),
+        "items_accepted": items,
+        "wall_seconds": round(wall, 3),
+        "items_per_second": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_item_seconds": round(percentile(latencies, 0.50), 4),
+        "p95_item_seconds": round(percentile(latencies, 0.95), 4),
+        "cpu_seconds": round(cpu, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def run_async_scenario(base_url: str, feeds: int, max_workers: int, rate_limit_delay: float) -> Dict:
+    import asyncio
+    from parser.async_rss_parser import AsyncRSSParser, FeedConfig
+    from parser.stats import init_stats
+
+    latencies: List[float] = []
+
+    async def main():
+        async with AsyncRSSParser(max_workers=max_workers) as rss_parser:
+            rss_parser.feeds = [
+                FeedConfig(f"{base_url}/feed/{i}.xml", f"feed-{i}", rate_limit_delay=rate_limit_delay)
+                for i in range(feeds)
+            ]
+            process_entry = rss_parser._process_entry
+
+            async def timed_process_entry(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await process_entry(*args, **kwargs)
+                finally:
+                    latencies.append(time.perf_counter() - start)
+
+            rss_parser._process_entry = timed_process_entry
+            return await rss_parser.parse_all_feeds(stats=init_stats())
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    result = asyncio.run(main())
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    return _summary("async", feeds, len(result.news_items), latencies, wall, cpu)
+
+
+def run_sync_scenario(base_url: str, feeds: int) -> Dict:
+    import parser.rss_parser as rss
+    from parser.stats import init_stats
+
+    latencies: List[float] = []
+    item_start = {}
+    get_full_text = rss.get_full_text
+    is_energy_related = rss.is_energy_related
+
+    # Item latency = article download/extraction + classification
+    def timed_get_full_text(url, *args, **kwargs):
+        item_start["t"] = time.perf_counter()
+        return get_full_text(url, *args, **kwargs)
+
+    def timed_is_energy_related(text, *args, **kwargs):
+        try:
+            return is_energy_related(text, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - item_start.pop("t", time.perf_counter()))
+
+    rss.get_full_text = timed_get_full_text
+    rss.is_energy_related = timed_is_energy_related
+    rss.RSS_FEEDS = [{"url": f"{base_url}/feed/{i}.xml", "name": f"feed-{i}"} for i in range(feeds)]
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    news = rss.parse_all_feeds(stats=init_stats())
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    return _summary("sync", feeds, len(news), latencies, wall, cpu)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Offline end-to-end parser benchmark")
+    cli.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Feed counts")
+    cli.add_argument("--paths", nargs="+", choices=("async", "sync"), default=["async", "sync"])
+    cli.add_argument("--max-workers", type=int, default=10, help="AsyncRSSParser max_workers")
+    cli.add_argument("--rate-limit-delay", type=float, default=0.0,
+                     help="Per-domain delay for synthetic feeds (all share one local host)")
+    cli.add_argument("--output", help="Write results as JSON to this file")
+    add_farm_arguments(cli)
+    args = cli.parse_args(argv)
+
+    args.host, args.port = "127.0.0.1", _free_port()
+    base_url = f"http://{args.host}:{args.port}"
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    farm = context.Process(target=serve, args=(args, ready), daemon=True)
+    farm.start()
+    if not ready.wait(60):
+        farm.terminate()
+        raise RuntimeError("Feed farm did not start")
+
+    results = []
+    try:
+        for path in args.paths:
+            for feeds in args.sizes:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    if path == "async":
+                        future = pool.submit(run_async_scenario, base_url, feeds,
+                                             args.max_workers, args.rate_limit_delay)
+                    else:
+                        future = pool.submit(run_sync_scenario, base_url, feeds)
+                    summary = future.result()
+                results.append(summary)
+                print(
+                    f"{summary['path']:<5} feeds={summary['feeds']:<5} "
+                    f"items={summary['items_processed']:<6} {summary['items_per_second']:>8.1f} items/s  "
+                    f"p95={summary['p95_item_seconds'] * 1000:>7.1f} ms  "
+                    f"cpu={summary['cpu_seconds']:>7.2f} s  rss={summary['peak_rss_mb']:>6.1f} MB",
+                    flush=True,
+                )
+    finally:
+        farm.terminate()
+        farm.join(5)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"farm": {k: getattr(args, k) for k in (
+                "items_per_feed", "latency", "jitter", "error_rate", "throttle_rate")},
+                "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_rate_limiter.py
+"""Incoming-update limiter: timestamp deques vs GCRA at many users.
+
+Replays ``--requests`` decisions spread over ``--users`` simulated users on a
+virtual clock (``--rps`` requests per second overall) through the old
+sliding-window limiter (a deque of recent timestamps per user) and through
+RateLimiter's GCRA (one float per user). Reports per-decision latency,
+memory held by the limiter state (tracemalloc) and how long a sweep of idle
+users takes:
+
+    python -m benchmarks.bench_rate_limiter --users 10000 --requests 200000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+from benchmarks.corpus import percentile
+from bot.middleware.rate_limiter import GCRA
+
+
+class SlidingWindowLimiter:
+    """The previous limiter: every request timestamp within the window, per user."""
+
+    def __init__(self, max_requests: int, window: float):
+        self.max_requests = max_requests
+        self.window = window
+        self.requests = defaultdict(deque)
+
+    def allow(self, key, now: float) -> bool:
+        timestamps = self.requests[key]
+        while timestamps and timestamps[0] <= now - self.window:
+            timestamps.popleft()
+        if len(timestamps) >= self.max_requests:
+            return False
+        timestamps.append(now)
+        return True
+
+    def sweep(self, now: float) -> int:
+        idle = [key for key, timestamps in self.requests.items()
+                if not timestamps or timestamps[-1] <= now - self.window]
+        for key in idle:
+            del self.requests[key]
+        return len(idle)
+
+
+class _GCRAAdapter:
+    """GCRA behind the ``allow(key, now) -> bool`` / ``sweep(now)`` shape of SlidingWindowLimiter."""
+
+    def __init__(self, per_minute: int, burst: int):
+        self.gcra = GCRA(per_minute / 60, burst)
+
+    def allow(self, key, now: float) -> bool:
+        return self.gcra.allow(key, 1, now)[0]
+
+    def sweep(self, now: float) -> int:
+        return self.gcra.sweep(now)
+
+
+def _workload(users: int, requests: int, rps: float, seed: int = 7):
+    """(user_id, time) pairs; a few heavy users, a long tail of light ones."""
+    rng = random.Random(seed)
+    ids = list(range(1, users + 1))
+    weights = [1.0 / (rank ** 0.8) for rank in range(1, users + 1)]
+    chosen = rng.choices(ids, weights=weights, k=requests)
+    return [(user_id, i / rps) for i, user_id in enumerate(chosen)]
+
+
+def _measure(name: str, make_limiter, workload):
+    # Memory pass: only the limiter allocates while tracing
+    limiter = make_limiter()
+    tracemalloc.start()
+    for user_id, now in workload:
+        limiter.allow(user_id, now)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Latency pass on a fresh limiter
+    limiter = make_limiter()
+    timings = []
+    allowed = 0
+    for user_id, now in workload:
+        start = time.perf_counter()
+        ok = limiter.allow(user_id, now)
+        timings.append(time.perf_counter() - start)
+        allowed += ok
+
+    start = time.perf_counter()
+    swept = limiter.sweep(workload[-1][1] + 3600)
+    sweep_time = time.perf_counter() - start
+
+    print(f"{name:<15} p50 {percentile(timings, 0.50) * 1e6:>6.2f} us  "
+          f"p99 {percentile(timings, 0.99) * 1e6:>6.2f} us  "
+          f"state {memory / 1024:>8.1f} KiB  allowed {allowed / len(workload):>6.1%}  "
+          f"sweep {sweep_time * 1000:>7.2f} ms ({swept} users)")
+
+
+def run(users: int, requests: int, rps: float, per_minute: int, burst: int):
+    workload = _workload(users, requests, rps)
+    _measure("sliding window", lambda: SlidingWindowLimiter(per_minute, 60.0), workload)
+    _measure("gcra", lambda: _GCRAAdapter(per_minute, burst), workload)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Sliding-window vs GCRA update limiter")
+    cli.add_argument("--users", type=int, default=10_000, help="Simulated users")
+    cli.add_argument("--requests", type=int, default=200_000, help="Decisions to replay")
+    cli.add_argument("--rps", type=float, default=500.0, help="Requests per second across all users")
+    cli.add_argument("--per-minute", type=int, default=10, help="Allowed requests per user per minute")
+    cli.add_argument("--burst", type=int, default=5, help="GCRA burst size")
+    args = cli.parse_args(argv)
+    print(f"{args.users} users, {args.requests} requests at {args.rps:.0f}/s, "
+          f"{args.per_minute}/min per user")
+    run(args.users, args.requests, args.rps, args.per_minute, args.burst)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_sent_ids.py
+"""Sent-ID lookups and memory: Python set of hex strings vs SentIdSet.
+
+Builds N random 16-hex-char IDs (1M by default), then measures heap usage,
+open time and is_sent latency for seen and unseen IDs, plus the cost of
+appending a batch of new IDs to the log:
+
+    python -m benchmarks.bench_sent_ids --count 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import percentile
+from bot.sent_ids import SentIdSet
+
+
+def _lookup_timings(contains, ids):
+    timings = []
+    for news_id in ids:
+        start = time.perf_counter()
+        contains(news_id)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(name, timings):
+    print(f"    {name:<16} p50 {percentile(timings, 0.50) * 1e6:>8.2f} us   "
+          f"p99 {percentile(timings, 0.99) * 1e6:>8.2f} us")
+
+
+def run(count: int, lookups: int, appends: int):
+    rng = random.Random(42)
+    ids = [format(rng.getrandbits(64), "016x") for _ in range(count)]
+    seen = rng.sample(ids, lookups)
+    unseen = [format(rng.getrandbits(64), "016x") for _ in range(lookups)]
+
+    directory = tempfile.mkdtemp(prefix="bench_sent_ids_")
+    try:
+        path = os.path.join(directory, "sent_ids.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            legacy = set(json.load(f))
+        legacy_open = time.perf_counter() - start
+        legacy_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        SentIdSet(path).close()
+        import_seconds = time.perf_counter() - start
+
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = SentIdSet(path)
+        store_open = time.perf_counter() - start
+        store_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{count} sent IDs:")
+        print(f"  set[str]   heap {legacy_bytes / 1024 / 1024:>8.1f} MB   open {legacy_open:>6.2f} s")
+        print(f"  SentIdSet  heap {store_bytes / 1024 / 1024:>8.1f} MB   open {store_open:>6.2f} s   "
+              f"index {os.path.getsize(store.index_file) / 1024 / 1024:.1f} MB (one-time import {import_seconds:.2f} s)")
+
+        print("  set[str]")
+        _report("seen", _lookup_timings(legacy.__contains__, seen))
+        _report("unseen", _lookup_timings(legacy.__contains__, unseen))
+        print("  SentIdSet")
+        _report("seen", _lookup_timings(store.__contains__, seen))
+        _report("unseen", _lookup_timings(store.__contains__, unseen))
+        print(f"    bloom rejected {store.bloom_negatives} of {len(unseen)} unseen lookups")
+
+        start = time.perf_counter()
+        for news_id in unseen[:appends]:
+            store.add(news_id)
+        store.flush()
+        print(f"  append {appends} IDs + flush: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        store.compact()
+        print(f"  compaction: {time.perf_counter() - start:.2f} s")
+        store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Sent-ID set benchmark")
+    cli.add_argument("--count", type=int, default=1_000_000)
+    cli.add_argument("--lookups", type=int, default=10_000)
+    cli.add_argument("--appends", type=int, default=1000)
+    args = cli.parse_args(argv)
+    run(args.count, args.lookups, args.appends)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_webhook.py
+"""Update-to-reply latency of the real bot: polling vs webhook, serial vs concurrent.
+
+Starts the Telegram API stand-in (benchmarks.telegram_api) and, for each
+scenario, runs ``python -m bot.bot_runner_simple`` as a child process
+pointed at it, with its store in a temporary directory. ``--users`` users
+send /start at the same moment; latency is from delivering the update to
+the stand-in receiving the reply. The webhook scenarios also check that an
+update with a wrong secret token is refused, and every scenario ends with
+SIGTERM and checks that the bot flushed its store and exited cleanly:
+
+    python -m benchmarks.bench_webhook --users 40 --latency 50
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import percentile
+from benchmarks.telegram_api import TelegramAPI, command_update
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "polling-1": ("polling", 1),
+    "polling-8": ("polling", 8),
+    "webhook-1": ("webhook", 1),
+    "webhook-8": ("webhook", 8),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _bot_env(directory: str, api_url: str, mode: str, concurrency: int, webhook_port: int) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": PROJECT_DIR + os.pathsep + env.get("PYTHONPATH", ""),
+        "TELEGRAM_BOT_TOKEN": "123456:bench",
+        "TELEGRAM_API_BASE_URL": api_url,
+        "TELEGRAM_RUN_MODE": mode,
+        "TELEGRAM_WEBHOOK_URL": f"http://127.0.0.1:{webhook_port}/telegram",
+        "TELEGRAM_WEBHOOK_LISTEN": "127.0.0.1",
+        "TELEGRAM_WEBHOOK_PORT": str(webhook_port),
+        "TELEGRAM_WEBHOOK_PATH": "telegram",
+        "TELEGRAM_WEBHOOK_SECRET": "bench-secret",
+        "BOT_CONCURRENT_UPDATES": str(concurrency),
+        # Measure handling, not the incoming-update limiter
+        "RATE_LIMIT_GLOBAL_PER_MINUTE": "1000000",
+        "RATE_LIMIT_GLOBAL_BURST": "1000000",
+    })
+    for name, file_name in (("DB_FILE", "news_db.json"), ("SENT_IDS_FILE", "sent_ids.json"),
+                            ("DB_SQLITE_FILE", "news_db.sqlite3"), ("DB_BLOB_DIR", "blobs"),
+                            ("DB_BACKUP_DIR", "backups")):
+        env[name] = os.path.join(directory, "data", file_name)
+    return env
+
+
+async def _scenario(api: TelegramAPI, api_url: str, mode: str, concurrency: int, users: int):
+    api.reset()
+    directory = tempfile.mkdtemp(prefix="bench_webhook_")
+    webhook_port = _free_port()
+    child = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "bot.bot_runner_simple",
+        cwd=directory, env=_bot_env(directory, api_url, mode, concurrency, webhook_port),
+        stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    output = b""
+    ready = False
+    try:
+        await api.wait_ready(webhook=mode == "webhook")
+        ready = True
+
+        refused = None
+        if mode == "webhook":
+            refused = await api.deliver(command_update(1, "/start"), secret_token="wrong") == 403
+
+        async def send(user_id):
+            reply = api.wait_for_reply(user_id)
+            start = time.perf_counter()
+            await api.deliver(command_update(user_id, "/start"))
+            return await asyncio.wait_for(reply, 60) - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(send(1000 + i) for i in range(users)))
+        total = time.perf_counter() - start
+    finally:
+        if child.returncode is None:
+            child.send_signal(signal.SIGTERM)
+        try:
+            output, _ = await asyncio.wait_for(child.communicate(), 30)
+        except asyncio.TimeoutError:
+            child.kill()
+            output, _ = await child.communicate()
+        shutil.rmtree(directory, ignore_errors=True)
+        if not ready:
+            sys.stderr.write(output.decode("utf-8", "replace")[-4000:])
+
+    flushed = b"Database flushed after shutdown" in output
+    return latencies, total, refused, flushed, child.returncode
+
+
+def run(scenarios, users: int, latency: float):
+    async def main():
+        api = TelegramAPI(latency=latency)
+        api_url = await api.start()
+        try:
+            for name in scenarios:
+                mode, concurrency = SCENARIOS[name]
+                latencies, total, refused, flushed, code = await _scenario(api, api_url, mode, concurrency, users)
+                checks = f"flushed={'yes' if flushed else 'NO'} exit={code}"
+                if refused is not None:
+                    checks += f" bad-secret={'refused' if refused else 'ACCEPTED'}"
+                print(f"{name:<10} p50 {percentile(latencies, 0.50) * 1000:>7.1f} ms  "
+                      f"p99 {percentile(latencies, 0.99) * 1000:>7.1f} ms  "
+                      f"all {total:>6.2f} s   {checks}")
+        finally:
+            await api.stop()
+
+    asyncio.run(main())
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Bot update latency: polling vs webhook, serial vs concurrent")
+    cli.add_argument("--users", type=int, default=40, help="Users sending /start at once")
+    cli.add_argument("--latency", type=float, default=50.0, help="Simulated Bot API latency, ms")
+    cli.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    args = cli.parse_args(argv)
+    print(f"{args.users} users, Bot API latency {args.latency:.0f} ms")
+    run(args.scenarios, args.users, args.latency / 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# benchmarks/corpus.py
+import glob
+import json
+import os
+from typing import Dict, List
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def load_corpus(data_dir: str = DATA_DIR) -> List[Dict]:
+    """Load unique news items from data/energy_news_*.json (deduplicated by URL)."""
+    items = []
+    seen_urls = set()
+    for path in sorted(glob.glob(os.path.join(data_dir, "energy_news_*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                url = item.get("url")
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    items.append(item)
+
+    if not items:
+        raise RuntimeError(f"No energy_news_*.json corpus found in {data_dir}")
+    return items
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 1]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
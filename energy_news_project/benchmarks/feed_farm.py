@@ -0,0 +1,216 @@
+# benchmarks/feed_farm.py
+"""Local stand-in for RSS sites, built from the data/energy_news_*.json corpus.
+
+Serves ``/feed/{n}.xml`` (RSS 2.0) and ``/article/{idx}`` (HTML page) with
+configurable latency, error rate and 429 responses:
+
+    python -m benchmarks.feed_farm --port 8765 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+from benchmarks.corpus import load_corpus
+
+logger = logging.getLogger(__name__)
+
+
+class FeedFarm:
+    """aiohttp application serving synthetic feeds and article pages."""
+
+    def __init__(self, corpus: List[Dict], items_per_feed: int = 10, latency: float = 0.05,
+                 jitter: float = 0.02, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: int = 1, seed: int = 42):
+        self.corpus = corpus
+        self.items_per_feed = items_per_feed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+
+        self._runner: Optional[web.AppRunner] = None
+        self._pages: Dict[int, bytes] = {}
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/feed/{feed_id}.xml", self.handle_feed)
+        app.router.add_get("/article/{index}", self.handle_article)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        base_url = f"http://{host}:{bound_port}"
+        logger.info(f"Feed farm serving {len(self.corpus)} corpus items at {base_url}")
+        return base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _simulate(self) -> Optional[web.Response]:
+        """Apply latency and inject failures; returns an error response or None."""
+        self.requests += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = self.random.random()
+        if roll < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text="Internal Server Error")
+        if roll < self.error_rate + self.throttle_rate:
+            self.throttled += 1
+            return web.Response(status=429, text="Too Many Requests",
+                                headers={"Retry-After": str(self.retry_after)})
+        return None
+
+    def _feed_items(self, feed_id: int) -> List[int]:
+        start = feed_id * self.items_per_feed
+        return [(start + i) % len(self.corpus) for i in range(self.items_per_feed)]
+
+    def _render_feed(self, request: web.Request, feed_id: int) -> bytes:
+        base_url = f"{request.scheme}://{request.host}"
+        pub_date = format_datetime(datetime.now(timezone.utc))
+        entries = []
+        for index in self._feed_items(feed_id):
+            item = self.corpus[index]
+            entries.append(
+                "<item>"
+                f"<title>{escape(item.get('title', ''))}</title>"
+                f"<link>{base_url}/article/{index}</link>"
+                f"<guid>{base_url}/article/{index}</guid>"
+                f"<pubDate>{pub_date}</pubDate>"
+                f"<description>{escape(item.get('preview', ''))}</description>"
+                "</item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0"><channel>'
+            f"<title>Feed {feed_id}</title><link>{base_url}/</link>"
+            f"<description>Synthetic feed {feed_id}</description>"
+            + "".join(entries)
+            + "</channel></rss>"
+        ).encode("utf-8")
+
+    def _render_article(self, index: int) -> bytes:
+        page = self._pages.get(index)
+        if page is None:
+            item = self.corpus[index]
+            text = item.get("full_text") or item.get("preview", "")
+            paragraphs, current = [], ""
+            for sentence in text.split(". "):
+                current += sentence + ". "
+                if len(current) > 300:
+                    paragraphs.append(current.strip())
+                    current = ""
+            if current.strip():
+                paragraphs.append(current.strip())
+
+            body = "".join(f"<p>{escape(p)}</p>" for p in paragraphs)
+            page = (
+                "<html><head><title>{title}</title></head><body>"
+                "<nav>Menu</nav><article><h1>{title}</h1>{body}</article>"
+                "<footer>Footer</footer></body></html>"
+            ).format(title=escape(item.get("title", "")), body=body).encode("utf-8")
+            self._pages[index] = page
+        return page
+
+    async def handle_feed(self, request: web.Request) -> web.Response:
+        error = await self._simulate()
+        if error:
+            return error
+        body = self._render_feed(request, int(request.match_info["feed_id"]))
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/rss+xml")
+
+    async def handle_article(self, request: web.Request) -> web.Response:
+        error = await self._simulate()
+        if error:
+            return error
+        index = int(request.match_info["index"])
+        if not 0 <= index < len(self.corpus):
+            return web.Response(status=404, text="Not Found")
+        body = self._render_article(index)
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "bytes_sent": self.bytes_sent,
+        })
+
+
+def add_farm_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("--items-per-feed", type=int, default=10)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Mean response latency, seconds")
+    arg_parser.add_argument("--jitter", type=float, default=0.02, help="Latency jitter, seconds")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="Share of HTTP 500 responses")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of HTTP 429 responses")
+    arg_parser.add_argument("--retry-after", type=int, default=1, help="Retry-After sent with 429")
+    arg_parser.add_argument("--seed", type=int, default=42)
+
+
+def farm_from_args(args) -> FeedFarm:
+    return FeedFarm(
+        load_corpus(),
+        items_per_feed=args.items_per_feed,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+def serve(args, ready=None):
+    """Run the farm until interrupted (used directly and from a child process)."""
+
+    async def main():
+        farm = farm_from_args(args)
+        base_url = await farm.start(args.host, args.port)
+        if ready is not None:
+            ready.set()
+        print(f"Feed farm ready at {base_url}", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await farm.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    cli = argparse.ArgumentParser(description="Local RSS feed farm for parser benchmarks")
+    cli.add_argument("--host", default="127.0.0.1")
+    cli.add_argument("--port", type=int, default=8765)
+    add_farm_arguments(cli)
+    serve(cli.parse_args())
@@ -0,0 +1,290 @@
+# benchmarks/telegram_api.py
+"""Local stand-in for the Telegram Bot API.
+
+Answers ``/bot{token}/{method}`` like api.telegram.org for the methods the bot
+uses (getMe, sendMessage, editMessageText, deleteMessage(s),
+answerCallbackQuery, setWebhook/deleteWebhook, getUpdates) with configurable
+latency. Updates injected with ``deliver`` are POSTed to the registered
+webhook (with its secret token) or handed out by getUpdates long polling, so
+the bot runs unchanged with ``TELEGRAM_API_BASE_URL`` pointing here:
+
+    python -m benchmarks.telegram_api --port 8081 --latency 0.05
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+BOT_USER = {
+    "id": 100000001,
+    "is_bot": True,
+    "first_name": "Energy News",
+    "username": "energy_news_bench_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+}
+
+
+def command_update(user_id: int, text: str) -> dict:
+    """A private message from ``user_id``; commands get their bot_command entity."""
+    message = {
+        "message_id": user_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private", "first_name": f"User {user_id}"},
+        "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"message": message}
+
+
+def callback_update(user_id: int, data: str, chat_id: int, message_id: int) -> dict:
+    """A press of an inline button with ``data`` under message ``message_id`` in ``chat_id``."""
+    return {"callback_query": {
+        "id": f"{user_id}-{message_id}-{time.monotonic_ns()}",
+        "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"},
+        "chat_instance": str(chat_id),
+        "data": data,
+        "message": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "channel", "title": "Moderation"},
+            "text": "news",
+        },
+    }}
+
+
+def _chat_id(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1  # "@channelname"
+
+
+class TelegramAPI:
+    """aiohttp application answering Bot API methods and delivering updates."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+        self.calls: Counter = Counter()
+        self.webhook_url: Optional[str] = None
+        self.secret_token: Optional[str] = None
+
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._pending: List[dict] = []
+        self._pending_event = asyncio.Event()
+        # chat_id -> futures resolved by the next sendMessage/answerCallbackQuery for that chat
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+        self._webhook_set = asyncio.Event()
+        self._polled = asyncio.Event()
+
+        self._runner: Optional[web.AppRunner] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._methods = {
+            "getMe": lambda params: BOT_USER,
+            "setWebhook": self._set_webhook,
+            "deleteWebhook": self._delete_webhook,
+            "getWebhookInfo": self._webhook_info,
+            "sendMessage": self._send_message,
+            "editMessageText": self._edit_message,
+            "editMessageReplyMarkup": self._edit_message,
+            "answerCallbackQuery": self._answer_callback_query,
+        }
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.handle_method)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL (the bot's TELEGRAM_API_BASE_URL)."""
+        self._session = aiohttp.ClientSession()
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        base_url = f"http://{host}:{bound_port}"
+        logger.info(f"Telegram API stand-in serving at {base_url}")
+        return base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def reset(self):
+        """Forget the webhook, pending updates and readiness (before starting another bot)."""
+        self.webhook_url = None
+        self.secret_token = None
+        self._pending.clear()
+        self._webhook_set.clear()
+        self._polled.clear()
+
+    # ===== DELIVERING UPDATES =====
+    async def deliver(self, update: dict, secret_token: Optional[str] = None) -> int:
+        """Hand ``update`` to the bot; returns the webhook's HTTP status (200 when queued for polling).
+
+        ``secret_token`` overrides the registered one, to check that a wrong one is refused.
+        """
+        update = {"update_id": next(self._update_ids), **update}
+        if self.webhook_url is None:
+            self._pending.append(update)
+            self._pending_event.set()
+            return 200
+
+        token = self.secret_token if secret_token is None else secret_token
+        headers = {SECRET_HEADER: token} if token else {}
+        async with self._session.post(self.webhook_url, json=update, headers=headers) as response:
+            return response.status
+
+    def wait_for_reply(self, chat_id: int) -> "asyncio.Future":
+        """Future resolved with the time of the next reply sent to ``chat_id``."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(chat_id, []).append(future)
+        return future
+
+    async def wait_ready(self, webhook: bool, timeout: float = 30.0):
+        """Wait until the bot registered its webhook or started polling."""
+        await asyncio.wait_for((self._webhook_set if webhook else self._polled).wait(), timeout)
+
+    def _replied(self, chat_id: int):
+        futures = self._waiters.pop(chat_id, None)
+        if futures:
+            now = time.perf_counter()
+            for future in futures:
+                if not future.done():
+                    future.set_result(now)
+
+    # ===== METHODS =====
+    async def _params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json() if request.can_read_body else {}
+        params = {}
+        for key, value in (await request.post()).items():
+            # python-telegram-bot JSON-encodes everything but plain strings
+            try:
+                params[key] = json.loads(value) if isinstance(value, str) else value
+            except ValueError:
+                params[key] = value
+        return params
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        self.calls[method] += 1
+        if method == "getUpdates":
+            result = await self._get_updates(params)
+        else:
+            if self.latency > 0:
+                await asyncio.sleep(self.latency)
+            handler = self._methods.get(method)
+            result = handler(params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    def _message(self, params: dict) -> dict:
+        chat_id = _chat_id(params.get("chat_id"))
+        return {
+            "message_id": params.get("message_id") or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "channel"},
+            "text": str(params.get("text", "")),
+        }
+
+    def _send_message(self, params: dict) -> dict:
+        message = self._message(params)
+        self._replied(message["chat"]["id"])
+        return message
+
+    def _edit_message(self, params: dict):
+        return self._message(params) if "chat_id" in params else True
+
+    def _answer_callback_query(self, params: dict) -> bool:
+        # Callback query ids made by callback_update start with the user id
+        self._replied(_chat_id(str(params.get("callback_query_id", "")).split("-", 1)[0]))
+        return True
+
+    def _set_webhook(self, params: dict) -> bool:
+        self.webhook_url = params.get("url") or None
+        self.secret_token = params.get("secret_token")
+        if self.webhook_url:
+            self._webhook_set.set()
+        logger.info(f"Webhook set to {self.webhook_url}")
+        return True
+
+    def _delete_webhook(self, params: dict) -> bool:
+        self.webhook_url = None
+        self.secret_token = None
+        if params.get("drop_pending_updates"):
+            self._pending.clear()
+        return True
+
+    def _webhook_info(self, params: dict) -> dict:
+        return {"url": self.webhook_url or "", "has_custom_certificate": False,
+                "pending_update_count": len(self._pending)}
+
+    async def _get_updates(self, params: dict) -> List[dict]:
+        """Long polling: updates from ``offset`` on, waiting up to ``timeout`` seconds for one."""
+        self._polled.set()
+        offset = int(params.get("offset") or 0)
+        self._pending = [update for update in self._pending if update["update_id"] >= offset]
+        if not self._pending:
+            self._pending_event.clear()
+            try:
+                await asyncio.wait_for(self._pending_event.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self._pending[:int(params.get("limit") or 100)]
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "calls": dict(self.calls),
+            "webhook_url": self.webhook_url,
+            "pending_updates": len(self._pending),
+        })
+
+
+def serve(args):
+    """Run the stand-in until interrupted."""
+
+    async def main():
+        api = TelegramAPI(latency=args.latency)
+        base_url = await api.start(args.host, args.port)
+        print(f"Telegram API stand-in ready at {base_url}", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await api.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    cli = argparse.ArgumentParser(description="Local Telegram Bot API stand-in")
+    cli.add_argument("--host", default="127.0.0.1")
+    cli.add_argument("--port", type=int, default=8081)
+    cli.add_argument("--latency", type=float, default=0.05, help="Delay of every API call, seconds")
+    serve(cli.parse_args())
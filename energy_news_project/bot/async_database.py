@@ -0,0 +1,103 @@
+# bot/async_database.py
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+import logging
+
+from models import NewsItem
+from parser.metrics import Histogram, LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNewsDB:
+    """Asyncio facade over SafeNewsDB / SQLiteNewsDB for the bot's event loop.
+
+    Reads are plain methods answered from the store's in-memory state. Writes
+    are queued to a single writer thread and return awaitables, so
+    serialization and disk I/O never run on the event loop; one writer keeps
+    them in submission order. ``write_latency`` records how long each write
+    took from submission to completion.
+    """
+
+    def __init__(self, database):
+        self.db = database
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="news-db-writer")
+        self.write_latency = Histogram(LATENCY_BUCKETS)
+
+    async def _write(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self.write_latency.observe(time.perf_counter() - start)
+
+    # ===== READS =====
+    def get_news(self, news_id: str) -> Optional[dict]:
+        return self.db.get_news(news_id)
+
+    def is_sent(self, news_id: str) -> bool:
+        return self.db.is_sent(news_id)
+
+    def get_all_news_ids(self) -> Set[str]:
+        return self.db.get_all_news_ids()
+
+    def find_by_url(self, url: str) -> Optional[str]:
+        return self.db.find_by_url(url)
+
+    def find_by_message_id(self, message_id: int) -> Optional[str]:
+        return self.db.find_by_message_id(message_id)
+
+    def get_ids_by_status(self, status: str) -> Set[str]:
+        return self.db.get_ids_by_status(status)
+
+    def get_stats(self) -> dict:
+        stats = self.db.get_stats()
+        stats["write_latency"] = self.write_latency.to_dict()
+        return stats
+
+    def __len__(self):
+        return len(self.db)
+
+    def __contains__(self, news_id):
+        return news_id in self.db
+
+    # ===== WRITES =====
+    async def add_news(self, news_id: str, news_data: Union[NewsItem, dict], message_id: int, channel_id: str):
+        return await self._write(self.db.add_news, news_id, news_data, message_id, channel_id)
+
+    async def add_many(self, items: Iterable[Tuple[str, Union[NewsItem, dict], int, str]]) -> int:
+        # Materialize now: the caller may reuse its list after this returns
+        return await self._write(self.db.add_many, list(items))
+
+    async def update_news(self, news_id: str, updates: dict) -> bool:
+        return await self._write(self.db.update_news, news_id, updates)
+
+    async def update_many(self, updates: Dict[str, dict]) -> int:
+        return await self._write(self.db.update_many, dict(updates))
+
+    async def delete_news(self, news_id: str) -> bool:
+        return await self._write(self.db.delete_news, news_id)
+
+    async def delete_many(self, news_ids: Iterable[str]) -> int:
+        return await self._write(self.db.delete_many, list(news_ids))
+
+    async def cleanup_old_news(self, days: int = 30) -> int:
+        return await self._write(self.db.cleanup_old_news, days)
+
+    async def expire_old_news(self, days: int, batch_size: Optional[int] = None) -> int:
+        return await self._write(self.db.expire_old_news, days, batch_size)
+
+    async def clear_all(self):
+        return await self._write(self.db.clear_all)
+
+    async def force_save(self):
+        return await self._write(self.db.force_save)
+
+    def close(self):
+        """Finish queued writes, then close the store (call after the event loop stopped)."""
+        self._executor.shutdown(wait=True)
+        self.db.close()
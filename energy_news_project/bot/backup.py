@@ -0,0 +1,201 @@
+# bot/backup.py
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+class IncrementalBackup:
+    """Compressed base snapshots plus change segments for point-in-time restore.
+
+    A base holds the whole store; each segment holds only the records and sent
+    IDs that changed since the previous backup (``None`` marks a deleted
+    record). ``manifest.json`` lists bases with their segments in time order,
+    so restoring to a moment means loading the newest base before it and
+    replaying its segments up to that moment.
+    """
+
+    def __init__(self, directory: str = "data/backups", keep_bases: int = 3, segments_per_base: int = 24):
+        self.directory = directory
+        self.keep_bases = keep_bases
+        self.segments_per_base = segments_per_base
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # ===== MANIFEST =====
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _load_manifest(self) -> dict:
+        path = self._manifest_path()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if isinstance(manifest, dict) and isinstance(manifest.get("bases"), list):
+                    return manifest
+                logger.warning("Invalid backup manifest format, starting a new one")
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error(f"Failed to load backup manifest: {e}")
+        return {"bases": []}
+
+    def reload(self):
+        """Re-read the manifest (another process sharing the directory may have written backups)."""
+        self.manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        temp_file = f"{self._manifest_path()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self._manifest_path())
+
+    def _write_gzip(self, name: str, payload: dict) -> int:
+        path = os.path.join(self.directory, name)
+        temp_file = f"{path}.tmp"
+        try:
+            with gzip.open(temp_file, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temp_file, path)
+        except Exception:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+        return os.path.getsize(path)
+
+    def _read_gzip(self, name: str) -> dict:
+        with gzip.open(os.path.join(self.directory, name), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ===== WRITING =====
+    def needs_base(self) -> bool:
+        bases = self.manifest["bases"]
+        return not bases or len(bases[-1]["segments"]) >= self.segments_per_base
+
+    def write_base(self, news_db: Dict[str, Any], sent_ids: List[str], timestamp: Optional[datetime] = None) -> str:
+        timestamp = timestamp or datetime.now()
+        name = f"base_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}.json.gz"
+        size = self._write_gzip(name, {"news_db": news_db, "sent_ids": sent_ids})
+
+        self.manifest["bases"].append({
+            "file": name, "timestamp": timestamp.isoformat(), "records": len(news_db), "bytes": size, "segments": [],
+        })
+        self._prune()
+        self._save_manifest()
+        logger.info(f"Base backup created: {name} ({len(news_db)} records, {size / 1024:.1f} KB)")
+        return name
+
+    def write_segment(self, news: Dict[str, Optional[dict]], sent: Dict[str, bool],
+                      timestamp: Optional[datetime] = None) -> str:
+        if not self.manifest["bases"]:
+            raise RuntimeError("Cannot write a backup segment without a base snapshot")
+
+        timestamp = timestamp or datetime.now()
+        name = f"segment_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}.json.gz"
+        size = self._write_gzip(name, {"news": news, "sent": sent})
+
+        self.manifest["bases"][-1]["segments"].append({
+            "file": name, "timestamp": timestamp.isoformat(), "changes": len(news) + len(sent), "bytes": size,
+        })
+        self._save_manifest()
+        logger.info(f"Incremental backup created: {name} ({len(news)} records, {len(sent)} sent IDs)")
+        return name
+
+    def _prune(self):
+        """Drop the oldest bases (and their segments) beyond ``keep_bases``."""
+        bases = self.manifest["bases"]
+        while len(bases) > self.keep_bases:
+            old = bases.pop(0)
+            for name in [old["file"]] + [segment["file"] for segment in old["segments"]]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    logger.debug(f"Removed old backup: {name}")
+                except FileNotFoundError:
+                    pass
+
+    # ===== RESTORE =====
+    def restore_points(self) -> List[str]:
+        points = []
+        for base in self.manifest["bases"]:
+            points.append(base["timestamp"])
+            points.extend(segment["timestamp"] for segment in base["segments"])
+        return points
+
+    def restore(self, until: Optional[datetime] = None) -> Optional[Tuple[Dict[str, Any], Set[str], str]]:
+        """State as of ``until`` (default: latest) as (news_db, sent_ids, restore point), or None."""
+        limit = until.isoformat() if until else None
+        candidates = [b for b in self.manifest["bases"] if limit is None or b["timestamp"] <= limit]
+        if not candidates:
+            return None
+
+        base = candidates[-1]
+        snapshot = self._read_gzip(base["file"])
+        news_db: Dict[str, Any] = snapshot["news_db"]
+        sent_ids = set(snapshot["sent_ids"])
+        point = base["timestamp"]
+
+        for segment in base["segments"]:
+            if limit is not None and segment["timestamp"] > limit:
+                break
+            changes = self._read_gzip(segment["file"])
+            for news_id, record in changes["news"].items():
+                if record is None:
+                    news_db.pop(news_id, None)
+                else:
+                    news_db[news_id] = record
+            for news_id, present in changes["sent"].items():
+                if present:
+                    sent_ids.add(news_id)
+                else:
+                    sent_ids.discard(news_id)
+            point = segment["timestamp"]
+
+        return news_db, sent_ids, point
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(prog="python -m bot.backup", description="Incremental news database backups")
+    cli.add_argument("--dir", default=os.path.join("data", "backups"), help="Backup directory")
+    commands = cli.add_subparsers(dest="command")
+
+    commands.add_parser("list", help="Show restore points")
+
+    restore = commands.add_parser("restore", help="Write news_db/sent_ids JSON as of a moment")
+    restore.add_argument("--until", help="ISO timestamp, e.g. 2024-05-01T12:00 (default: latest)")
+    restore.add_argument("--db-file", default=os.path.join("data", "news_db.restored.json"))
+    restore.add_argument("--sent-ids-file", default=os.path.join("data", "sent_ids.restored.json"))
+
+    args = cli.parse_args(argv)
+    backups = IncrementalBackup(args.dir)
+
+    if args.command != "restore":
+        for point in backups.restore_points():
+            print(point)
+        return 0
+
+    result = backups.restore(datetime.fromisoformat(args.until) if args.until else None)
+    if result is None:
+        print("No backup before the requested moment")
+        return 1
+
+    news_db, sent_ids, point = result
+    with open(args.db_file, "w", encoding="utf-8") as f:
+        json.dump(news_db, f, ensure_ascii=False, indent=2)
+    with open(args.sent_ids_file, "w", encoding="utf-8") as f:
+        json.dump(sorted(sent_ids), f, ensure_ascii=False, indent=2)
+    print(f"Restored {len(news_db)} records as of {point} to {args.db_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
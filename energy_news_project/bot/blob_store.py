@@ -0,0 +1,152 @@
+# bot/blob_store.py
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """Content-addressed store for article bodies.
+
+    Each text is zlib-compressed into ``<directory>/<ab>/<sha256>.z``, so equal
+    bodies are stored once and a blob never changes after it is written. Reads
+    go through a small LRU of decompressed texts.
+    """
+
+    SUFFIX = ".z"
+
+    def __init__(self, directory: str = "data/blobs", cache_size: int = 64, level: int = 6):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.level = level
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def ref_for(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.directory, ref[:2], f"{ref}{self.SUFFIX}")
+
+    def put(self, text: str) -> str:
+        """Store ``text`` (if not stored yet) and return its reference."""
+        ref = self.ref_for(text)
+        path = self._path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_file = f"{path}.tmp.{threading.get_ident()}"
+            try:
+                with open(temp_file, "wb") as f:
+                    f.write(zlib.compress(text.encode("utf-8"), self.level))
+                os.replace(temp_file, path)
+            except Exception:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+                raise
+        self._remember(ref, text)
+        return ref
+
+    def get(self, ref: str) -> str:
+        """Return the text for ``ref``; raises KeyError if the blob is missing."""
+        with self._lock:
+            text = self._cache.get(ref)
+            if text is not None:
+                self._cache.move_to_end(ref)
+                self.hits += 1
+                return text
+            self.misses += 1
+
+        try:
+            with open(self._path(ref), "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(ref) from None
+
+        self._remember(ref, text)
+        return text
+
+    def loader(self, ref: str) -> Callable[[], str]:
+        """Zero-argument loader for ``NewsItem.full_text``."""
+        def load():
+            try:
+                return self.get(ref)
+            except KeyError:
+                logger.error(f"Body blob {ref} is missing")
+                return ""
+        return load
+
+    def _remember(self, ref: str, text: str):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[ref] = text
+            self._cache.move_to_end(ref)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def __contains__(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref))
+
+    def iter_refs(self) -> Iterable[str]:
+        for prefix in os.listdir(self.directory):
+            subdir = os.path.join(self.directory, prefix)
+            if not os.path.isdir(subdir):
+                continue
+            for name in os.listdir(subdir):
+                if name.endswith(self.SUFFIX):
+                    yield name[:-len(self.SUFFIX)]
+
+    def collect_garbage(self, live_refs: Iterable[str]) -> int:
+        """Delete blobs that are not in ``live_refs``; returns how many were removed."""
+        live = set(live_refs)
+        removed = 0
+        for ref in list(self.iter_refs()):
+            if ref in live:
+                continue
+            try:
+                os.remove(self._path(ref))
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Failed to remove blob {ref}: {e}")
+            with self._lock:
+                self._cache.pop(ref, None)
+        if removed:
+            logger.info(f"Removed {removed} unreferenced body blobs")
+        return removed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            cached = len(self._cache)
+        total = self.hits + self.misses
+        return {
+            "cached": cached,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def default_blob_dir(db_file: str) -> str:
+    """Blob directory next to the news database file."""
+    return os.path.join(os.path.dirname(db_file) or ".", "blobs")
+
+
+def inline_body(news_data: dict, blobs: Optional[BlobStore]) -> dict:
+    """Put the stored body back into a news_data dict that only has ``full_text_ref``."""
+    ref = news_data.get("full_text_ref")
+    if ref is None or "full_text" in news_data or blobs is None:
+        return news_data
+    result = {key: value for key, value in news_data.items() if key != "full_text_ref"}
+    result["full_text"] = blobs.loader(ref)()
+    return result
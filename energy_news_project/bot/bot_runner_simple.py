@@ -1,8 +1,10 @@
 # bot/bot_runner_simple.py
 import asyncio
 import logging
+import secrets
 import sys
 import os
+from telegram import Update
 from telegram.ext import (
     Application, CommandHandler, CallbackQueryHandler,
     MessageHandler, filters, ContextTypes
@@ -37,12 +39,15 @@ load_dotenv()
 
 # Import configuration and services
 from config import config
-from bot.database import SafeNewsDB
+from bot.async_database import AsyncNewsDB
+from bot.database import create_database
 from bot.services.telegram_service import TelegramService
 from bot.handlers import BotHandlers
+from bot.jobs import JobRunner
+from bot.middleware.rate_limiter import RateLimiter
 from bot.cli import load_and_send_news
 
-logger.info("Using SafeNewsDB and unified BotHandlers")
+logger.info(f"Using {config.database.backend} news store and unified BotHandlers")
 
 # Check token
 if not config.telegram.bot_token:
@@ -50,16 +55,30 @@ if not config.telegram.bot_token:
     sys.exit(1)
 
 # Initialize database and services
-db = SafeNewsDB(
-    db_file=config.database.db_file,
-    sent_ids_file=config.database.sent_ids_file,
-    backup_interval=config.database.backup_interval
-)
+# Handlers and the CLI loader share one store; writes go through its writer thread
+db = AsyncNewsDB(create_database(config.database))
 
 telegram_service = TelegramService(config.telegram)
 
+# Approve/Reject are recorded in the store and carried out by background workers
+jobs = JobRunner(db, workers=config.telegram.job_workers, max_attempts=config.telegram.job_max_attempts)
+
 # Initialize unified handlers
-handlers = BotHandlers(db, telegram_service)
+handlers = BotHandlers(db, telegram_service, jobs)
+
+# Per-user and global limits on incoming updates (admins and moderation buttons bypass them)
+rate_limiter = RateLimiter(
+    user_rate=config.telegram.user_rate_limit,
+    user_burst=config.telegram.user_burst,
+    global_rate=config.telegram.global_rate_limit,
+    global_burst=config.telegram.global_burst,
+    admin_users=config.telegram.admin_ids,
+    exempt_chats=[config.telegram.moderation_channel],
+    max_concurrent_updates=config.telegram.concurrent_updates,
+)
+
+# Console news loader (started in post_init, stopped in post_shutdown)
+loader_task = None
 
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -68,19 +87,86 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
 
 
 async def post_init(app):
-    try:
-        await app.bot.delete_webhook(drop_pending_updates=True)
-    except Exception as e:
-        logger.warning(f"Не удалось удалить webhook: {e}")
+    global loader_task
 
-    # Start news loading task
-    asyncio.create_task(load_and_send_news(db, app.bot, telegram_service))
+    # run_webhook registers its own webhook; a leftover one would block getUpdates
+    if config.telegram.run_mode == "polling":
+        try:
+            await app.bot.delete_webhook(drop_pending_updates=True)
+        except Exception as e:
+            logger.warning(f"Не удалось удалить webhook: {e}")
+
+    # Start moderation job workers (resumes actions left unfinished by the last run)
+    await jobs.start(app.bot)
+
+    # Start news loading task (reads the console menu, so only when there is a terminal)
+    if sys.stdin is not None and sys.stdin.isatty():
+        loader_task = asyncio.create_task(load_and_send_news(db, app.bot, telegram_service))
+    else:
+        logger.info("No terminal attached, console news loader disabled")
+
+
+async def post_shutdown(app):
+    # Updates are no longer accepted here: finish what is in flight, then flush the store
+    if loader_task is not None:
+        loader_task.cancel()
+    await jobs.stop()
+    await telegram_service.close()
+    await db.force_save()
+    logger.info("Database flushed after shutdown")
+
+
+def build_application() -> Application:
+    builder = (
+        Application.builder()
+        .token(config.telegram.bot_token)
+        .concurrent_updates(rate_limiter)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if config.telegram.api_base_url:
+        api_base_url = config.telegram.api_base_url.rstrip("/")
+        builder = builder.base_url(f"{api_base_url}/bot").base_file_url(f"{api_base_url}/file/bot")
+        logger.info(f"Using Bot API at {api_base_url}")
+    return builder.build()
+
+
+def run_application(application: Application):
+    """Serve updates by polling or through the webhook server, per ``config.telegram.run_mode``.
+
+    Both return after SIGINT/SIGTERM once post_shutdown has run.
+    """
+    mode = config.telegram.run_mode
+    if mode == "webhook":
+        if not config.telegram.webhook_url:
+            raise ValueError("TELEGRAM_WEBHOOK_URL is required in webhook mode")
+        logger.info(f"Webhook server on {config.telegram.webhook_listen}:{config.telegram.webhook_port}"
+                    f"/{config.telegram.webhook_path}, registered as {config.telegram.webhook_url}")
+        application.run_webhook(
+            listen=config.telegram.webhook_listen,
+            port=config.telegram.webhook_port,
+            url_path=config.telegram.webhook_path,
+            webhook_url=config.telegram.webhook_url,
+            # Requests without this header value are rejected with 403
+            secret_token=config.telegram.webhook_secret or secrets.token_urlsafe(32),
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True,
+            close_loop=False
+        )
+    elif mode == "polling":
+        application.run_polling(
+            drop_pending_updates=True,
+            close_loop=False
+        )
+    else:
+        raise ValueError(f"Unknown TELEGRAM_RUN_MODE {mode!r} (polling or webhook)")
 
 
 def run_bot():
-    logger.info("Starting Telegram News Bot")
+    logger.info(f"Starting Telegram News Bot ({config.telegram.run_mode} mode, "
+                f"{config.telegram.concurrent_updates} concurrent updates)")
 
-    application = Application.builder().token(config.telegram.bot_token).post_init(post_init).build()
+    application = build_application()
 
     # Command handlers
     application.add_handler(CommandHandler("start", handlers.start_command))
@@ -108,10 +194,7 @@ def run_bot():
     logger.info("Bot starting...")
 
     try:
-        application.run_polling(
-            drop_pending_updates=True,
-            close_loop=False
-        )
+        run_application(application)
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
@@ -120,7 +203,7 @@ def run_bot():
         # Cleanup
         logger.info("Shutting down...")
         try:
-            db.force_save()
+            db.close()
             logger.info("Database saved before shutdown")
         except Exception as e:
             logger.error(f"Error saving database: {e}")
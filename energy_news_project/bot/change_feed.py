@@ -0,0 +1,248 @@
+# bot/change_feed.py
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, List, Optional, Tuple
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def feed_paths_for(db_file: str) -> Tuple[str, str]:
+    """(change feed, lock file) used by a shared SafeNewsDB stored in ``db_file``."""
+    return f"{db_file}.changes", f"{db_file}.lock"
+
+
+class FileLock:
+    """Exclusive lock shared by every process that opens the same lock file.
+
+    Uses ``flock`` (``msvcrt.locking`` on Windows) on a descriptor kept open
+    for the lifetime of the object. Reentrant, and safe to use from several
+    threads: they queue on an internal RLock before touching the file lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        # LK_LOCK gives up after ~10 s of retries; keep waiting
+                        msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+        except Exception:
+            self._thread_lock.release()
+            raise
+        self._depth = 1
+
+    def release(self):
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread_lock.release()
+
+    @contextmanager
+    def held(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def close(self):
+        with self._thread_lock:
+            if self._fd is not None and not self._depth:
+                os.close(self._fd)
+                self._fd = None
+
+
+class ChangeFeed:
+    """Append-only journal of committed changes, shared between processes.
+
+    The first line is a header ``{"generation", "base_version"}``: the main
+    database file holds the state as of ``base_version``. Every following line
+    is one committed transaction with a monotonically increasing ``version``
+    and the full new value of each record it touched, so entries can be
+    replayed in order on top of any checkpoint at or after ``base_version``.
+
+    ``checkpoint`` replaces the file with a fresh header once the main file has
+    been rewritten. Readers keep a byte offset and only read what was appended
+    since their last look. A new generation in the header means the file was
+    replaced; if its base is past their version they reload the main file.
+
+    All methods except ``changed()`` must be called with the process-wide
+    lock held (see FileLock).
+    """
+
+    def __init__(self, path: str, default: Optional[Callable[[Any], Any]] = None,
+                 max_bytes: int = 8 * 1024 * 1024):
+        self.path = path
+        self.default = default
+        self.max_bytes = max_bytes
+
+        self.version = 0
+        self.base_version = 0
+        self.generation: Optional[str] = None
+        self._header = b""
+        self._offset = 0
+        self._seen: Optional[tuple] = None
+
+    # ===== READING =====
+    def open(self) -> List[dict]:
+        """Read the whole feed (creating it if missing); returns the entries after the base."""
+        if not os.path.exists(self.path):
+            self._write_header(0)
+        with open(self.path, "rb") as f:
+            _, entries = self._read_all(f)
+        return entries
+
+    @staticmethod
+    def _stamp(st: os.stat_result) -> tuple:
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def changed(self) -> bool:
+        """Cheap check (one stat, no lock) for appends or a checkpoint since the last read."""
+        try:
+            return self._stamp(os.stat(self.path)) != self._seen
+        except FileNotFoundError:
+            return False
+
+    def read_new(self) -> Tuple[bool, List[dict]]:
+        """(reload, entries) committed since the last read.
+
+        ``reload`` is True when the feed was checkpointed past our version and
+        the missing entries are gone: the caller must reload the main file and
+        then apply ``entries``.
+        """
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            # The header carries a unique generation; inode numbers get reused after a checkpoint
+            if f.readline() != self._header or st.st_size < self._offset:
+                f.seek(0)
+                return self._read_all(f)
+
+            self._seen = self._stamp(st)
+            if st.st_size == self._offset:
+                return False, []
+            f.seek(self._offset)
+            data = f.read()
+        return False, self._newer(self._parse(data))
+
+    def _read_all(self, f: BinaryIO) -> Tuple[bool, List[dict]]:
+        st = os.fstat(f.fileno())
+        data = f.read()
+
+        header_end = data.find(b"\n")
+        header = json.loads(data[:header_end])
+        self._header = data[:header_end + 1]
+        self._offset = header_end + 1
+        self._seen = self._stamp(st)
+        self.generation = header["generation"]
+        self.base_version = header["base_version"]
+
+        reload = self.base_version > self.version
+        if reload:
+            self.version = self.base_version
+        return reload, self._newer(self._parse(data[header_end + 1:]))
+
+    def _parse(self, data: bytes) -> List[dict]:
+        """Decode complete lines and advance the offset past them; a torn tail is left for later."""
+        entries = []
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping unreadable change feed entry in {self.path}: {e}")
+        self._offset += end
+        return entries
+
+    def _newer(self, entries: List[dict]) -> List[dict]:
+        entries = [entry for entry in entries if entry.get("version", 0) > self.version]
+        if entries:
+            self.version = entries[-1]["version"]
+        return entries
+
+    # ===== WRITING =====
+    def append(self, entry: dict, fsync: bool = False) -> int:
+        """Append one committed transaction; the caller must have read up to the end first."""
+        version = self.version + 1
+        entry = dict(entry, version=version, ts=int(time.time()))
+        line = json.dumps(entry, ensure_ascii=False, default=self.default).encode("utf-8") + b"\n"
+        with open(self.path, "r+b") as f:
+            # Drops a torn tail left by a writer that crashed mid-append
+            f.seek(self._offset)
+            f.truncate()
+            f.write(line)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._offset += len(line)
+        self._seen = self._stamp(os.stat(self.path))
+        self.version = version
+        return version
+
+    def sync(self):
+        """fsync appends made with ``fsync=False``."""
+        with open(self.path, "r+b") as f:
+            os.fsync(f.fileno())
+
+    def checkpoint(self, version: int):
+        """Start a new, empty feed whose base is ``version`` (the main file must already hold it)."""
+        self._write_header(version)
+        self.version = version
+        with open(self.path, "rb") as f:
+            self._read_all(f)
+
+    def needs_checkpoint(self) -> bool:
+        return self._offset >= self.max_bytes
+
+    def _write_header(self, base_version: int):
+        header = {"generation": uuid.uuid4().hex, "base_version": base_version, "created_at": time.time()}
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
+
+    def get_stats(self) -> dict:
+        return {
+            "version": self.version,
+            "base_version": self.base_version,
+            "generation": self.generation,
+            "bytes": self._offset,
+        }
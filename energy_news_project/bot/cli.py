@@ -4,7 +4,8 @@ import json
 import asyncio
 from typing import Union
 
-from bot.database import SafeNewsDB
+from bot.async_database import AsyncNewsDB
+from models import NewsItem
 
 DATA_DIR = "data"
 
@@ -21,7 +22,7 @@ async def safe_input(prompt):
         return ""
 
 
-async def load_and_send_news(db: SafeNewsDB, bot, telegram_service):
+async def load_and_send_news(db: AsyncNewsDB, bot, telegram_service):
     """
     Консольное меню для загрузки новостей и отправки их в модерацию.
     """
@@ -30,7 +31,7 @@ async def load_and_send_news(db: SafeNewsDB, bot, telegram_service):
         print("1) Загрузить новые новости из последнего файла energy_news*.json")
         print("2) Загрузить новости из выбранного файла")
         print("3) Показать количество новостей в базе")
-        print("4) Очистить NEWS_DB и sent_ids.json")
+        print("4) Очистить NEWS_DB и отправленные ID (sent_ids.idx / sent_ids.log)")
         print("5) Очистить поврежденные записи (без message_id)")
         print("0) Выход")
 
@@ -51,7 +52,7 @@ async def load_and_send_news(db: SafeNewsDB, bot, telegram_service):
 
             try:
                 with open(latest_file, "r", encoding="utf-8") as f:
-                    news_list = json.load(f)
+                    news_list = [NewsItem.from_dict(item) for item in json.load(f)]
                 print(f"📂 Загружено {len(news_list)} новостей из {os.path.basename(latest_file)}")
             except Exception as e:
                 print(f"❗ Ошибка чтения файла {latest_file}: {e}")
@@ -70,7 +71,7 @@ async def load_and_send_news(db: SafeNewsDB, bot, telegram_service):
 
             try:
                 with open(file_path, "r", encoding="utf-8") as f:
-                    news_list = json.load(f)
+                    news_list = [NewsItem.from_dict(item) for item in json.load(f)]
                 print(f"📂 Загружено {len(news_list)} новостей из {file_name}")
             except Exception as e:
                 print(f"❗ Ошибка чтения файла {file_path}: {e}")
@@ -85,19 +86,20 @@ async def load_and_send_news(db: SafeNewsDB, bot, telegram_service):
         elif choice == "4":
             confirm = await safe_input("Вы уверены, что хотите очистить базу? (yes/no): ")
             if confirm.lower() in ['yes', 'y', 'да', 'д']:
-                db.clear_all()
-                print("🗑️ NEWS_DB и sent_ids.json очищены.")
+                await db.clear_all()
+                print("🗑️ NEWS_DB и отправленные ID (sent_ids.idx / sent_ids.log) очищены.")
             else:
                 print("❌ Очистка отменена.")
             continue
 
         # --- 5) Очистка поврежденных записей ---
         elif choice == "5":
-            broken_count = 0
-            for news_id, data in list(db.news_db.items()):
-                if data.get("message_id") is None:
-                    db.delete_news(news_id)
-                    broken_count += 1
+            broken_ids = []
+            for news_id in db.get_all_news_ids():
+                data = db.get_news(news_id)
+                if data and data.get("message_id") is None:
+                    broken_ids.append(news_id)
+            broken_count = await db.delete_many(broken_ids)
             print(f"🔧 Удалено {broken_count} записей с поврежденными message_id.")
             continue
 
@@ -134,10 +136,12 @@ async def load_and_send_news(db: SafeNewsDB, bot, telegram_service):
                     # Отправляем через telegram_service
                     message = await telegram_service.send_to_moderation(bot, item, item_id)
                     if message and message.message_id:
-                        db.add_news(item_id, item, message.message_id, telegram_service.config.moderation_channel)
+                        # Записываем сразу: кнопки модерации уже работают, и новость
+                        # не должна уйти повторно после сбоя
+                        await db.add_news(item_id, item, message.message_id,
+                                          telegram_service.config.moderation_channel)
 
                     count += 1
-                    await asyncio.sleep(1)
 
                 except Exception as e:
                     print(f"❗ Ошибка отправки новости #{i}: {e}")
@@ -1,4 +1,5 @@
 # bot/database.py
+import bisect
 import json
 import os
 import shutil
@@ -6,19 +7,193 @@ import threading
 import time
 from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Set, Optional, Any
+from typing import Callable, Dict, Iterable, List, NamedTuple, Set, Optional, Any, Tuple, Union
 import logging
 
+from bot.backup import IncrementalBackup
+from bot.blob_store import BlobStore, default_blob_dir
+from bot.change_feed import ChangeFeed, FileLock, feed_paths_for
+from bot.serialization import detect_codec, get_codec
+from bot.sent_ids import SentIdSet
+from models import NewsItem, json_default
+from parser.metrics import Histogram, LATENCY_BUCKETS
+
 logger = logging.getLogger(__name__)
 
+# Marker for "key did not exist" in the undo log
+_ABSENT = object()
+
+# news_data key holding the blob reference of an externalized full_text
+BODY_REF_KEY = "full_text_ref"
+
+
+def stored_json_default(value: Any) -> Any:
+    """``default=`` hook for news_db.json: blob-backed bodies are written as their reference only."""
+    if isinstance(value, NewsItem):
+        ref = value.extra.get(BODY_REF_KEY) if value.extra else None
+        if not value.full_text_loaded:
+            return value.to_dict(include_full_text=False)
+        # A body that was read (or edited in place) since it was stored
+        text = value.full_text
+        return value.to_dict(include_full_text=not (ref and text and BlobStore.ref_for(text) == ref))
+    return json_default(value)
+
+
+def copy_record(record: dict) -> dict:
+    """Copy a record and the containers nested updates write into (news_data etc.)."""
+    result = dict(record)
+    for key, value in result.items():
+        if isinstance(value, NewsItem):
+            result[key] = value.copy()
+        elif isinstance(value, dict):
+            result[key] = dict(value)
+    return result
+
+
+def record_status(record: Optional[dict]) -> Optional[str]:
+    """Moderation status of a record; records without one are pending."""
+    return None if record is None else record.get("status", "pending")
+
+
+def _record_url(record: Optional[dict]) -> Optional[str]:
+    news_data = record.get("news_data") if record is not None else None
+    return news_data.get("url") if news_data is not None else None
+
+
+def apply_updates(record: dict, updates: dict):
+    """Apply updates to a record, supporting nested keys like 'news_data.full_text'."""
+    for key, value in updates.items():
+        if '.' in key:
+            # Handle nested keys like 'news_data.full_text'
+            parts = key.split('.')
+            current = record
+
+            # Navigate to the parent of the target key
+            for part in parts[:-1]:
+                if part not in current:
+                    current[part] = {}
+                current = current[part]
+
+            # Set the final value
+            final_key = parts[-1]
+            current[final_key] = value
+            logger.debug(f"Updated {key} = {value}")
+        else:
+            # Direct key update
+            record[key] = value
+            logger.debug(f"Updated {key} = {value}")
+
+    # Always update the timestamp
+    record["updated_at"] = datetime.now().isoformat()
+
+
+def _reindex_key(index: dict, news_id: str, old_key: Any, new_key: Any):
+    if old_key == new_key:
+        if new_key is not None:
+            index[new_key] = news_id
+        return
+    if old_key is not None and index.get(old_key) == news_id:
+        del index[old_key]
+    if new_key is not None:
+        index[new_key] = news_id
+
+
+def _reindex_lookups(lookups: tuple, news_id: str, old: Optional[dict], new: Optional[dict]):
+    """Move ``news_id`` between the entries of ``old`` and ``new`` in (by_status, by_url, by_message_id)."""
+    by_status, by_url, by_message_id = lookups
+    old_status, new_status = record_status(old), record_status(new)
+    if old_status != new_status:
+        if old_status is not None:
+            ids = by_status.get(old_status)
+            if ids is not None:
+                ids.discard(news_id)
+        if new_status is not None:
+            by_status.setdefault(new_status, set()).add(news_id)
+
+    _reindex_key(by_url, news_id, _record_url(old), _record_url(new))
+    _reindex_key(by_message_id, news_id,
+                 old.get("message_id") if old is not None else None,
+                 new.get("message_id") if new is not None else None)
+
+
+DURABILITY_MODES = ("sync", "deferred")
+
+
+class CommittedState(NamedTuple):
+    """Counters of the last committed version, published as one immutable object."""
+
+    version: int
+    total_news: int
+    status_counts: Dict[str, int]
+
 
 class SafeNewsDB:
-    """Thread-safe news database with transactions, caching, and automatic backups."""
+    """Thread-safe news database with transactions, caching, and automatic backups.
+
+    With ``durability="sync"`` every committed transaction rewrites the files.
+    With ``durability="deferred"`` commits only update memory and mark the store
+    dirty; a flusher thread writes the coalesced changes every
+    ``flush_interval`` seconds or as soon as ``flush_max_changes`` have piled
+    up, so at most ``flush_interval`` seconds of state can be lost on a crash.
+    ``force_save()`` and ``close()`` always flush.
+
+    Readers never take the lock. Each commit publishes its changed records
+    into ``_committed`` (a dict only writers modify, one key at a time) and
+    swaps in a new ``CommittedState``, so ``get_news``, ``__contains__``,
+    ``get_all_news_ids`` and ``get_stats`` see the last committed version and
+    never block behind a write or a flush. ``find_by_url``,
+    ``find_by_message_id`` and ``get_ids_by_status`` read committed copies of
+    those indexes, updated the same way. Single dict and set operations are
+    atomic under the GIL.
+
+    Article bodies (``news_data.full_text``) live in a content-addressed
+    BlobStore; records keep only ``full_text_ref`` and load the body on first
+    access, so neither startup nor saves touch the bodies.
+
+    The main file is written through a pluggable codec (``codec``: compact
+    "json" by default, the original "json-indent", or "msgpack"); the format
+    is detected on load and converted once if it differs from the configured
+    one. Both compact codecs stream record by record.
+
+    With ``shared=True`` several processes (bot, CLI, parser) can open the same
+    files. Every outermost transaction holds an exclusive file lock
+    (``news_db.json.lock``), first applies what other processes committed, and
+    appends its own changes to a ChangeFeed (``news_db.json.changes``) instead
+    of rewriting the main file; the main file becomes a checkpoint written when
+    the feed grows past ``feed_max_bytes``, on ``clear_all``/``restore_to`` and
+    on close. A watcher thread picks up foreign commits every
+    ``watch_interval`` seconds, and ``subscribe()`` callbacks hear about each
+    committed change with its version.
+
+    With ``retention_days`` the backup thread also expires old news every
+    ``expiry_interval`` seconds, oldest first through the created_at index,
+    in transactions of at most ``expiry_batch_size`` deletions: one save per
+    batch, and the lock is released between batches.
+    """
+
+    def __init__(self, db_file="data/news_db.json", sent_ids_file="data/sent_ids.json", backup_interval=3600,
+                 durability="sync", flush_interval=1.0, flush_max_changes=100,
+                 blob_dir: Optional[str] = None, blob_cache_size: int = 64, backup_dir: Optional[str] = None,
+                 sent_ids_ttl: Optional[float] = None, shared: bool = False, watch_interval: float = 0.5,
+                 feed_max_bytes: int = 8 * 1024 * 1024, codec: str = "json",
+                 retention_days: int = 0, expiry_interval: float = 300, expiry_batch_size: int = 500):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability!r}")
 
-    def __init__(self, db_file="data/news_db.json", sent_ids_file="data/sent_ids.json", backup_interval=3600):
         self.db_file = db_file
         self.sent_ids_file = sent_ids_file
         self.backup_interval = backup_interval
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.flush_max_changes = flush_max_changes
+        self.sent_ids_ttl = sent_ids_ttl
+        self.shared = shared
+        self.watch_interval = watch_interval
+        self.feed_max_bytes = feed_max_bytes
+        self.codec = get_codec(codec, default=stored_json_default)
+        self.retention_days = retention_days
+        self.expiry_interval = expiry_interval
+        self.expiry_batch_size = expiry_batch_size
 
         # Ensure directories exist
         os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
@@ -27,205 +202,862 @@ class SafeNewsDB:
         # Thread safety
         self._lock = threading.RLock()
 
+        # Article bodies
+        self.blobs = BlobStore(blob_dir or default_blob_dir(self.db_file), cache_size=blob_cache_size)
+        self._bodies_moved = 0
+
+        # Incremental backups: ids changed since the last backup
+        self.backups = IncrementalBackup(backup_dir or os.path.join(os.path.dirname(self.db_file) or ".", "backups"))
+        self._backup_news: Set[str] = set()
+        self._backup_sent: Set[str] = set()
+        self._backup_full = False
+
         # In-memory data
         self.news_db: Dict[str, Any] = {}
-        self.sent_ids: Set[str] = set()
-
-        # Load existing data
-        self._load_db()
-        self._load_sent_ids()
+        self.sent_ids: Optional[SentIdSet] = None
+
+        # Secondary indexes, kept in sync by _put_record/_pop_record/_rollback_to
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_created: List[Tuple[str, str]] = []  # sorted (created_at, news_id)
+        self._by_url: Dict[str, str] = {}
+        self._by_message_id: Dict[Any, str] = {}
+
+        # Undo log of the current (possibly nested) transaction
+        self._undo_log: List[tuple] = []
+        self._tx_depth = 0
+
+        # Last committed version for lock-free readers, and its (status, url, message_id) indexes
+        self._committed: Dict[str, Any] = {}
+        self._committed_lookups: Tuple[Dict[str, Set[str]], Dict[str, str], Dict[Any, str]] = ({}, {}, {})
+        self._state = CommittedState(0, 0, {})
+        self._lock_wait = Histogram(LATENCY_BUCKETS)
+        self._lock_hold = Histogram(LATENCY_BUCKETS)
+
+        # Multi-process access: file lock, change feed and subscribers
+        self._process_lock = FileLock(feed_paths_for(self.db_file)[1]) if shared else None
+        self._process_lock_wait = Histogram(LATENCY_BUCKETS)
+        self._backup_lock = FileLock(os.path.join(self.backups.directory, "backup.lock")) if shared else None
+        self._feed: Optional[ChangeFeed] = None
+        self._listeners: List[Callable[[int, Optional[Set[str]]], None]] = []
+
+        # Deferred durability: committed-but-unwritten changes and flush stats
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._closed = False
+        self._dirty_changes = 0
+        self._flush_stats = {"flushes": 0, "coalesced_changes": 0, "last_flush_ms": 0.0,
+                             "max_flush_ms": 0.0, "total_flush_ms": 0.0}
+        self._expiry_stats = {"runs": 0, "expired": 0, "batches": 0, "last_run": None, "max_batch_ms": 0.0}
+
+        # Load existing data (other processes wait while the files are read)
+        if self.shared:
+            self._process_lock.acquire()
+        try:
+            self._load_sent_ids()
+            self._load_db()
+            self._rebuild_indexes()
+            self._open_feed()
+        finally:
+            if self.shared:
+                self._process_lock.release()
+        self._reset_committed()
+        self._publish_state()
 
         # Background backup
         self._last_backup = time.time()
         self._start_backup_thread()
+        if self.durability == "deferred":
+            self._start_flush_thread()
+        if self.shared:
+            self._start_watch_thread()
 
         logger.info(f"Database initialized: {len(self.news_db)} news items, {len(self.sent_ids)} sent IDs")
 
     def _start_backup_thread(self):
-        """Start background thread for periodic backups."""
+        """Start background thread for periodic backups and expiry."""
 
         def backup_worker():
             while True:
                 try:
-                    time.sleep(300)  # Check every 5 minutes
+                    # Check every 5 minutes, or more often when expiring
+                    time.sleep(min(300, self.expiry_interval) if self.retention_days else 300)
+                    if self.retention_days and not self._closed:
+                        self.expire_old_news(self.retention_days)
                     if time.time() - self._last_backup > self.backup_interval:
-                        self._create_backup()
+                        with self._backup_section():
+                            self._create_backup()
                         self._last_backup = time.time()
+                        self.collect_garbage()
                 except Exception as e:
                     logger.error(f"Backup thread error: {e}")
 
         backup_thread = threading.Thread(target=backup_worker, daemon=True)
         backup_thread.start()
 
-    def _create_backup(self):
-        """Create backup files with timestamp."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def _start_flush_thread(self):
+        """Start background thread that persists deferred changes."""
 
-        try:
-            with self._lock:
-                # Backup news database
-                backup_db_file = f"{self.db_file}.backup_{timestamp}"
-                if os.path.exists(self.db_file):
-                    shutil.copy2(self.db_file, backup_db_file)
+        def flush_worker():
+            while not self._closed:
+                # Woken early when flush_max_changes is reached
+                self._flush_event.wait(self.flush_interval)
+                self._flush_event.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Flush thread error: {e}")
 
-                # Backup sent IDs
-                backup_ids_file = f"{self.sent_ids_file}.backup_{timestamp}"
-                if os.path.exists(self.sent_ids_file):
-                    shutil.copy2(self.sent_ids_file, backup_ids_file)
+        self._flush_thread = threading.Thread(target=flush_worker, name="SafeNewsDB-flush", daemon=True)
+        self._flush_thread.start()
 
-                logger.info(f"Backup created: {backup_db_file}")
+    def _start_watch_thread(self):
+        """Start background thread that applies changes committed by other processes."""
 
-                # Clean old backups (keep only last 10)
-                self._cleanup_old_backups()
+        def watch_worker():
+            while not self._closed:
+                time.sleep(self.watch_interval)
+                try:
+                    if not self._closed:
+                        self.refresh()
+                except Exception as e:
+                    logger.error(f"Change feed watcher error: {e}")
 
-        except Exception as e:
-            logger.error(f"Backup creation failed: {e}")
+        self._watch_thread = threading.Thread(target=watch_worker, name="SafeNewsDB-watch", daemon=True)
+        self._watch_thread.start()
 
-    def _cleanup_old_backups(self):
-        """Remove old backup files, keeping only the 10 most recent."""
+    @contextmanager
+    def _backup_section(self):
+        """In shared mode, serialize backups of all processes on the backup directory."""
+        if self._backup_lock is None:
+            yield
+            return
+        with self._backup_lock.held():
+            # Another process may have added bases or segments since we last looked
+            self.backups.reload()
+            self.refresh()
+            yield
+
+    def _create_backup(self):
+        """Write a base snapshot, or a segment with only what changed since the last backup."""
         try:
-            db_dir = os.path.dirname(self.db_file)
-            db_name = os.path.basename(self.db_file)
-            ids_name = os.path.basename(self.sent_ids_file)
-
-            # Get all backup files
-            db_backups = [f for f in os.listdir(db_dir) if f.startswith(f"{db_name}.backup_")]
-            ids_backups = [f for f in os.listdir(db_dir) if f.startswith(f"{ids_name}.backup_")]
-
-            # Sort by modification time and remove old ones
-            for backups in [db_backups, ids_backups]:
-                if len(backups) > 10:
-                    backups.sort(key=lambda x: os.path.getmtime(os.path.join(db_dir, x)))
-                    for old_backup in backups[:-10]:
-                        os.remove(os.path.join(db_dir, old_backup))
-                        logger.debug(f"Removed old backup: {old_backup}")
+            with self._lock:
+                full = self._backup_full or self.backups.needs_base()
+                if not full and not self._backup_news and not self._backup_sent:
+                    logger.debug("No changes since last backup")
+                    return
+                # Records are copy-on-write, so they can be encoded after the lock is released
+                if full:
+                    records = dict(self._committed)
+                    sent: Any = list(self.sent_ids)
+                else:
+                    records = {news_id: self._committed.get(news_id) for news_id in self._backup_news}
+                    sent = {news_id: news_id in self.sent_ids for news_id in self._backup_sent}
+                tracked = (self._backup_news, self._backup_sent, self._backup_full)
+                self._backup_news, self._backup_sent, self._backup_full = set(), set(), False
+
+            try:
+                if full:
+                    self.backups.write_base(
+                        {news_id: self._backup_record(record) for news_id, record in records.items()}, sent
+                    )
+                else:
+                    self.backups.write_segment(
+                        {news_id: None if record is None else self._backup_record(record)
+                         for news_id, record in records.items()},
+                        sent
+                    )
+            except Exception:
+                # Keep the changes for the next attempt
+                with self._lock:
+                    self._backup_news |= tracked[0]
+                    self._backup_sent |= tracked[1]
+                    self._backup_full = self._backup_full or tracked[2]
+                raise
 
         except Exception as e:
-            logger.error(f"Backup cleanup failed: {e}")
+            logger.error(f"Backup creation failed: {e}")
+
+    @staticmethod
+    def _backup_record(record: dict) -> dict:
+        """Self-contained copy of a record for backups, with the body inline."""
+        result = dict(record)
+        news_data = result.get("news_data")
+        if isinstance(news_data, NewsItem):
+            data = news_data.to_dict()
+            data.pop(BODY_REF_KEY, None)
+            result["news_data"] = data
+        return result
+
+    def _track_backup_changes(self):
+        for kind, key, _ in self._undo_log:
+            if kind == "news":
+                self._backup_news.add(key)
+            elif kind == "sent":
+                self._backup_sent.add(key)
+            else:
+                self._backup_full = True
 
     def _load_db(self):
         """Load news database from file."""
         if os.path.exists(self.db_file):
             try:
-                with open(self.db_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        self.news_db = data
-                    else:
-                        logger.warning("Invalid database format, starting with empty database")
-                        self.news_db = {}
-            except (json.JSONDecodeError, IOError) as e:
+                codec = detect_codec(self.db_file)
+                if codec is None:
+                    raise ValueError("database file is empty")
+                with open(self.db_file, "rb") as f:
+                    self.news_db = self._decode_records(dict(codec.iter_records(f)))
+
+                if self._bodies_moved or codec.name != self.codec.name:
+                    # One-time rewrite without the inline bodies and in the configured format
+                    self._save_db()
+                    if self._bodies_moved:
+                        logger.info(f"Moved {self._bodies_moved} article bodies to {self.blobs.directory}")
+                    if codec.name != self.codec.name:
+                        logger.info(f"Converted {self.db_file} from {codec.name} to {self.codec.name}")
+            except (ValueError, IOError) as e:
                 logger.error(f"Failed to load database: {e}")
                 # Try to load from latest backup
                 self._restore_from_backup()
 
     def _load_sent_ids(self):
-        """Load sent IDs from file."""
-        if os.path.exists(self.sent_ids_file):
-            try:
-                with open(self.sent_ids_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        self.sent_ids = set(data)
-                    else:
-                        logger.warning("Invalid sent IDs format, starting with empty set")
-                        self.sent_ids = set()
-            except (json.JSONDecodeError, IOError) as e:
-                logger.error(f"Failed to load sent IDs: {e}")
-                self.sent_ids = set()
+        """Open the sent-ID index (sent_ids.json is imported on first start)."""
+        self.sent_ids = SentIdSet(self.sent_ids_file, ttl=self.sent_ids_ttl)
 
     def _restore_from_backup(self):
         """Restore from the most recent backup."""
         try:
-            db_dir = os.path.dirname(self.db_file)
-            db_name = os.path.basename(self.db_file)
-
-            backups = [f for f in os.listdir(db_dir) if f.startswith(f"{db_name}.backup_")]
-            if not backups:
+            restored = self._read_backup()
+            if restored is None:
                 logger.warning("No backups found")
                 return
+            news_db, _, point = restored
+            self.news_db = self._decode_records(news_db)
+            logger.info(f"Restored from backup: {point}")
 
-            # Get most recent backup
-            latest_backup = max(backups, key=lambda x: os.path.getmtime(os.path.join(db_dir, x)))
-            backup_path = os.path.join(db_dir, latest_backup)
+        except Exception as e:
+            logger.error(f"Failed to restore from backup: {e}")
+            self.news_db = {}
 
-            with open(backup_path, "r", encoding="utf-8") as f:
-                self.news_db = json.load(f)
+    def _read_backup(self, until: Optional[datetime] = None) -> Optional[Tuple[dict, Set[str], str]]:
+        """(news_db, sent_ids, restore point) as of ``until``, or None if there is no backup."""
+        restored = self.backups.restore(until)
+        if restored is not None or until is not None:
+            return restored
+
+        # Full-copy backups written before incremental backups existed
+        db_dir = os.path.dirname(self.db_file) or "."
+        db_name = os.path.basename(self.db_file)
+        backups = [f for f in os.listdir(db_dir) if f.startswith(f"{db_name}.backup_")]
+        if not backups:
+            return None
+
+        latest_backup = max(backups, key=lambda x: os.path.getmtime(os.path.join(db_dir, x)))
+        with open(os.path.join(db_dir, latest_backup), "r", encoding="utf-8") as f:
+            return json.load(f), set(self.sent_ids), latest_backup
+
+    def restore_to(self, until: datetime) -> str:
+        """Replace the database with its backed-up state as of ``until``; returns the restore point."""
+        restored = self._read_backup(until)
+        if restored is None:
+            raise ValueError(f"No backup at or before {until.isoformat()}")
+
+        news_db, sent_ids, point = restored
+        with self.transaction():
+            self._undo_log.append(("clear", None, (self.news_db, self.sent_ids.snapshot())))
+            self.news_db = self._decode_records(news_db)
+            self.sent_ids.replace(sent_ids)
+            self._rebuild_indexes()
+
+        logger.warning(f"Database restored to backup point {point}")
+        return point
+
+    def _decode_records(self, data: dict) -> Dict[str, Any]:
+        """Turn stored news_data dicts into NewsItem records with lazy bodies."""
+        self._bodies_moved = 0
+        for record in data.values():
+            if isinstance(record, dict) and isinstance(record.get("news_data"), dict):
+                stored = record["news_data"]
+                item = record["news_data"] = NewsItem.from_dict(stored)
+                ref = item.extra.get(BODY_REF_KEY) if item.extra else None
+                if "full_text" in stored:
+                    # Legacy record with the body inline
+                    if self._externalize_body(item):
+                        self._bodies_moved += 1
+                elif ref:
+                    item.full_text = self.blobs.loader(ref)
+        return data
+
+    def _externalize_body(self, news_data: Any) -> bool:
+        """Move a loaded body into the blob store, leaving a lazy loader behind."""
+        if not isinstance(news_data, NewsItem) or not news_data.full_text_loaded:
+            return False
+        text = news_data.full_text
+        if not isinstance(text, str) or not text:
+            if news_data.extra:
+                news_data.extra.pop(BODY_REF_KEY, None)
+            return False
+        ref = self.blobs.put(text)
+        news_data[BODY_REF_KEY] = ref
+        news_data.full_text = self.blobs.loader(ref)
+        return True
 
-            logger.info(f"Restored from backup: {latest_backup}")
+    def _referenced_blobs(self) -> Set[str]:
+        """Blob references used by the live records and by legacy full-copy backups.
 
+        Incremental backups store bodies inline and need no blobs.
+        """
+        with self._lock:
+            refs = {
+                record["news_data"].get(BODY_REF_KEY)
+                for record in self.news_db.values()
+                if isinstance(record, dict) and record.get("news_data") is not None
+            }
+
+        db_dir = os.path.dirname(self.db_file) or "."
+        db_name = os.path.basename(self.db_file)
+        for name in os.listdir(db_dir):
+            if not name.startswith(f"{db_name}.backup_"):
+                continue
+            try:
+                with open(os.path.join(db_dir, name), "r", encoding="utf-8") as f:
+                    backup = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Skipping unreadable backup {name}: {e}")
+                continue
+            refs.update(
+                record.get("news_data", {}).get(BODY_REF_KEY)
+                for record in backup.values() if isinstance(record, dict)
+            )
+
+        refs.discard(None)
+        return refs
+
+    def collect_garbage(self) -> int:
+        """Remove body blobs no longer referenced by the database or its backups."""
+        try:
+            if self._feed is not None:
+                # No other process may store a body it has not committed yet while we sweep
+                with self._exclusive():
+                    return self.blobs.collect_garbage(self._referenced_blobs())
+            return self.blobs.collect_garbage(self._referenced_blobs())
         except Exception as e:
-            logger.error(f"Failed to restore from backup: {e}")
-            self.news_db = {}
+            logger.error(f"Blob garbage collection failed: {e}")
+            return 0
 
-    def _save_db(self):
-        """Save news database to file."""
+    def _write_db(self, records: Optional[Dict[str, Any]] = None, fsync: bool = False):
+        """Stream the records through the codec into a temporary file and move it over db_file."""
+        records = self.news_db if records is None else records
+        temp_file = f"{self.db_file}.tmp"
         try:
-            # Write to temporary file first
-            temp_file = f"{self.db_file}.tmp"
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(self.news_db, f, ensure_ascii=False, indent=2)
+            with open(temp_file, "wb", buffering=1024 * 1024) as f:
+                self.codec.dump(records.items(), f)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
 
             # Atomic move
             shutil.move(temp_file, self.db_file)
 
+        except Exception:
+            # Clean up temp file if it exists
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+    def _save_db(self):
+        """Save news database to file."""
+        try:
+            self._write_db()
         except Exception as e:
             logger.error(f"Failed to save database: {e}")
-            # Clean up temp file if it exists
-            if os.path.exists(f"{self.db_file}.tmp"):
-                os.remove(f"{self.db_file}.tmp")
             raise
 
     def _save_sent_ids(self):
-        """Save sent IDs to file."""
+        """Append sent-ID changes to the sent-ID log."""
         try:
-            temp_file = f"{self.sent_ids_file}.tmp"
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(list(self.sent_ids), f, ensure_ascii=False, indent=2)
-
-            shutil.move(temp_file, self.sent_ids_file)
-
+            self.sent_ids.flush(fsync=False)
         except Exception as e:
             logger.error(f"Failed to save sent IDs: {e}")
-            if os.path.exists(f"{self.sent_ids_file}.tmp"):
-                os.remove(f"{self.sent_ids_file}.tmp")
             raise
 
     @contextmanager
     def transaction(self):
-        """Context manager for database transactions."""
-        with self._lock:
-            old_news_db = self.news_db.copy()
-            old_sent_ids = self.sent_ids.copy()
+        """Context manager for database transactions.
+
+        Mutations record only the keys they touch in an undo log, so a
+        transaction costs O(changes). Transactions nest: an inner failure rolls
+        back to the inner start, and data is persisted once when the outermost
+        transaction commits, which also publishes it to readers.
+        """
+        wait_start = time.perf_counter()
+        notifications = []
+        try:
+            with self._lock:
+                outermost = self._tx_depth == 0
+                if outermost:
+                    acquired = time.perf_counter()
+                    self._lock_wait.observe(acquired - wait_start)
+                    process_locked = False
+
+                try:
+                    if outermost and self._feed is not None:
+                        self._process_lock.acquire()
+                        process_locked = True
+                        self._process_lock_wait.observe(time.perf_counter() - acquired)
+                        # Work on top of what other processes committed
+                        notifications.append(self._catch_up())
+
+                    savepoint = len(self._undo_log)
+                    self._tx_depth += 1
+
+                    try:
+                        yield
+                    except Exception as e:
+                        self._tx_depth -= 1
+                        self._rollback_to(savepoint)
+                        if self._tx_depth == 0:
+                            logger.error(f"Transaction rolled back due to error: {e}")
+                        raise
+
+                    self._tx_depth -= 1
+                    if self._tx_depth == 0:
+                        try:
+                            self._track_backup_changes()
+                            self._commit(len(self._undo_log))
+                            notifications.append(self._publish())
+                        except Exception as e:
+                            # Rollback on error
+                            self._rollback_to(0)
+                            logger.error(f"Transaction rolled back due to error: {e}")
+                            raise
+                        finally:
+                            self._undo_log.clear()
+                finally:
+                    if outermost:
+                        if process_locked:
+                            self._process_lock.release()
+                        self._lock_hold.observe(time.perf_counter() - acquired)
+        finally:
+            # Listeners run after the locks are released
+            for notification in notifications:
+                if notification is not None:
+                    self._notify(*notification)
+
+    def _publish(self) -> Optional[Tuple[int, Optional[Set[str]]]]:
+        """Make the committed transaction visible to lock-free readers.
+
+        Returns the (version, changed IDs) listeners should hear about, if any.
+        """
+        if not self._undo_log:
+            return None
+        committed = self._committed
+        changed: Optional[Set[str]] = set()
+        for kind, key, _ in self._undo_log:
+            if kind == "clear":
+                # Whole store replaced: swap in fresh dicts with one assignment each
+                self._reset_committed()
+                changed = None
+                break
+            if kind == "news":
+                record = self.news_db.get(key)
+                old = committed.get(key)
+                if record is None:
+                    committed.pop(key, None)
+                else:
+                    committed[key] = record
+                _reindex_lookups(self._committed_lookups, key, old, record)
+                changed.add(key)
+        self._publish_state()
+        return (self._state.version, changed) if self._listeners else None
+
+    def _publish_state(self):
+        # Shared stores use the feed version, so it means the same thing in every process
+        version = self._feed.version if self._feed is not None else self._state.version + 1
+        self._state = CommittedState(
+            version,
+            len(self.news_db),
+            {status: len(ids) for status, ids in self._by_status.items()},
+        )
+
+    def _commit(self, changes: int):
+        """Persist a committed transaction, or hand it to the flusher."""
+        if not changes:
+            return
+        if self._feed is not None:
+            self._commit_shared(changes)
+            return
+        if self.durability == "deferred":
+            self._dirty_changes += changes
+            if self._dirty_changes >= self.flush_max_changes:
+                self._flush_event.set()
+            return
+
+        start = time.perf_counter()
+        self._save_db()
+        self._save_sent_ids()
+        self._record_flush(time.perf_counter() - start, changes)
+
+    def flush(self) -> bool:
+        """Write pending deferred changes to disk; returns False if nothing was pending.
+
+        Under the lock it only copies the committed dict (records are
+        copy-on-write); encoding and writing happen outside it.
+        """
+        with self._flush_lock:
+            if self._feed is not None:
+                return self._flush_shared()
+
+            with self._lock:
+                changes = self._dirty_changes
+                if not changes:
+                    return False
+                self._dirty_changes = 0
+                start = time.perf_counter()
+                records = dict(self._committed)
+                try:
+                    # Small append; done here so no half-finished transaction leaks into the log
+                    self.sent_ids.flush(fsync=True)
+                except Exception:
+                    self._dirty_changes += changes
+                    raise
 
             try:
-                yield
+                self._write_db(records, fsync=True)
+            except Exception as e:
+                # Keep the changes pending so the next flush retries them
+                with self._lock:
+                    self._dirty_changes += changes
+                logger.error(f"Failed to flush database: {e}")
+                raise
+
+            elapsed = time.perf_counter() - start
+            self._record_flush(elapsed, changes)
+            logger.debug(f"Flushed {changes} changes in {elapsed * 1000:.1f} ms")
+            return True
+
+    # ===== MULTI-PROCESS ACCESS =====
+    def _open_feed(self):
+        """Replay the change feed; in single-process mode fold a leftover one into the main file."""
+        feed_file, _ = feed_paths_for(self.db_file)
+        if not self.shared and not os.path.exists(feed_file):
+            return
+
+        feed = ChangeFeed(feed_file, default=stored_json_default, max_bytes=self.feed_max_bytes)
+        entries = feed.open()
+        if entries:
+            # Sent IDs go through the log again: an entry may have outlived its log append
+            self._apply_entries(entries, log_sent=True)
+            self.sent_ids.flush()
+            logger.info(f"Replayed {len(entries)} changes from {feed_file}")
+
+        if self.shared:
+            self._feed = feed
+        else:
+            if entries:
                 self._save_db()
-                self._save_sent_ids()
+            os.remove(feed_file)
+
+    def _apply_entries(self, entries: List[dict], log_sent: bool = False) -> Set[str]:
+        """Apply change feed entries in order; returns the IDs of the records they touched."""
+        changed = set()
+        for entry in entries:
+            for news_id, stored in (entry.get("news") or {}).items():
+                record = self._decode_records({news_id: stored})[news_id] if stored is not None else None
+                old = self.news_db.get(news_id)
+                old_committed = self._committed.get(news_id)
+                if record is None:
+                    self.news_db.pop(news_id, None)
+                    self._committed.pop(news_id, None)
+                else:
+                    self.news_db[news_id] = record
+                    self._committed[news_id] = record
+                self._reindex(news_id, old, record)
+                _reindex_lookups(self._committed_lookups, news_id, old_committed, record)
+                changed.add(news_id)
+
+            for news_id, sent in (entry.get("sent") or {}).items():
+                if log_sent:
+                    if sent:
+                        self.sent_ids.add(news_id)
+                    else:
+                        self.sent_ids.discard(news_id)
+                else:
+                    # The committing process has already logged it
+                    self.sent_ids.apply(news_id, sent, entry.get("ts"))
+        return changed
+
+    def _catch_up(self) -> Optional[Tuple[int, Optional[Set[str]]]]:
+        """Apply what other processes committed (both locks held); returns the listener notification."""
+        reload, entries = self._feed.read_new()
+        if not reload and not entries:
+            return None
+
+        changed: Optional[Set[str]] = None
+        if reload:
+            self._reload()
+        if entries:
+            ids = self._apply_entries(entries)
+            if not reload:
+                changed = ids
+        self._publish_state()
+        logger.debug(f"Caught up to version {self._feed.version} ({len(entries)} foreign changes)")
+        return (self._state.version, changed) if self._listeners else None
+
+    def _reload(self):
+        """Re-read the checkpoint another process wrote; the entries we missed are gone from the feed."""
+        self.sent_ids.close()
+        self._load_sent_ids()
+        self.news_db = {}
+        self._load_db()
+        self._rebuild_indexes()
+        self._reset_committed()
+        logger.info(f"Reloaded database from checkpoint at version {self._feed.base_version}")
+
+    def _feed_entry(self) -> dict:
+        """New values of everything the current transaction touched."""
+        news, sent = {}, {}
+        for kind, key, _ in self._undo_log:
+            if kind == "news":
+                news[key] = self.news_db.get(key)
+            elif kind == "sent":
+                sent[key] = key in self.sent_ids
+        return {"pid": os.getpid(), "news": news, "sent": sent}
+
+    def _commit_shared(self, changes: int):
+        """Append the transaction to the change feed; the main file is only a checkpoint."""
+        start = time.perf_counter()
+        sync = self.durability == "sync"
+        self.sent_ids.flush(fsync=sync)
+        if any(kind == "clear" for kind, _, _ in self._undo_log):
+            # Whole-store change: other processes reload the checkpoint instead of replaying it
+            self._checkpoint(self._feed.version + 1)
+        else:
+            self._feed.append(self._feed_entry(), fsync=sync)
+            if self._feed.needs_checkpoint():
+                self._checkpoint(self._feed.version)
+
+        if sync:
+            self._record_flush(time.perf_counter() - start, changes)
+        else:
+            self._dirty_changes += changes
+            if self._dirty_changes >= self.flush_max_changes:
+                self._flush_event.set()
+
+    def _checkpoint(self, version: int):
+        """Rewrite the main file and restart the change feed from it (process lock held)."""
+        start = time.perf_counter()
+        self._write_db(fsync=True)
+        self._feed.checkpoint(version)
+        logger.info(f"Checkpoint at version {version} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _flush_shared(self) -> bool:
+        """fsync the feed and sent-ID log appends made since the last flush."""
+        with self._lock:
+            changes = self._dirty_changes
+            if not changes:
+                return False
+            self._dirty_changes = 0
+            start = time.perf_counter()
+            try:
+                with self._process_lock.held():
+                    self._feed.sync()
+                    self.sent_ids.flush(fsync=True)
             except Exception as e:
-                # Rollback on error
-                self.news_db = old_news_db
-                self.sent_ids = old_sent_ids
-                logger.error(f"Transaction rolled back due to error: {e}")
+                self._dirty_changes += changes
+                logger.error(f"Failed to flush change feed: {e}")
                 raise
 
-    def add_news(self, news_id: str, news_data: dict, message_id: int, channel_id: str):
+        self._record_flush(time.perf_counter() - start, changes)
+        return True
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the store lock and, in shared mode, the process lock with foreign changes applied."""
+        notification = None
+        try:
+            with self._lock:
+                if self._feed is None or self._tx_depth:
+                    yield
+                    return
+                with self._process_lock.held():
+                    notification = self._catch_up()
+                    yield
+        finally:
+            if notification is not None:
+                self._notify(*notification)
+
+    def refresh(self) -> bool:
+        """Apply changes other processes committed since the last look; True if there were any."""
+        if self._feed is None or not self._feed.changed():
+            return False
+        version = self._state.version
+        with self._exclusive():
+            pass
+        return self._state.version != version
+
+    @property
+    def version(self) -> int:
+        """Version of the last committed change (shared stores: the same in every process)."""
+        return self._state.version
+
+    def subscribe(self, callback: Callable[[int, Optional[Set[str]]], None]):
+        """Call ``callback(version, news_ids)`` after each commit, local or from another process.
+
+        ``news_ids`` is None when the whole store changed (clear, restore,
+        reload). Callbacks run on the committing or watcher thread after the
+        locks are released.
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[int, Optional[Set[str]]], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, version: int, news_ids: Optional[Set[str]]):
+        for callback in list(self._listeners):
+            try:
+                callback(version, news_ids)
+            except Exception as e:
+                logger.error(f"Change listener failed: {e}")
+
+    def _record_flush(self, seconds: float, changes: int):
+        stats = self._flush_stats
+        elapsed_ms = seconds * 1000
+        stats["flushes"] += 1
+        stats["coalesced_changes"] += changes
+        stats["last_flush_ms"] = elapsed_ms
+        stats["max_flush_ms"] = max(stats["max_flush_ms"], elapsed_ms)
+        stats["total_flush_ms"] += elapsed_ms
+
+    def get_flush_stats(self) -> dict:
+        """Flush count, latency and how many committed changes each write covered."""
+        stats = dict(self._flush_stats)
+        pending = self._dirty_changes
+        flushes = stats.pop("flushes")
+        coalesced = stats.pop("coalesced_changes")
+        total_ms = stats.pop("total_flush_ms")
+        return {
+            "durability": self.durability,
+            "flushes": flushes,
+            "coalesced_changes": coalesced,
+            "changes_per_flush": coalesced / flushes if flushes else 0.0,
+            "pending_changes": pending,
+            "last_flush_ms": stats["last_flush_ms"],
+            "max_flush_ms": stats["max_flush_ms"],
+            "avg_flush_ms": total_ms / flushes if flushes else 0.0,
+        }
+
+    # ===== SECONDARY INDEXES =====
+    def _rebuild_indexes(self):
+        self._by_status = {}
+        self._by_created = []
+        self._by_url = {}
+        self._by_message_id = {}
+        for news_id, record in self.news_db.items():
+            self._reindex(news_id, None, record)
+
+    def _reset_committed(self):
+        """Publish the whole in-memory store to readers (after a load, reload or clear)."""
+        lookups = ({}, {}, {})
+        for news_id, record in self.news_db.items():
+            _reindex_lookups(lookups, news_id, None, record)
+        self._committed = dict(self.news_db)
+        self._committed_lookups = lookups
+
+    def _reindex(self, news_id: str, old: Optional[dict], new: Optional[dict]):
+        """Move ``news_id`` from the index entries of ``old`` to those of ``new``."""
+        _reindex_lookups((self._by_status, self._by_url, self._by_message_id), news_id, old, new)
+
+        old_created = old.get("created_at") if old is not None else None
+        new_created = new.get("created_at") if new is not None else None
+        if old_created != new_created or (old is None) != (new is None):
+            if old_created:
+                position = bisect.bisect_left(self._by_created, (old_created, news_id))
+                if position < len(self._by_created) and self._by_created[position] == (old_created, news_id):
+                    del self._by_created[position]
+            if new_created:
+                bisect.insort(self._by_created, (new_created, news_id))
+
+    def _rollback_to(self, savepoint: int):
+        """Undo logged changes in reverse order down to ``savepoint``."""
+        while len(self._undo_log) > savepoint:
+            kind, key, old = self._undo_log.pop()
+            if kind == "news":
+                current = self.news_db.get(key)
+                if old is _ABSENT:
+                    self.news_db.pop(key, None)
+                    self._reindex(key, current, None)
+                else:
+                    self.news_db[key] = old
+                    self._reindex(key, current, old)
+            elif kind == "sent":
+                if old:
+                    self.sent_ids.add(key)
+                else:
+                    self.sent_ids.discard(key)
+            elif kind == "clear":
+                self.news_db, sent_snapshot = old
+                self.sent_ids.restore(sent_snapshot)
+                self._rebuild_indexes()
+
+    # ===== LOGGED MUTATIONS (call inside transaction()) =====
+    def _put_record(self, news_id: str, record: dict):
+        self._externalize_body(record.get("news_data"))
+        old = self.news_db.get(news_id, _ABSENT)
+        self._undo_log.append(("news", news_id, old))
+        self.news_db[news_id] = record
+        self._reindex(news_id, None if old is _ABSENT else old, record)
+
+    def _pop_record(self, news_id: str) -> Optional[dict]:
+        old = self.news_db.pop(news_id, _ABSENT)
+        if old is _ABSENT:
+            return None
+        self._undo_log.append(("news", news_id, old))
+        self._reindex(news_id, old, None)
+        return old
+
+    def _add_sent(self, news_id: str):
+        if news_id not in self.sent_ids:
+            self._undo_log.append(("sent", news_id, False))
+            self.sent_ids.add(news_id)
+
+    def _discard_sent(self, news_id: str):
+        if news_id in self.sent_ids:
+            self._undo_log.append(("sent", news_id, True))
+            self.sent_ids.discard(news_id)
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations under one lock acquisition and a single save."""
+        with self.transaction():
+            yield self
+
+    def add_news(self, news_id: str, news_data: Union[NewsItem, dict], message_id: int, channel_id: str):
         """Add news item to database."""
         with self.transaction():
-            self.news_db[news_id] = {
-                "news_data": news_data,
+            self._put_record(news_id, {
+                "news_data": NewsItem.from_dict(news_data),
                 "message_id": message_id,
                 "channel_id": channel_id,
                 "created_at": datetime.now().isoformat(),
                 "updated_at": datetime.now().isoformat()
-            }
-            self.sent_ids.add(news_id)
+            })
+            self._add_sent(news_id)
             logger.debug(f"Added news: {news_id}")
 
+    def add_many(self, items: Iterable[Tuple[str, Union[NewsItem, dict], int, str]]) -> int:
+        """Add (news_id, news_data, message_id, channel_id) tuples with one save."""
+        count = 0
+        with self.transaction():
+            for news_id, news_data, message_id, channel_id in items:
+                self.add_news(news_id, news_data, message_id, channel_id)
+                count += 1
+        logger.debug(f"Added {count} news items in batch")
+        return count
+
     def get_news(self, news_id: str) -> Optional[dict]:
-        """Get news item by ID."""
-        with self._lock:
-            return self.news_db.get(news_id)
+        """Get news item by ID (last committed version, no lock)."""
+        return self._committed.get(news_id)
 
     def update_news(self, news_id: str, updates: dict):
         """Update news item with support for nested keys like 'news_data.full_text'."""
@@ -235,30 +1067,10 @@ class SafeNewsDB:
                 return False
 
             try:
-                for key, value in updates.items():
-                    if '.' in key:
-                        # Handle nested keys like 'news_data.full_text'
-                        parts = key.split('.')
-                        current = self.news_db[news_id]
-
-                        # Navigate to the parent of the target key
-                        for part in parts[:-1]:
-                            if part not in current:
-                                current[part] = {}
-                            current = current[part]
-
-                        # Set the final value
-                        final_key = parts[-1]
-                        current[final_key] = value
-                        logger.debug(f"Updated {key} = {value}")
-                    else:
-                        # Direct key update
-                        self.news_db[news_id][key] = value
-                        logger.debug(f"Updated {key} = {value}")
-
-                # Always update the timestamp
-                self.news_db[news_id]["updated_at"] = datetime.now().isoformat()
-
+                # Copy-on-write: the stored record stays intact for rollback
+                record = copy_record(self.news_db[news_id])
+                apply_updates(record, updates)
+                self._put_record(news_id, record)
                 logger.debug(f"Successfully updated news {news_id}")
                 return True
 
@@ -266,98 +1078,157 @@ class SafeNewsDB:
                 logger.error(f"Error updating news {news_id}: {e}")
                 raise  # This will trigger transaction rollback
 
+    def update_many(self, updates: Dict[str, dict]) -> int:
+        """Apply {news_id: updates} with one save; returns number of updated items."""
+        with self.transaction():
+            return sum(1 for news_id, news_updates in updates.items() if self.update_news(news_id, news_updates))
+
     def delete_news(self, news_id: str):
         """Delete news item."""
         with self.transaction():
-            if news_id in self.news_db:
-                del self.news_db[news_id]
-                self.sent_ids.discard(news_id)
+            if self._pop_record(news_id) is not None:
+                self._discard_sent(news_id)
                 logger.debug(f"Deleted news: {news_id}")
                 return True
             return False
 
+    def delete_many(self, news_ids: Iterable[str]) -> int:
+        """Delete several news items with one save; returns number deleted."""
+        with self.transaction():
+            return sum(1 for news_id in news_ids if self.delete_news(news_id))
+
     def is_sent(self, news_id: str) -> bool:
-        """Check if news was already sent."""
-        with self._lock:
-            return news_id in self.sent_ids
+        """Check if news was already sent (SentIdSet has its own short lock)."""
+        return news_id in self.sent_ids
 
     def get_all_news_ids(self) -> Set[str]:
         """Get all news IDs."""
+        return set(self._committed)
+
+    def find_by_url(self, url: str) -> Optional[str]:
+        """ID of the committed news item with this article URL, if any (no lock)."""
+        return self._committed_lookups[1].get(url)
+
+    def find_by_message_id(self, message_id: int) -> Optional[str]:
+        """ID of the committed news item whose moderation message has this ID, if any (no lock)."""
+        return self._committed_lookups[2].get(message_id)
+
+    def get_ids_by_status(self, status: str) -> Set[str]:
+        """IDs of committed news items with the given status (no status means "pending"; no lock)."""
+        return set(self._committed_lookups[0].get(status, ()))
+
+    def get_ids_created_before(self, cutoff: str, limit: Optional[int] = None) -> List[str]:
+        """IDs with created_at older than the ISO timestamp ``cutoff``, oldest first."""
         with self._lock:
-            return set(self.news_db.keys())
+            end = bisect.bisect_left(self._by_created, (cutoff,))
+            if limit is not None:
+                end = min(end, limit)
+            return [news_id for _, news_id in self._by_created[:end]]
 
     def get_stats(self) -> dict:
         """Get database statistics."""
-        with self._lock:
-            total_news = len(self.news_db)
-            sent_count = len(self.sent_ids)
-
-            # Count by status
-            pending = 0
-            published = 0
-            rejected = 0
-
-            for news_data in self.news_db.values():
-                status = news_data.get("status", "pending")
-                if status == "pending":
-                    pending += 1
-                elif status == "published":
-                    published += 1
-                elif status == "rejected":
-                    rejected += 1
-
-            return {
-                "total_news": total_news,
-                "sent_count": sent_count,
-                "pending": pending,
-                "published": published,
-                "rejected": rejected,
-                "db_size_mb": os.path.getsize(self.db_file) / 1024 / 1024 if os.path.exists(self.db_file) else 0
-            }
+        state = self._state
+        return {
+            "total_news": state.total_news,
+            "sent_count": len(self.sent_ids),
+            "sent_ids": self.sent_ids.get_stats(),
+            "pending": state.status_counts.get("pending", 0),
+            "published": state.status_counts.get("published", 0),
+            "rejected": state.status_counts.get("rejected", 0),
+            "db_size_mb": os.path.getsize(self.db_file) / 1024 / 1024 if os.path.exists(self.db_file) else 0,
+            "flush": self.get_flush_stats(),
+            "blobs": self.blobs.get_stats(),
+            "contention": self.get_contention_stats(),
+            "expiry": dict(self._expiry_stats, retention_days=self.retention_days)
+        }
+
+    def get_contention_stats(self) -> dict:
+        """Committed version plus how long writers waited for and held the lock."""
+        stats = {
+            "version": self._state.version,
+            "lock_wait": self._lock_wait.to_dict(),
+            "lock_hold": self._lock_hold.to_dict(),
+        }
+        if self._feed is not None:
+            stats["process_lock_wait"] = self._process_lock_wait.to_dict()
+            stats["feed"] = self._feed.get_stats()
+        return stats
 
     def cleanup_old_news(self, days: int = 30):
         """Remove news older than specified days."""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        cutoff_str = cutoff_date.isoformat()
-
-        with self.transaction():
-            to_remove = []
-            for news_id, news_data in self.news_db.items():
-                created_at = news_data.get("created_at", "")
-                if created_at and created_at < cutoff_str:
-                    to_remove.append(news_id)
-
-            removed_count = 0
-            for news_id in to_remove:
-                if self.delete_news(news_id):
-                    removed_count += 1
-
-            logger.info(f"Cleaned up {removed_count} old news items")
-            return removed_count
+        removed_count = self.expire_old_news(days)
+        logger.info(f"Cleaned up {removed_count} old news items")
+        return removed_count
+
+    def expire_old_news(self, days: int, batch_size: Optional[int] = None) -> int:
+        """Delete news older than ``days``, oldest first, in transactions of at most ``batch_size``."""
+        batch_size = batch_size or self.expiry_batch_size
+        cutoff_str = (datetime.now() - timedelta(days=days)).isoformat()
+        stats = self._expiry_stats
+        removed_count = 0
+
+        while not self._closed:
+            start = time.perf_counter()
+            with self.transaction():
+                expired = self.get_ids_created_before(cutoff_str, limit=batch_size)
+                removed = self.delete_many(expired) if expired else 0
+            if not removed:
+                break
+            removed_count += removed
+            stats["batches"] += 1
+            stats["max_batch_ms"] = max(stats["max_batch_ms"], (time.perf_counter() - start) * 1000)
+            # Let waiting writers in before the next batch
+            time.sleep(0)
+
+        stats["runs"] += 1
+        stats["expired"] += removed_count
+        stats["last_run"] = datetime.now().isoformat()
+        if removed_count:
+            logger.info(f"Expired {removed_count} news items older than {days} days")
+        return removed_count
 
     def clear_all(self):
         """Clear all data (use with caution)."""
         with self.transaction():
-            self.news_db.clear()
+            self._undo_log.append(("clear", None, (self.news_db, self.sent_ids.snapshot())))
+            self.news_db = {}
             self.sent_ids.clear()
+            self._rebuild_indexes()
             logger.warning("Database cleared")
 
     def force_save(self):
         """Force save all data to disk."""
         with self._lock:
-            self._save_db()
-            self._save_sent_ids()
-            logger.info("Database force saved")
+            self._dirty_changes = max(self._dirty_changes, 1)
+        self.flush()
+        logger.info("Database force saved")
+
+    def close(self):
+        """Stop the flusher and write everything still pending."""
+        self._closed = True
+        self._flush_event.set()
+        flush_thread = getattr(self, "_flush_thread", None)
+        if flush_thread is not None:
+            flush_thread.join(timeout=self.flush_interval + 5)
+        self.force_save()
+        if self._feed is not None:
+            # Leave a current main file so the next start has nothing to replay
+            with self._exclusive():
+                if self._feed.version > self._feed.base_version:
+                    self._checkpoint(self._feed.version)
+            self._process_lock.close()
+        self.sent_ids.close()
+        stats = self.get_flush_stats()
+        logger.info(f"Database closed: {stats['flushes']} flushes, "
+                    f"{stats['coalesced_changes']} changes coalesced, avg {stats['avg_flush_ms']:.1f} ms")
 
     def __len__(self):
         """Return number of news items."""
-        with self._lock:
-            return len(self.news_db)
+        return self._state.total_news
 
     def __contains__(self, news_id):
         """Check if news ID exists."""
-        with self._lock:
-            return news_id in self.news_db
+        return news_id in self._committed
 
     # Compatibility methods for legacy code
     def save_db(self):
@@ -366,4 +1237,39 @@ class SafeNewsDB:
 
     def save_sent_ids(self):
         """Legacy compatibility method - maps to force_save()."""
-        self.force_save()
\ No newline at end of file
+        self.force_save()
+
+
+def create_database(db_config):
+    """Create the news store selected by DatabaseConfig.backend ("json" or "sqlite")."""
+    if db_config.backend == "sqlite":
+        from bot.sqlite_database import SQLiteNewsDB
+        return SQLiteNewsDB(
+            db_path=db_config.sqlite_file,
+            backup_interval=db_config.backup_interval,
+            json_db_file=db_config.db_file,
+            json_sent_ids_file=db_config.sent_ids_file,
+            watch_interval=db_config.watch_interval,
+            retention_days=db_config.auto_cleanup_days,
+            expiry_interval=db_config.cleanup_interval,
+            expiry_batch_size=db_config.cleanup_batch_size
+        )
+
+    return SafeNewsDB(
+        db_file=db_config.db_file,
+        sent_ids_file=db_config.sent_ids_file,
+        backup_interval=db_config.backup_interval,
+        durability=db_config.durability,
+        flush_interval=db_config.flush_interval,
+        flush_max_changes=db_config.flush_max_changes,
+        blob_dir=db_config.blob_dir,
+        blob_cache_size=db_config.blob_cache_size,
+        backup_dir=db_config.backup_dir,
+        sent_ids_ttl=db_config.sent_ids_ttl_days * 86400 if db_config.sent_ids_ttl_days > 0 else None,
+        shared=db_config.shared,
+        watch_interval=db_config.watch_interval,
+        codec=db_config.codec,
+        retention_days=db_config.auto_cleanup_days,
+        expiry_interval=db_config.cleanup_interval,
+        expiry_batch_size=db_config.cleanup_batch_size
+    )
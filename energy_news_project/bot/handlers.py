@@ -1,13 +1,16 @@
 # bot/handlers.py
 import logging
+import time
 from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.error import TelegramError
 
-from bot.database import SafeNewsDB
+from bot.async_database import AsyncNewsDB
+from bot.jobs import JobRunner
 from bot.services.telegram_service import TelegramService
 from bot.formatters import format_news_for_publication
+from parser.metrics import Histogram, LATENCY_BUCKETS
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +18,17 @@ logger = logging.getLogger(__name__)
 class BotHandlers:
     """Unified handlers for all bot interactions."""
 
-    def __init__(self, database: SafeNewsDB, telegram_service: TelegramService):
+    def __init__(self, database: AsyncNewsDB, telegram_service: TelegramService,
+                 jobs: Optional[JobRunner] = None):
         self.db = database
         self.telegram = telegram_service
+        # Time from receiving a button press to finishing its handling
+        self.callback_latency = Histogram(LATENCY_BUCKETS)
+
+        # Approve/Reject only record the action; publishing and cleanup run in the background
+        self.jobs = jobs or JobRunner(database)
+        self.jobs.register("approve", self._approve_job, on_failure=self._approve_failed)
+        self.jobs.register("reject", self._reject_job, on_failure=self._reject_failed)
 
     # ===== CALLBACK HANDLERS =====
     async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -26,6 +37,7 @@ class BotHandlers:
         if not query:
             return
 
+        start = time.perf_counter()
         await query.answer()
 
         try:
@@ -44,10 +56,8 @@ class BotHandlers:
                 return
 
             # Route to appropriate handler
-            if action == "approve":
-                await self._handle_approve(query, news_id, data_entry, context)
-            elif action == "reject":
-                await self._handle_reject(query, news_id, data_entry, context)
+            if action in ("approve", "reject"):
+                await self._submit_job(news_id, action)
             elif action == "edit":
                 await self._handle_edit(query, news_id, data_entry, context)
             else:
@@ -59,80 +69,19 @@ class BotHandlers:
                 await query.edit_message_text(f"⚠️ Ошибка обработки: {str(e)}")
             except TelegramError:
                 # If edit fails, try to send a new message
-                await query.message.reply_text(f"⚠️ Ошибка обработки: {str(e)}")
-
-    async def _handle_approve(self, query, news_id: str, data_entry: dict, context: ContextTypes.DEFAULT_TYPE):
-        """Handle news approval and publication."""
-        try:
-            news_item = data_entry["news_data"]
-            channel_id = data_entry["channel_id"]
-            message_id = data_entry["message_id"]
-
-            edit_status = " (отредактированной)" if news_item.get("edited", False) else ""
-
-            # Publish to main channel
-            success = await self.telegram.publish_news(context.bot, news_item, news_id)
-
-            if success:
-                # Clean up preview messages if they exist (check if they weren't already cleaned)
-                preview_ids = news_item.get("preview_message_ids")
-                preview_chat_id = news_item.get("preview_chat_id")
-
-                if preview_ids and preview_chat_id:
-                    logger.info(f"Cleaning up remaining preview messages for news {news_id}")
-                    await self._cleanup_preview_messages(news_item, context.bot, news_id)
-
-                # Delete moderation message
-                await self.telegram.safe_delete_messages(
-                    context.bot, channel_id, [message_id], news_id
-                )
-
-                # Update database
-                self.db.update_news(news_id, {"status": "published"})
-
-                # Skip sending any notifications to avoid Bad Request
-                logger.info(f"News {news_id} successfully approved and published{edit_status} - notifications disabled")
-                # Remove from database after successful publication
-                self.db.delete_news(news_id)
-
-                logger.info(f"News {news_id} approved and published{edit_status}")
-
-            else:
-                await query.edit_message_text("❌ Ошибка при публикации новости.")
-
-        except Exception as e:
-            logger.error(f"Approve handler error for {news_id}: {e}")
-            await query.edit_message_text(f"❌ Ошибка публикации: {str(e)}")
-
-    async def _handle_reject(self, query, news_id: str, data_entry: dict, context: ContextTypes.DEFAULT_TYPE):
-        """Handle news rejection and cleanup."""
-        try:
-            news_item = data_entry["news_data"]
-            channel_id = data_entry["channel_id"]
-            message_id = data_entry["message_id"]
-
-            # Clean up preview messages if they exist
-            await self._cleanup_preview_messages(news_item, context.bot, news_id)
-
-            # Delete moderation message
-            await self.telegram.safe_delete_messages(
-                context.bot, channel_id, [message_id], news_id
-            )
-
-            # Update database
-            self.db.update_news(news_id, {"status": "rejected"})
-
-            # Log successful rejection
-            logger.info(f"News {news_id} successfully rejected and removed")
-
-            # Remove from database
-            self.db.delete_news(news_id)
-
-            logger.info(f"News {news_id} rejected and removed")
-
-        except Exception as e:
-            logger.error(f"Reject handler error for {news_id}: {e}")
-            await query.edit_message_text(f"❌ Ошибка отклонения: {str(e)}")
+                await self.telegram.reply(context.bot, query.message, f"⚠️ Ошибка обработки: {str(e)}")
+        finally:
+            elapsed = time.perf_counter() - start
+            self.callback_latency.observe(elapsed)
+            if elapsed > 1.0:
+                logger.warning(f"Slow callback {query.data}: {elapsed * 1000:.0f} ms")
+
+    async def _submit_job(self, news_id: str, action: str):
+        """Record the moderation action and leave publishing and cleanup to the job runner."""
+        if await self.jobs.submit(news_id, action):
+            logger.info(f"Queued {action} for news {news_id}")
+        else:
+            logger.info(f"Ignoring {action} for news {news_id}: an action is already in progress")
 
     async def _handle_edit(self, query, news_id: str, data_entry: dict, context: ContextTypes.DEFAULT_TYPE):
         """Handle edit request - show full text and prepare for editing."""
@@ -142,8 +91,8 @@ class BotHandlers:
 
             if full_text:
                 # Send header message
-                header_msg = await query.message.reply_text(
-                    f"📝 Текущий полный текст новости (ID: {news_id}):"
+                header_msg = await self.telegram.reply(
+                    context.bot, query.message, f"📝 Текущий полный текст новости (ID: {news_id}):"
                 )
 
                 # Send full text in chunks
@@ -152,29 +101,32 @@ class BotHandlers:
                 )
 
                 # Store preview message IDs
-                all_preview_ids = [header_msg.message_id] + text_message_ids
+                all_preview_ids = ([header_msg.message_id] if header_msg else []) + text_message_ids
 
                 # Update news data with preview info
                 updates = {
                     "news_data.preview_message_ids": all_preview_ids,
                     "news_data.preview_chat_id": query.message.chat_id
                 }
-                self.db.update_news(news_id, updates)
+                await self.db.update_news(news_id, updates)
 
                 logger.info(f"Preview messages sent for news {news_id}: {all_preview_ids}")
 
             else:
                 # No full text available
-                preview_msg = await query.message.reply_text("⚠️ Полный текст новости отсутствует.")
+                preview_msg = await self.telegram.reply(
+                    context.bot, query.message, "⚠️ Полный текст новости отсутствует."
+                )
 
                 updates = {
-                    "news_data.preview_message_ids": [preview_msg.message_id],
+                    "news_data.preview_message_ids": [preview_msg.message_id] if preview_msg else [],
                     "news_data.preview_chat_id": query.message.chat_id
                 }
-                self.db.update_news(news_id, updates)
+                await self.db.update_news(news_id, updates)
 
             # Send edit instructions
-            await query.message.reply_text(
+            await self.telegram.reply(
+                context.bot, query.message,
                 "✏️ Отправьте исправленный текст новости.\n"
                 "Чтобы оставить как есть — отправьте /skip\n"
                 "⚠️ После редактирования сообщение в канале модерации будет обновлено."
@@ -188,16 +140,54 @@ class BotHandlers:
             logger.error(f"Edit handler error for {news_id}: {e}")
             await query.edit_message_text(f"❌ Ошибка подготовки к редактированию: {str(e)}")
 
-    async def _cleanup_preview_messages(self, news_item: dict, bot, news_id: str):
-        """Clean up preview messages if they exist."""
-        preview_ids = news_item.get("preview_message_ids")
-        preview_chat_id = news_item.get("preview_chat_id")
+    # ===== BACKGROUND JOBS =====
+    async def _approve_job(self, bot, news_id: str, data_entry: dict, done: set):
+        """Publish the news item, delete its moderation and preview messages, drop the record."""
+        news_item = data_entry["news_data"]
+        edit_status = " (отредактированной)" if news_item.get("edited", False) else ""
 
-        if preview_ids and preview_chat_id:
-            await self.telegram.safe_delete_messages(
-                bot, preview_chat_id, preview_ids, news_id
-            )
-            logger.info(f"Cleaned up preview messages for news {news_id}")
+        # Publish once: a retry after a failed cleanup must not post the news again
+        if "published" not in done:
+            if not await self.telegram.publish_news(bot, news_item, news_id):
+                raise TelegramError(f"Publication of news {news_id} failed")
+            await self.jobs.mark_done(news_id, "published")
+
+        # Delete remaining preview messages and the moderation message together
+        await self.telegram.delete_news_messages(
+            bot, news_item, data_entry["channel_id"], data_entry["message_id"], news_id
+        )
+
+        # Remove from database after successful publication
+        await self.db.delete_news(news_id)
+
+        logger.info(f"News {news_id} approved and published{edit_status}")
+
+    async def _reject_job(self, bot, news_id: str, data_entry: dict, done: set):
+        """Delete the news item's moderation and preview messages and drop the record."""
+        news_item = data_entry["news_data"]
+
+        # Delete preview messages (if any) and the moderation message together
+        await self.telegram.delete_news_messages(
+            bot, news_item, data_entry["channel_id"], data_entry["message_id"], news_id
+        )
+
+        # Remove from database
+        await self.db.delete_news(news_id)
+
+        logger.info(f"News {news_id} rejected and removed")
+
+    async def _approve_failed(self, bot, news_id: str, data_entry: dict, done: set):
+        if "published" in done:
+            note = ("⚠️ Новость опубликована, но сообщение модерации не удалось удалить. "
+                    "Нажмите «Опубликовать» ещё раз — повторной публикации не будет.")
+        else:
+            note = "❌ Ошибка при публикации новости. Нажмите «Опубликовать» ещё раз."
+        await self.telegram.annotate_moderation_message(bot, data_entry, news_id, note)
+
+    async def _reject_failed(self, bot, news_id: str, data_entry: dict, done: set):
+        await self.telegram.annotate_moderation_message(
+            bot, data_entry, news_id, "❌ Ошибка отклонения. Нажмите «Отклонить» ещё раз."
+        )
 
     # ===== MESSAGE HANDLERS =====
     async def edit_text_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -228,14 +218,14 @@ class BotHandlers:
 
         except Exception as e:
             logger.error(f"Edit text handler error: {e}", exc_info=True)
-            await update.message.reply_text(f"⚠️ Ошибка обработки текста: {str(e)}")
+            await self.telegram.reply(context.bot, update.message, f"⚠️ Ошибка обработки текста: {str(e)}")
             # Clear editing state on error
             context.user_data["editing_news_id"] = None
 
     async def _handle_skip_edit(self, update: Update, context: ContextTypes.DEFAULT_TYPE, news_id: str):
         """Handle skip editing command."""
         context.user_data["editing_news_id"] = None
-        await update.message.reply_text("✅ Редактирование пропущено.")
+        await self.telegram.reply(context.bot, update.message, "✅ Редактирование пропущено.")
         logger.info(f"Editing skipped for news {news_id}")
 
     async def _process_edited_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE, news_id: str):
@@ -245,7 +235,7 @@ class BotHandlers:
         # Get news data
         data_entry = self.db.get_news(news_id)
         if not data_entry:
-            await update.message.reply_text("⚠️ Новость не найдена в базе.")
+            await self.telegram.reply(context.bot, update.message, "⚠️ Новость не найдена в базе.")
             context.user_data["editing_news_id"] = None
             return
 
@@ -275,7 +265,7 @@ class BotHandlers:
             })
 
         # Save changes
-        success = self.db.update_news(news_id, updates)
+        success = await self.db.update_news(news_id, updates)
 
         # Verify the update was successful
         if success:
@@ -290,7 +280,7 @@ class BotHandlers:
             logger.error(f"Failed to update news {news_id}")
 
         if not success:
-            await update.message.reply_text("⚠️ Не удалось обновить новость.")
+            await self.telegram.reply(context.bot, update.message, "⚠️ Не удалось обновить новость.")
             context.user_data["editing_news_id"] = None
             return
 
@@ -308,18 +298,21 @@ class BotHandlers:
             )
 
             if success:
-                await update.message.reply_text(
+                await self.telegram.reply(
+                    context.bot, update.message,
                     "✅ Текст новости обновлён и сообщение в канале модерации обновлено!\n"
                     "Теперь нажмите кнопку 'Опубликовать' для публикации отредактированной версии."
                 )
             else:
-                await update.message.reply_text(
+                await self.telegram.reply(
+                    context.bot, update.message,
                     "✅ Текст новости обновлён!\n"
                     "⚠️ Не удалось обновить сообщение в канале модерации, но изменения сохранены.\n"
                     "Нажмите кнопку 'Опубликовать' для публикации отредактированной версии."
                 )
         else:
-            await update.message.reply_text(
+            await self.telegram.reply(
+                context.bot, update.message,
                 "✅ Текст новости обновлён!\n"
                 "⚠️ Сообщение в канале модерации не найдено, но изменения сохранены."
             )
@@ -340,7 +333,7 @@ class BotHandlers:
             "/testpublish - Тест публикации в канал"
         )
 
-        await update.message.reply_text(welcome_text)
+        await self.telegram.reply(context.bot, update.message, welcome_text)
         logger.info(f"Start command from user {update.effective_user.id}")
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -361,13 +354,15 @@ class BotHandlers:
             "⚠️ Все действия логируются для анализа."
         )
 
-        await update.message.reply_text(help_text)
+        await self.telegram.reply(context.bot, update.message, help_text)
 
     async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /stats command."""
         try:
             db_stats = self.db.get_stats()
             telegram_stats = self.telegram.get_circuit_breaker_stats()
+            send_stats = self.telegram.get_send_stats()
+            job_stats = self.jobs.get_stats()
 
             stats_text = (
                 f"📊 Статистика системы\n\n"
@@ -377,19 +372,57 @@ class BotHandlers:
                 f"• Ожидает модерации: {db_stats['pending']}\n"
                 f"• Опубликовано: {db_stats['published']}\n"
                 f"• Отклонено: {db_stats['rejected']}\n"
-                f"• Размер БД: {db_stats['db_size_mb']:.2f} МБ\n\n"
+                f"• Размер БД: {db_stats['db_size_mb']:.2f} МБ\n"
+                f"{self._format_flush_stats(db_stats.get('flush'))}"
+                f"{self._format_latency_stats(db_stats.get('write_latency'))}\n"
                 f"📡 Telegram API:\n"
                 f"• Статус: {telegram_stats['state']}\n"
                 f"• Успешных запросов: {telegram_stats['success_count']}\n"
                 f"• Неудачных запросов: {telegram_stats['failure_count']}\n"
-                f"• Успешность: {telegram_stats['success_rate']:.1f}%"
+                f"• Успешность: {telegram_stats['success_rate']:.1f}%\n"
+                f"• Очередь отправки: {send_stats['queued']}, RetryAfter: {send_stats['retry_after']}, "
+                f"скорость {send_stats['global_rate']:.0f}/с\n"
+                f"{self._format_lane_stats(send_stats['lanes'])}\n"
+                f"• Фоновые задачи: {job_stats['completed']} выполнено, {job_stats['scheduled']} в работе, "
+                f"{job_stats['retried']} повторов, {job_stats['failed']} ошибок, "
+                f"p95 {job_stats['job_latency']['p95']:.1f} с"
             )
 
-            await update.message.reply_text(stats_text)
+            await self.telegram.reply(context.bot, update.message, stats_text)
 
         except Exception as e:
             logger.error(f"Stats command error: {e}")
-            await update.message.reply_text(f"⚠️ Ошибка получения статистики: {str(e)}")
+            await self.telegram.reply(context.bot, update.message, f"⚠️ Ошибка получения статистики: {str(e)}")
+
+    @staticmethod
+    def _format_flush_stats(flush: Optional[dict]) -> str:
+        if not flush:
+            return ""
+        return (
+            f"• Запись на диск ({flush['durability']}): {flush['flushes']} раз, "
+            f"в среднем {flush['avg_flush_ms']:.1f} мс, "
+            f"{flush['changes_per_flush']:.1f} изменений за запись, "
+            f"ожидает {flush['pending_changes']}\n"
+        )
+
+    @staticmethod
+    def _format_lane_stats(lanes: dict) -> str:
+        waits = ", ".join(f"{name} {lane['wait']['p95']:.1f} с" for name, lane in lanes.items())
+        return f"• Ожидание отправки p95: {waits}"
+
+    def _format_latency_stats(self, write_latency: Optional[dict]) -> str:
+        callbacks = self.callback_latency.to_dict()
+        text = (
+            f"• Обработка кнопок: p50 {callbacks['p50'] * 1000:.0f} мс, "
+            f"p95 {callbacks['p95'] * 1000:.0f} мс, p99 {callbacks['p99'] * 1000:.0f} мс "
+            f"({callbacks['count']} нажатий)\n"
+        )
+        if write_latency:
+            text += (
+                f"• Запись в БД: p50 {write_latency['p50'] * 1000:.1f} мс, "
+                f"p99 {write_latency['p99'] * 1000:.1f} мс\n"
+            )
+        return text
 
     async def health_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /health command."""
@@ -403,6 +436,7 @@ class BotHandlers:
                 f"{status_emoji} Telegram API: {health_info['telegram_api']}\n"
                 f"🔌 Circuit Breaker: {health_info['circuit_breaker']}\n"
                 f"💾 Размер кеша: {health_info['cache_size']}\n"
+                f"📤 Очередь отправки: {health_info['send_queue']}\n"
             )
 
             if "bot_username" in health_info:
@@ -411,11 +445,11 @@ class BotHandlers:
             if "error" in health_info:
                 health_text += f"❌ Ошибка: {health_info['error']}\n"
 
-            await update.message.reply_text(health_text)
+            await self.telegram.reply(context.bot, update.message, health_text)
 
         except Exception as e:
             logger.error(f"Health command error: {e}")
-            await update.message.reply_text(f"⚠️ Ошибка проверки состояния: {str(e)}")
+            await self.telegram.reply(context.bot, update.message, f"⚠️ Ошибка проверки состояния: {str(e)}")
 
     async def test_publish_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /testpublish command."""
@@ -427,45 +461,49 @@ class BotHandlers:
             )
 
             if test_message:
-                await update.message.reply_text("✅ Тестовое сообщение успешно отправлено в канал публикации.")
+                await self.telegram.reply(
+                    context.bot, update.message, "✅ Тестовое сообщение успешно отправлено в канал публикации."
+                )
             else:
-                await update.message.reply_text("❌ Не удалось отправить тестовое сообщение.")
+                await self.telegram.reply(context.bot, update.message, "❌ Не удалось отправить тестовое сообщение.")
 
         except Exception as e:
             logger.error(f"Test publish error: {e}")
-            await update.message.reply_text(f"⚠️ Ошибка при тестовой публикации: {str(e)}")
+            await self.telegram.reply(context.bot, update.message, f"⚠️ Ошибка при тестовой публикации: {str(e)}")
 
     async def skip_edit_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /skip command."""
         if not context.user_data:
-            await update.message.reply_text("ℹ️ Нет активного процесса редактирования.")
+            await self.telegram.reply(context.bot, update.message, "ℹ️ Нет активного процесса редактирования.")
             return
 
         news_id = context.user_data.get("editing_news_id")
         if news_id:
             context.user_data["editing_news_id"] = None
-            await update.message.reply_text("✅ Редактирование пропущено.")
+            await self.telegram.reply(context.bot, update.message, "✅ Редактирование пропущено.")
             logger.info(f"Editing skipped for news {news_id}")
         else:
-            await update.message.reply_text("ℹ️ Нет активного процесса редактирования.")
+            await self.telegram.reply(context.bot, update.message, "ℹ️ Нет активного процесса редактирования.")
 
     # Admin commands (only if debug mode is enabled)
     async def cleanup_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /cleanup command (admin only)."""
         try:
-            removed_count = self.db.cleanup_old_news(days=30)
-            await update.message.reply_text(f"🗑️ Очищено {removed_count} старых новостей.")
+            removed_count = await self.db.cleanup_old_news(days=30)
+            await self.telegram.reply(context.bot, update.message, f"🗑️ Очищено {removed_count} старых новостей.")
 
         except Exception as e:
             logger.error(f"Cleanup command error: {e}")
-            await update.message.reply_text(f"⚠️ Ошибка очистки: {str(e)}")
+            await self.telegram.reply(context.bot, update.message, f"⚠️ Ошибка очистки: {str(e)}")
 
     async def backup_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /backup command (admin only)."""
         try:
-            self.db.force_save()
-            await update.message.reply_text("💾 Принудительное сохранение базы данных выполнено.")
+            await self.db.force_save()
+            await self.telegram.reply(
+                context.bot, update.message, "💾 Принудительное сохранение базы данных выполнено."
+            )
 
         except Exception as e:
             logger.error(f"Backup command error: {e}")
-            await update.message.reply_text(f"⚠️ Ошибка сохранения: {str(e)}")
\ No newline at end of file
+            await self.telegram.reply(context.bot, update.message, f"⚠️ Ошибка сохранения: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,264 @@
+# bot/jobs.py
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import logging
+
+from bot.async_database import AsyncNewsDB
+from parser.metrics import Histogram, DEFAULT_BUCKETS, LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Status of a news item whose pending_action is queued or running
+STATUS_PROCESSING = "processing"
+# Status after a job ran out of attempts (pending_action keeps the last error)
+STATUS_FAILED = "failed"
+
+# handler(bot, news_id, record, done_steps)
+JobHandler = Callable[[object, str, dict, Set[str]], Awaitable[None]]
+
+
+class JobRunner:
+    """Background jobs for moderation actions, recorded in the news store first.
+
+    ``submit`` writes the action into the record as ``pending_action`` (with
+    status "processing") and returns as soon as that write is done; a pool of
+    worker tasks then runs the handler registered for the action. A handler
+    that raises is retried with exponential backoff up to ``max_attempts``
+    times, then the record is marked "failed" and the ``on_failure`` hook
+    runs. Records still "processing" are picked up again by ``start``, so an
+    action survives a restart.
+
+    Handlers must be safe to run again: steps that cannot be repeated
+    (posting to the channel) are recorded with ``mark_done`` and arrive in
+    ``done_steps`` on the next attempt. A handler either deletes the record
+    or the runner clears ``pending_action`` once it succeeds.
+
+    With ``workers=0`` jobs run inside ``submit`` (the pre-runner behaviour,
+    useful for comparisons and debugging).
+    """
+
+    def __init__(self, database: AsyncNewsDB, workers: int = 3, max_attempts: int = 5,
+                 retry_delay: float = 2.0, max_retry_delay: float = 300.0):
+        self.db = database
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.bot = None
+        self._handlers: Dict[str, JobHandler] = {}
+        self._failure_hooks: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retry_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._scheduled: Set[str] = set()  # queued, running or waiting for a retry
+
+        # Time from submit to the job finishing (including retries), and per-run duration
+        self.job_latency = Histogram(DEFAULT_BUCKETS)
+        self.run_time = Histogram(DEFAULT_BUCKETS)
+        self.submit_latency = Histogram(LATENCY_BUCKETS)
+        self.stats = {"submitted": 0, "completed": 0, "retried": 0, "failed": 0, "resumed": 0}
+
+    def register(self, action: str, handler: JobHandler, on_failure: Optional[JobHandler] = None):
+        self._handlers[action] = handler
+        if on_failure is not None:
+            self._failure_hooks[action] = on_failure
+
+    # ===== LIFECYCLE =====
+    async def start(self, bot):
+        """Start the workers and queue every record left "processing" by a previous run."""
+        self.bot = bot
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+        for news_id in sorted(self.db.get_ids_by_status(STATUS_PROCESSING)):
+            record = self.db.get_news(news_id)
+            if record and record.get("pending_action"):
+                self.stats["resumed"] += 1
+                if self.workers:
+                    self._enqueue(news_id)
+                else:
+                    self._scheduled.add(news_id)
+                    await self._run(news_id)
+        if self.stats["resumed"]:
+            logger.info(f"Resumed {self.stats['resumed']} unfinished moderation jobs")
+
+    async def stop(self, timeout: float = 10.0):
+        """Give queued jobs ``timeout`` seconds to finish, then cancel the workers.
+
+        Unfinished jobs stay "processing" in the store and resume on the next start.
+        """
+        for timer in self._retry_timers.values():
+            timer.cancel()
+        self._retry_timers.clear()
+
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self._queue.qsize()} moderation jobs left for the next start")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ===== SUBMITTING =====
+    async def submit(self, news_id: str, action: str) -> bool:
+        """Durably record ``action`` for ``news_id`` and queue it; False if one is already pending.
+
+        A record whose previous job failed can be submitted again. Steps that
+        job already finished stay done, and if it finished any, it is the
+        failed action that runs again (whatever ``action`` is): news that was
+        already published is only cleaned up, never posted twice.
+        """
+        if action not in self._handlers:
+            raise ValueError(f"No job handler registered for {action!r}")
+
+        start = time.perf_counter()
+        record = self.db.get_news(news_id)
+        if record is None or news_id in self._scheduled:
+            return False
+        previous = record.get("pending_action")
+        if previous and record.get("status") != STATUS_FAILED:
+            return False
+
+        done = list(previous.get("done", [])) if previous else []
+        if done and previous["action"] != action:
+            logger.info(f"News {news_id}: resuming failed {previous['action']} "
+                        f"(done: {', '.join(done)}) instead of {action}")
+            action = previous["action"]
+
+        # Claimed before the first await: a concurrent submit for the same news sees it scheduled
+        self._scheduled.add(news_id)
+        try:
+            updated = await self.db.update_news(news_id, {
+                "status": STATUS_PROCESSING,
+                "pending_action": {
+                    "action": action,
+                    "requested_at": datetime.now().isoformat(),
+                    "attempts": 0,
+                    "done": done,
+                },
+            })
+        except Exception:
+            self._scheduled.discard(news_id)
+            raise
+        self.submit_latency.observe(time.perf_counter() - start)
+        if not updated:
+            self._scheduled.discard(news_id)
+            return False
+
+        self.stats["submitted"] += 1
+        if self.workers:
+            self._enqueue(news_id)
+        else:
+            await self._run(news_id)
+        return True
+
+    async def mark_done(self, news_id: str, step: str):
+        """Record that ``step`` of the pending action succeeded and must not be repeated."""
+        record = self.db.get_news(news_id)
+        if record is None or not record.get("pending_action"):
+            return
+        done = list(record["pending_action"].get("done", []))
+        if step not in done:
+            done.append(step)
+            await self.db.update_news(news_id, {"pending_action.done": done})
+
+    def _enqueue(self, news_id: str):
+        self._retry_timers.pop(news_id, None)
+        self._scheduled.add(news_id)
+        self._queue.put_nowait(news_id)
+
+    # ===== RUNNING =====
+    async def _worker(self):
+        while True:
+            news_id = await self._queue.get()
+            try:
+                await self._run(news_id)
+            except Exception as e:
+                logger.error(f"Job runner error for news {news_id}: {e}", exc_info=True)
+                self._scheduled.discard(news_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, news_id: str):
+        record = self.db.get_news(news_id)
+        pending = record.get("pending_action") if record else None
+        if not pending:
+            # Finished meanwhile (e.g. resumed twice) or deleted
+            self._scheduled.discard(news_id)
+            return
+
+        action = pending["action"]
+        handler = self._handlers.get(action)
+        if handler is None:
+            logger.error(f"No job handler for {action!r} (news {news_id}), leaving it pending")
+            self._scheduled.discard(news_id)
+            return
+
+        start = time.perf_counter()
+        try:
+            await handler(self.bot, news_id, record, set(pending.get("done", [])))
+        except Exception as e:
+            self.run_time.observe(time.perf_counter() - start)
+            await self._handle_error(news_id, record, pending, e)
+            return
+
+        self.run_time.observe(time.perf_counter() - start)
+        if self.db.get_news(news_id) is not None:
+            await self.db.update_news(news_id, {"pending_action": None})
+        self._scheduled.discard(news_id)
+        self.stats["completed"] += 1
+        requested_at = datetime.fromisoformat(pending["requested_at"])
+        self.job_latency.observe(max(0.0, (datetime.now() - requested_at).total_seconds()))
+        logger.info(f"Job {action} for news {news_id} completed")
+
+    async def _handle_error(self, news_id: str, record: dict, pending: dict, error: Exception):
+        attempts = pending.get("attempts", 0) + 1
+        action = pending["action"]
+
+        if attempts >= self.max_attempts:
+            self.stats["failed"] += 1
+            self._scheduled.discard(news_id)
+            logger.error(f"Job {action} for news {news_id} failed after {attempts} attempts: {error}")
+            await self.db.update_news(news_id, {
+                "status": STATUS_FAILED,
+                "pending_action.attempts": attempts,
+                "pending_action.error": str(error),
+            })
+            hook = self._failure_hooks.get(action)
+            if hook is not None:
+                try:
+                    await hook(self.bot, news_id, record, set(pending.get("done", [])))
+                except Exception as e:
+                    logger.error(f"Failure hook of {action} for news {news_id} raised: {e}")
+            return
+
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+        self.stats["retried"] += 1
+        logger.warning(f"Job {action} for news {news_id} failed (attempt {attempts}): {error}. "
+                       f"Retrying in {delay:.1f}s")
+        await self.db.update_news(news_id, {
+            "pending_action.attempts": attempts,
+            "pending_action.error": str(error),
+        })
+        if self.workers:
+            self._retry_timers[news_id] = asyncio.get_running_loop().call_later(delay, self._enqueue, news_id)
+        else:
+            await asyncio.sleep(delay)
+            await self._run(news_id)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "scheduled": len(self._scheduled),
+            "workers": self.workers,
+            "submit_latency": self.submit_latency.to_dict(),
+            "run_time": self.run_time.to_dict(),
+            "job_latency": self.job_latency.to_dict(),
+        }
@@ -1,114 +1,278 @@
 # bot/middleware/rate_limiter.py
+import asyncio
+import contextlib
 import time
 import logging
-from collections import defaultdict, deque
-from typing import Dict, Optional
-from telegram.ext import BaseRateLimiter
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple, Union
+from telegram.ext import BaseUpdateProcessor
 from telegram import Update
 
+from cache import BoundedTTLCache
+
 logger = logging.getLogger(__name__)
 
+# Cost of an update by command (without "/" and "@botname"); everything else costs 1.
+# Commands that read the whole store or post to the channel are the expensive ones.
+DEFAULT_COMMAND_COSTS = {
+    "stats": 3,
+    "health": 3,
+    "testpublish": 5,
+    "cleanup": 5,
+}
 
-class RateLimiter(BaseRateLimiter):
-    """Custom rate limiter with per-user and global limits."""
+GLOBAL_KEY = "*"
 
-    def __init__(self,
-                 global_rate: int = 30,  # requests per minute globally
-                 user_rate: int = 10,  # requests per minute per user
-                 window_size: int = 60):  # time window in seconds
 
-        self.global_rate = global_rate
-        self.user_rate = user_rate
-        self.window_size = window_size
+class GCRA:
+    """Generic cell rate algorithm: a token bucket stored as one timestamp per key.
+
+    ``rate`` requests per second are allowed on average, with bursts of up to
+    ``burst`` back to back. Each key keeps only its theoretical arrival time
+    (TAT): the moment its bucket would be full again. A request of cost ``c``
+    is allowed if ``TAT + c / rate - burst / rate <= now``, and moves TAT
+    forward by ``c / rate``. Keys whose TAT is in the past hold a full
+    bucket, exactly like keys never seen, so ``sweep`` can drop them.
+    """
+
+    __slots__ = ("rate", "burst", "emission", "tolerance", "clock", "_tat")
+
+    def __init__(self, rate: float, burst: float = 1, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.emission = 1.0 / rate
+        self.tolerance = self.emission * self.burst
+        self.clock = clock
+        self._tat: Dict[Hashable, float] = {}
+
+    def check(self, key: Hashable, cost: float = 1, now: Optional[float] = None) -> Tuple[bool, float]:
+        """(allowed, seconds until it would be allowed) without consuming anything."""
+        now = self.clock() if now is None else now
+        tat = max(self._tat.get(key, now), now)
+        allow_at = tat + self.emission * cost - self.tolerance
+        if allow_at > now:
+            return False, allow_at - now
+        return True, 0.0
+
+    def consume(self, key: Hashable, cost: float = 1, now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        self._tat[key] = max(self._tat.get(key, now), now) + self.emission * cost
+
+    def allow(self, key: Hashable, cost: float = 1, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Consume ``cost`` for ``key`` if allowed; returns (allowed, retry_after seconds)."""
+        if now is None:
+            now = self.clock()
+        tat = self._tat.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + self.emission * cost
+        allow_at = new_tat - self.tolerance
+        if allow_at > now:
+            return False, allow_at - now
+        self._tat[key] = new_tat
+        return True, 0.0
 
-        # Storage for request timestamps
-        self.global_requests: deque = deque()
-        self.user_requests: Dict[int, deque] = defaultdict(lambda: deque())
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Forget keys whose bucket has refilled; returns how many were dropped."""
+        now = self.clock() if now is None else now
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        return len(idle)
 
-        # Admin users (can be configured)
-        self.admin_users = set()
+    def __len__(self):
+        return len(self._tat)
+
+
+class RateLimiter(BaseUpdateProcessor):
+    """Incoming-update limiter: per-user and global GCRA with per-command costs.
+
+    Registered through ``Application.builder().concurrent_updates(limiter)``.
+    Each update costs ``command_costs`` of its command (1 by default) and is
+    processed only if both the user's and the global bucket allow it; admins
+    and button presses in ``exempt_chats`` (the moderation channel) bypass
+    both. A rejected user is told so at most once per ``notice_interval``
+    seconds, and further rejected updates are dropped silently (a rejected
+    callback query is still answered, so the client stops waiting). Memory is one float per recently active user: a sweeper task
+    drops users whose bucket has refilled every ``sweep_interval`` seconds.
+
+    With ``max_concurrent_updates`` > 1 updates of different users run
+    concurrently, while one user's updates still run one at a time and in
+    order, so handler state in ``context.user_data`` (the editing session)
+    never sees two updates of the same user interleaved.
+    """
+
+    def __init__(self,
+                 user_rate: float = 10,  # updates per minute per user
+                 user_burst: int = 5,
+                 global_rate: float = 30,  # updates per minute for the whole bot
+                 global_burst: int = 30,
+                 command_costs: Optional[Dict[str, float]] = None,
+                 admin_users: Iterable[int] = (),
+                 exempt_chats: Iterable[Union[int, str]] = (),
+                 max_concurrent_updates: int = 1,
+                 sweep_interval: float = 60.0,
+                 notice_interval: float = 60.0):
+        super().__init__(max_concurrent_updates)
+        self.users = GCRA(user_rate / 60, user_burst)
+        self.global_limit = GCRA(global_rate / 60, global_burst)
+        self.command_costs = dict(DEFAULT_COMMAND_COSTS if command_costs is None else command_costs)
+        self.admin_users = set(admin_users)
+        self.exempt_chats = {str(chat_id) for chat_id in exempt_chats}
+        self.sweep_interval = sweep_interval
+
+        self._notified = BoundedTTLCache(maxsize=10_000, ttl=notice_interval)
+        self._sweeper: Optional[asyncio.Task] = None
+        # user_id -> [lock, updates holding or waiting for it]; dropped when unused
+        self._user_locks: Dict[int, list] = {}
+        self.stats = {"allowed": 0, "limited_user": 0, "limited_global": 0, "admin": 0, "exempt": 0,
+                      "swept": 0}
 
     def add_admin_user(self, user_id: int):
         """Add admin user (no rate limiting)."""
         self.admin_users.add(user_id)
         logger.info(f"Added admin user: {user_id}")
 
-    def _clean_old_requests(self, request_queue: deque, current_time: float):
-        """Remove requests older than window_size."""
-        while request_queue and current_time - request_queue[0] > self.window_size:
-            request_queue.popleft()
-
-    async def process_request(self,
-                              callback,
-                              update: Update,
-                              application,
-                              check_result=None) -> None:
-        """Process request with rate limiting."""
-        current_time = time.time()
-
-        # Get user ID
-        user_id = None
-        if update.effective_user:
-            user_id = update.effective_user.id
-
-        # Skip rate limiting for admin users
+    def is_exempt(self, update: Update) -> bool:
+        """Button presses in an exempt chat (moderators working through the queue)."""
+        chat = update.effective_chat
+        return update.callback_query is not None and chat is not None and str(chat.id) in self.exempt_chats
+
+    def cost_of(self, update: Update) -> float:
+        text = update.message.text if update.message is not None else None
+        if text and text.startswith("/"):
+            # "/stats@energy_bot extra" -> "stats"
+            parts = text[1:].split("@", 1)[0].split(maxsplit=1)
+            return self.command_costs.get(parts[0].lower() if parts else "", 1)
+        return 1
+
+    def decide(self, user_id: Optional[int], cost: float, now: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """(None, 0) if allowed, else ("user" or "global", retry_after); consumes on success."""
         if user_id in self.admin_users:
-            await callback()
-            return
+            self.stats["admin"] += 1
+            return None, 0.0
+
+        now = self.users.clock() if now is None else now
+        if user_id is not None:
+            allowed, retry_after = self.users.check(user_id, cost, now)
+            if not allowed:
+                self.stats["limited_user"] += 1
+                return "user", retry_after
+        allowed, retry_after = self.global_limit.check(GLOBAL_KEY, cost, now)
+        if not allowed:
+            self.stats["limited_global"] += 1
+            return "global", retry_after
+
+        if user_id is not None:
+            self.users.consume(user_id, cost, now)
+        self.global_limit.consume(GLOBAL_KEY, cost, now)
+        self.stats["allowed"] += 1
+        return None, 0.0
 
-        # Clean old requests
-        self._clean_old_requests(self.global_requests, current_time)
-        if user_id:
-            self._clean_old_requests(self.user_requests[user_id], current_time)
-
-        # Check global rate limit
-        if len(self.global_requests) >= self.global_rate:
-            logger.warning(f"Global rate limit exceeded")
-            if update.effective_message:
-                await update.effective_message.reply_text(
-                    "⏱️ Система перегружена. Попробуйте позже."
-                )
+    # ===== BaseUpdateProcessor =====
+    async def process_update(self, update: object, coroutine: Awaitable) -> None:
+        """Decide, wait for the user's previous updates, and only then take a concurrency slot.
+
+        The base implementation holds a slot while ``do_process_update`` runs,
+        so waiting for the per-user lock in there would let one user's queued
+        updates occupy every slot and stall everyone else.
+        """
+        if not isinstance(update, Update):
+            await super().process_update(update, coroutine)
             return
 
-        # Check user rate limit
-        if user_id and len(self.user_requests[user_id]) >= self.user_rate:
-            logger.warning(f"User rate limit exceeded for user {user_id}")
-            if update.effective_message:
-                await update.effective_message.reply_text(
-                    "⏱️ Слишком много запросов. Подождите минуту."
-                )
+        user_id = update.effective_user.id if update.effective_user else None
+        if self.is_exempt(update):
+            self.stats["exempt"] += 1
+            limited, retry_after = None, 0.0
+        else:
+            limited, retry_after = self.decide(user_id, self.cost_of(update))
+        if limited is None:
+            async with self._serialized(user_id):
+                await super().process_update(update, coroutine)
             return
 
-        # Record request
-        self.global_requests.append(current_time)
-        if user_id:
-            self.user_requests[user_id].append(current_time)
+        # The handlers will not run for this update
+        coroutine.close()
+        logger.warning(f"Rate limit ({limited}) hit by user {user_id}, retry in {retry_after:.1f}s")
+        await self._notify(update, user_id, limited, retry_after)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        await coroutine
 
-        # Execute callback
+    @contextlib.asynccontextmanager
+    async def _serialized(self, user_id: Optional[int]):
+        """Run one update of ``user_id`` at a time (no-op without concurrency or user)."""
+        if user_id is None or self.max_concurrent_updates == 1:
+            yield
+            return
+        entry = self._user_locks.get(user_id)
+        if entry is None:
+            entry = self._user_locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
         try:
-            await callback()
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[user_id]
+
+    async def _notify(self, update: Update, user_id: Optional[int], limited: str, retry_after: float):
+        if user_id is None or user_id in self._notified:
+            if update.callback_query is not None:
+                try:
+                    await update.callback_query.answer()
+                except Exception as e:
+                    logger.debug(f"Could not answer rate-limited callback of user {user_id}: {e}")
+            return
+        self._notified[user_id] = True
+        try:
+            if update.callback_query is not None:
+                await update.callback_query.answer(f"⏱️ Слишком много запросов. Подождите {retry_after:.0f} с.")
+            elif update.effective_message is not None:
+                if limited == "global":
+                    text = "⏱️ Система перегружена. Попробуйте позже."
+                else:
+                    text = f"⏱️ Слишком много запросов. Подождите {retry_after:.0f} с."
+                await update.effective_message.reply_text(text)
         except Exception as e:
-            logger.error(f"Callback execution error: {e}")
-            raise
+            logger.debug(f"Could not notify rate-limited user {user_id}: {e}")
 
-    def get_stats(self) -> Dict:
-        """Get rate limiter statistics."""
-        current_time = time.time()
+    async def initialize(self) -> None:
+        self._sweeper = asyncio.create_task(self._sweep_loop())
 
-        # Clean old requests first
-        self._clean_old_requests(self.global_requests, current_time)
+    async def shutdown(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
 
-        active_users = 0
-        for user_queue in self.user_requests.values():
-            self._clean_old_requests(user_queue, current_time)
-            if len(user_queue) > 0:
-                active_users += 1
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
 
+    def sweep(self) -> int:
+        swept = self.users.sweep()
+        self.stats["swept"] += swept
+        if swept:
+            logger.debug(f"Rate limiter forgot {swept} idle users")
+        return swept
+
+    def get_stats(self) -> Dict:
+        """Get rate limiter statistics."""
         return {
-            "global_requests_current_window": len(self.global_requests),
-            "global_rate_limit": self.global_rate,
-            "user_rate_limit": self.user_rate,
-            "active_users": active_users,
+            **self.stats,
+            "tracked_users": len(self.users),
+            "user_rate_per_minute": self.users.rate * 60,
+            "user_burst": self.users.burst,
+            "global_rate_per_minute": self.global_limit.rate * 60,
             "admin_users": len(self.admin_users),
-            "window_size": self.window_size
-        }
\ No newline at end of file
+            "max_concurrent_updates": self.max_concurrent_updates,
+            "busy_users": len(self._user_locks),
+        }
@@ -0,0 +1,375 @@
+# bot/sent_ids.py
+import array
+import bisect
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index file: header, sorted uint64 keys, uint32 "sent at" times, Bloom filter bits.
+# Arrays use the native byte order of the machine that wrote them.
+HEADER = struct.Struct("<4sHHQQ")  # magic, version, bloom hashes, count, bloom bits
+HEADER_SIZE = 32
+MAGIC = b"SIDX"
+VERSION = 1
+
+# Log record: operation, key, unix time
+LOG_RECORD = struct.Struct("<cQI")
+OP_ADD = b"A"
+OP_DISCARD = b"D"
+
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def id_to_key(news_id: str) -> int:
+    """64-bit key of a news ID: the 16-hex-char IDs map exactly, anything else is hashed."""
+    if len(news_id) == 16 and _HEX_DIGITS.issuperset(news_id):
+        return int(news_id, 16)
+    return int.from_bytes(hashlib.sha256(news_id.encode("utf-8")).digest()[:8], "little")
+
+
+def key_to_id(key: int) -> str:
+    return format(key, "016x")
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over 64-bit keys (already hash values, so no rehashing)."""
+
+    __slots__ = ("size", "hashes", "bits")
+
+    def __init__(self, size: int, hashes: int, bits: Optional[bytearray] = None):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float = 0.01) -> "BloomFilter":
+        capacity = max(capacity, 1024)
+        size = int(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        return cls(size, max(1, round(size / capacity * math.log(2))))
+
+    def _positions(self, key: int):
+        # Double hashing from the two halves of the key
+        h1, h2, size = key & 0xFFFFFFFF, (key >> 32) | 1, self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key: int):
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: int) -> bool:
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class SentIdSet:
+    """Set of sent news IDs stored as 64-bit keys.
+
+    The bulk of the IDs sits in a memory-mapped, sorted index file
+    (``sent_ids.idx``) searched with bisect; changes since the last compaction
+    are kept in small in-memory deltas and appended to ``sent_ids.log``. A
+    Bloom filter saved with the index answers most lookups of unseen IDs
+    without touching the mapped pages. With ``ttl`` (seconds), IDs older than
+    that stop counting as sent and are dropped at the next compaction.
+
+    On first start an existing ``sent_ids.json`` list is imported once. The
+    object is internally locked; ``flush`` should be called when the caller's
+    own state is consistent (SafeNewsDB does it under its lock).
+    """
+
+    def __init__(self, path: str = "data/sent_ids.json", ttl: Optional[float] = None,
+                 fp_rate: float = 0.01, compact_threshold: int = 50_000):
+        self.legacy_file = path if path.endswith(".json") else None
+        self.index_file, self.log_file = self.paths_for(path)
+        self.ttl = ttl
+        self.fp_rate = fp_rate
+        self.compact_threshold = compact_threshold
+
+        directory = os.path.dirname(self.index_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._views = []
+        self._keys = memoryview(b"").cast("Q")
+        self._times = memoryview(b"").cast("I")
+        self._bloom = BloomFilter.for_capacity(0, fp_rate)
+
+        # Changes since the index was written: key -> time added, and removed base keys
+        self._added: Dict[int, int] = {}
+        self._removed: Set[int] = set()
+        self._size = 0
+        self._pending = bytearray()
+        self._log_records = 0
+
+        self.lookups = 0
+        self.bloom_negatives = 0
+
+        if not os.path.exists(self.index_file):
+            self._write_index(*self._legacy_entries())
+            self._truncate_log()
+        self._open_index()
+        self._replay_log()
+
+    @staticmethod
+    def paths_for(path: str) -> Tuple[str, str]:
+        """(index file, log file) used for a sent-IDs path such as data/sent_ids.json."""
+        base = os.path.splitext(path)[0]
+        return f"{base}.idx", f"{base}.log"
+
+    # ===== INDEX FILE =====
+    def _legacy_entries(self) -> Tuple[array.array, array.array]:
+        keys = array.array("Q")
+        if self.legacy_file and os.path.exists(self.legacy_file):
+            try:
+                with open(self.legacy_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    keys.extend(sorted({id_to_key(str(news_id)) for news_id in data}))
+                    logger.info(f"Imported {len(keys)} sent IDs from {self.legacy_file}")
+                else:
+                    logger.warning("Invalid sent IDs format, starting with empty set")
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error(f"Failed to load sent IDs: {e}")
+        return keys, array.array("I", [int(time.time())]) * len(keys)
+
+    def _write_index(self, keys: array.array, times: array.array):
+        bloom = BloomFilter.for_capacity(2 * len(keys), self.fp_rate)
+        for key in keys:
+            bloom.add(key)
+
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, bloom.hashes, len(keys), bloom.size).ljust(HEADER_SIZE, b"\0"))
+            keys.tofile(f)
+            times.tofile(f)
+            f.write(bloom.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.index_file)
+
+    def _open_index(self):
+        self._close_index()
+        try:
+            with open(self.index_file, "rb") as f:
+                magic, version, hashes, count, bits = HEADER.unpack(f.read(HEADER_SIZE)[:HEADER.size])
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"not a sent-ID index (version {version})")
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, struct.error) as e:
+            # Keep the broken file for inspection and start over from the log
+            logger.error(f"Failed to load sent IDs index {self.index_file}: {e}")
+            os.replace(self.index_file, f"{self.index_file}.corrupt")
+            self._write_index(array.array("Q"), array.array("I"))
+            return self._open_index()
+
+        view = memoryview(self._mmap)
+        keys_end = HEADER_SIZE + 8 * count
+        times_end = keys_end + 4 * count
+        self._keys = view[HEADER_SIZE:keys_end].cast("Q")
+        self._times = view[keys_end:times_end].cast("I")
+        self._views = [view, self._keys, self._times]
+        self._bloom = BloomFilter(bits, hashes, bytearray(view[times_end:times_end + (bits + 7) // 8]))
+        self._size = count
+
+    def _close_index(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._keys = memoryview(b"").cast("Q")
+        self._times = memoryview(b"").cast("I")
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _base_position(self, key: int) -> int:
+        keys = self._keys
+        position = bisect.bisect_left(keys, key)
+        return position if position < len(keys) and keys[position] == key else -1
+
+    # ===== LOG =====
+    def _replay_log(self):
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, "rb") as f:
+            data = f.read()
+
+        usable = len(data) - len(data) % LOG_RECORD.size
+        for op, key, added_at in LOG_RECORD.iter_unpack(data[:usable]):
+            if op == OP_ADD:
+                self._apply_add(key, added_at)
+            elif op == OP_DISCARD:
+                self._apply_discard(key)
+        self._log_records = usable // LOG_RECORD.size
+
+        if usable != len(data):
+            # Torn record from an interrupted append
+            with open(self.log_file, "r+b") as f:
+                f.truncate(usable)
+
+    def _truncate_log(self):
+        with open(self.log_file, "wb"):
+            pass
+        self._log_records = 0
+
+    # ===== SET OPERATIONS =====
+    def _sent_at(self, key: int) -> Optional[int]:
+        added_at = self._added.get(key)
+        if added_at is not None:
+            return added_at
+        if key in self._removed:
+            return None
+        position = self._base_position(key)
+        return self._times[position] if position >= 0 else None
+
+    def _expired(self, added_at: int, now: Optional[float] = None) -> bool:
+        return bool(self.ttl) and (now or time.time()) - added_at > self.ttl
+
+    def _apply_add(self, key: int, added_at: int):
+        if self._sent_at(key) is None:
+            self._size += 1
+        self._added[key] = added_at
+        self._removed.discard(key)
+        self._bloom.add(key)
+
+    def _apply_discard(self, key: int):
+        if self._sent_at(key) is None:
+            return
+        self._size -= 1
+        self._added.pop(key, None)
+        if self._base_position(key) >= 0:
+            self._removed.add(key)
+
+    def __contains__(self, news_id: str) -> bool:
+        key = id_to_key(news_id)
+        with self._lock:
+            self.lookups += 1
+            if key not in self._bloom:
+                self.bloom_negatives += 1
+                return False
+            added_at = self._sent_at(key)
+        return added_at is not None and not self._expired(added_at)
+
+    def add(self, news_id: str):
+        key, now = id_to_key(news_id), int(time.time())
+        with self._lock:
+            self._apply_add(key, now)
+            self._pending += LOG_RECORD.pack(OP_ADD, key, now)
+
+    def discard(self, news_id: str):
+        key = id_to_key(news_id)
+        with self._lock:
+            if self._sent_at(key) is None:
+                return
+            self._apply_discard(key)
+            self._pending += LOG_RECORD.pack(OP_DISCARD, key, int(time.time()))
+
+    def apply(self, news_id: str, sent: bool, added_at: Optional[int] = None):
+        """Mirror a change another process has already logged (memory only)."""
+        key = id_to_key(news_id)
+        with self._lock:
+            if sent:
+                self._apply_add(key, added_at or int(time.time()))
+            else:
+                self._apply_discard(key)
+
+    def __len__(self) -> int:
+        """Number of stored IDs (expired ones count until the next compaction)."""
+        with self._lock:
+            return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        keys, _ = self.snapshot()
+        return (key_to_id(key) for key in keys)
+
+    # ===== PERSISTENCE =====
+    def flush(self, fsync: bool = True):
+        """Append pending changes to the log; compacts once the log grows past the threshold."""
+        with self._lock:
+            if self._pending:
+                data = bytes(self._pending)
+                with open(self.log_file, "ab") as f:
+                    f.write(data)
+                    if fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                self._pending.clear()
+                self._log_records += len(data) // LOG_RECORD.size
+
+            if self._log_records >= self.compact_threshold:
+                self.compact()
+
+    def snapshot(self) -> Tuple[array.array, array.array]:
+        """Live (sorted keys, sent-at times), without expired entries."""
+        with self._lock:
+            now = time.time()
+            changed = self._removed | self._added.keys()
+            entries = [
+                (key, added_at) for key, added_at in zip(self._keys, self._times)
+                if key not in changed and not self._expired(added_at, now)
+            ]
+            entries.extend(sorted(
+                (key, added_at) for key, added_at in self._added.items() if not self._expired(added_at, now)
+            ))
+        # Two sorted runs: timsort merges them in linear time
+        entries.sort()
+        return array.array("Q", (key for key, _ in entries)), array.array("I", (t for _, t in entries))
+
+    def restore(self, snapshot: Tuple[array.array, array.array]):
+        """Replace the contents with a ``snapshot()`` result and persist it."""
+        keys, times = snapshot
+        with self._lock:
+            self._close_index()
+            self._write_index(keys, times)
+            self._truncate_log()
+            self._added.clear()
+            self._removed.clear()
+            self._pending.clear()
+            self._open_index()
+
+    def compact(self):
+        """Merge the log into a new index file, dropping expired IDs."""
+        with self._lock:
+            start = time.perf_counter()
+            merged = self._log_records
+            self.restore(self.snapshot())
+            logger.info(f"Compacted sent IDs: {merged} log records merged, {self._size} IDs "
+                        f"in {time.perf_counter() - start:.2f} s")
+
+    def replace(self, news_ids):
+        """Replace the contents with ``news_ids`` (all marked as sent now)."""
+        keys = array.array("Q", sorted({id_to_key(news_id) for news_id in news_ids}))
+        self.restore((keys, array.array("I", [int(time.time())]) * len(keys)))
+
+    def clear(self):
+        self.restore((array.array("Q"), array.array("I")))
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._close_index()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "count": self._size,
+                "indexed": len(self._keys),
+                "delta": len(self._added) + len(self._removed),
+                "log_records": self._log_records,
+                "lookups": self.lookups,
+                "bloom_negatives": self.bloom_negatives,
+                "bloom_kb": len(self._bloom.bits) / 1024,
+            }
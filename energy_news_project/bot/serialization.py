@@ -0,0 +1,187 @@
+# bot/serialization.py
+import io
+import json
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# First bytes of a MessagePack store; JSON stores start with "{"
+MSGPACK_MAGIC = b"NDBM\x01"
+
+# Records decoded per call when streaming a compact JSON store
+LINES_PER_CHUNK = 1000
+
+Records = Iterable[Tuple[str, Any]]
+
+
+class Codec:
+    """How news_db records are written to and read back from disk.
+
+    ``dump`` and ``iter_records`` stream: stores written by the compact
+    codecs are encoded and decoded one record at a time, so neither side
+    holds the whole file as one string.
+    """
+
+    name = ""
+
+    def __init__(self, default: Optional[Callable[[Any], Any]] = None):
+        self.default = default
+
+    def dump(self, records: Records, f: BinaryIO):
+        raise NotImplementedError
+
+    def iter_records(self, f: BinaryIO) -> Iterator[Tuple[str, Any]]:
+        raise NotImplementedError
+
+    def encode(self, records: Dict[str, Any]) -> bytes:
+        buffer = io.BytesIO()
+        self.dump(records.items(), buffer)
+        return buffer.getvalue()
+
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        return dict(self.iter_records(io.BytesIO(data)))
+
+
+def _load_json_object(f: BinaryIO) -> Dict[str, Any]:
+    data = json.loads(f.read())
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+    return data
+
+
+class IndentedJsonCodec(Codec):
+    """The original format: one pretty-printed JSON object (stdlib json, indent=2)."""
+
+    name = "json-indent"
+
+    def dump(self, records: Records, f: BinaryIO):
+        text = json.dumps(dict(records), ensure_ascii=False, indent=2, default=self.default)
+        f.write(text.encode("utf-8"))
+
+    def iter_records(self, f: BinaryIO) -> Iterator[Tuple[str, Any]]:
+        return iter(_load_json_object(f).items())
+
+
+class CompactJsonCodec(Codec):
+    """Compact JSON, one ``"id":record`` member per line, through orjson when installed.
+
+    The file is still a single valid JSON object, but because compact
+    encoders escape every newline inside strings, each line holds exactly one
+    record and can be decoded on its own. Files in any other JSON layout
+    (e.g. the indented one) are read with a whole-file parse instead.
+    """
+
+    name = "json"
+
+    def _dumps(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, default=self.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=self.default).encode("utf-8")
+
+    @staticmethod
+    def _loads(data: bytes) -> Any:
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+
+    def dump(self, records: Records, f: BinaryIO):
+        f.write(b"{")
+        separator = b"\n"
+        for news_id, record in records:
+            f.write(separator)
+            f.write(self._dumps(news_id))
+            f.write(b":")
+            f.write(self._dumps(record))
+            separator = b",\n"
+        f.write(b"\n}\n")
+
+    def iter_records(self, f: BinaryIO) -> Iterator[Tuple[str, Any]]:
+        start = f.tell()
+        head, line = f.readline(), f.readline()
+        if head.rstrip() != b"{" or not line.startswith((b'"', b"}")):
+            # Not our one-member-per-line layout
+            f.seek(start)
+            yield from _load_json_object(f).items()
+            return
+
+        # Decode LINES_PER_CHUNK records per call: bounded memory, amortized call overhead
+        chunk = []
+        while not line.startswith(b"}"):
+            if not line:
+                raise ValueError("truncated JSON store: missing closing brace")
+            chunk.append(line)
+            if len(chunk) >= LINES_PER_CHUNK:
+                yield from self._decode_chunk(chunk)
+                chunk = []
+            line = f.readline()
+        if chunk:
+            yield from self._decode_chunk(chunk)
+
+    def _decode_chunk(self, lines: List[bytes]) -> Iterator[Tuple[str, Any]]:
+        lines[-1] = lines[-1].rstrip().rstrip(b",")
+        return iter(self._loads(b"{" + b"".join(lines) + b"}").items())
+
+
+class MsgpackCodec(Codec):
+    """MessagePack stream: MSGPACK_MAGIC followed by one ``[id, record]`` array per record."""
+
+    name = "msgpack"
+
+    def __init__(self, default: Optional[Callable[[Any], Any]] = None):
+        if msgpack is None:
+            raise ValueError("The msgpack codec needs the msgpack package (pip install msgpack)")
+        super().__init__(default)
+
+    def dump(self, records: Records, f: BinaryIO):
+        packer = msgpack.Packer(default=self.default, use_bin_type=True)
+        f.write(MSGPACK_MAGIC)
+        for news_id, record in records:
+            f.write(packer.pack([news_id, record]))
+
+    def iter_records(self, f: BinaryIO) -> Iterator[Tuple[str, Any]]:
+        if f.read(len(MSGPACK_MAGIC)) != MSGPACK_MAGIC:
+            raise ValueError("not a MessagePack news store")
+        for news_id, record in msgpack.Unpacker(f, raw=False):
+            yield news_id, record
+
+
+CODECS = {codec.name: codec for codec in (IndentedJsonCodec, CompactJsonCodec, MsgpackCodec)}
+
+
+def get_codec(name: str, default: Optional[Callable[[Any], Any]] = None) -> Codec:
+    """Codec registered under ``name`` ("json", "json-indent" or "msgpack")."""
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec {name!r}, expected one of {', '.join(CODECS)}")
+    return CODECS[name](default)
+
+
+def detect_codec(path: str, default: Optional[Callable[[Any], Any]] = None) -> Optional[Codec]:
+    """Codec the file at ``path`` was written with, or None if it is empty."""
+    with open(path, "rb") as f:
+        head = f.read(len(MSGPACK_MAGIC))
+    if not head:
+        return None
+    if head == MSGPACK_MAGIC:
+        return MsgpackCodec(default)
+    if head.startswith((b'{\n"', b"{\n}")):
+        return CompactJsonCodec(default)
+    # Any other JSON layout is read with a whole-file parse
+    return IndentedJsonCodec(default)
+
+
+def read_records(path: str) -> Iterator[Tuple[str, Any]]:
+    """Stream (id, stored record) pairs from a news store in any supported format."""
+    codec = detect_codec(path)
+    if codec is None:
+        return
+    with open(path, "rb") as f:
+        yield from codec.iter_records(f)
@@ -0,0 +1,354 @@
+# bot/services/send_scheduler.py
+import asyncio
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+import logging
+
+from telegram.error import RetryAfter
+
+from parser.metrics import Histogram, DEFAULT_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+ChatId = Union[int, str]
+
+# How far a rate drops after RetryAfter, and how much of the gap to the configured rate each success wins back
+BACKOFF_FACTOR = 0.5
+RECOVERY_STEP = 0.05
+
+
+class Priority(IntEnum):
+    """Send lanes, most urgent first."""
+
+    INTERACTIVE = 0  # answers to a moderator: edit previews, edited moderation messages, test posts
+    PUBLISH = 1  # publishing approved news and deleting handled moderation messages
+    BULK = 2  # news loaded into the moderation channel by the CLI
+
+
+# Share of each bucket a lane leaves to the lanes above it: bulk sends never take a
+# chat's last token or the last fifth of the global bucket, so an Approve pressed
+# during a bulk load finds a token instead of waiting for a refill
+CHAT_RESERVE = {Priority.INTERACTIVE: 0, Priority.PUBLISH: 0, Priority.BULK: 1}
+GLOBAL_RESERVE = {Priority.INTERACTIVE: 0.0, Priority.PUBLISH: 0.0, Priority.BULK: 0.2}
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """``RetryAfter.retry_after`` in seconds (newer python-telegram-bot versions return a timedelta)."""
+    retry_after = error.retry_after
+    if hasattr(retry_after, "total_seconds"):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``capacity``.
+
+    ``rate`` can be lowered by ``slow_down`` and grows back towards
+    ``max_rate`` on every ``recover``, so a bucket settles just below the
+    rate Telegram actually tolerates.
+    """
+
+    __slots__ = ("max_rate", "rate", "min_rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_at(self, now: float, reserve: float = 0.0) -> float:
+        """Moment a token is available while ``reserve`` tokens stay behind (``now`` if already)."""
+        self._refill(now)
+        needed = 1 + min(reserve, self.capacity - 1)
+        if self.tokens >= needed:
+            return now
+        return now + (needed - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def slow_down(self, now: float):
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+        # Whatever burst we had left is what got us throttled
+        self.tokens = min(self.tokens, 0.0)
+
+    def recover(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + (self.max_rate - self.rate) * RECOVERY_STEP + self.min_rate / 10)
+
+
+class _Job:
+    __slots__ = ("func", "args", "kwargs", "future", "priority", "attempts", "queued_at")
+
+    def __init__(self, func, args, kwargs, future: asyncio.Future, priority: Priority):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.priority = priority
+        self.attempts = 0
+        self.queued_at = time.monotonic()
+
+    def rank(self, now: float, aging: float) -> float:
+        """Lane number minus one per ``aging`` seconds waited: old bulk sends overtake fresh interactive ones."""
+        return self.priority - (now - self.queued_at) / aging
+
+
+class _ChatQueue:
+    __slots__ = ("bucket", "lanes", "paused_until", "busy")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lanes: List[Deque[_Job]] = [deque() for _ in Priority]
+        self.paused_until = 0.0
+        self.busy = False  # a request to this chat is in flight
+
+    def head(self, now: float, aging: float) -> Optional[_Job]:
+        """Oldest job of the lane whose head ranks best (FIFO within a lane)."""
+        best = None
+        for jobs in self.lanes:
+            if jobs and (best is None or jobs[0].rank(now, aging) < best.rank(now, aging)):
+                best = jobs[0]
+        return best
+
+    def idle(self, now: float) -> bool:
+        bucket = self.bucket
+        bucket.ready_at(now)  # refill
+        return (not any(self.lanes) and not self.busy and self.paused_until <= now
+                and bucket.rate >= bucket.max_rate and bucket.tokens >= bucket.capacity)
+
+
+class SendScheduler:
+    """Outbound Bot API queue paced by a global and a per-chat token bucket.
+
+    ``submit`` queues a coroutine function for a chat in a priority lane and
+    returns its result once a dispatcher task has run it. Requests for one
+    chat run one at a time, so split messages keep their order. Defaults
+    follow Telegram's published limits: about 30 messages per second overall
+    and 20 per minute into one group or channel (private chats get
+    ``private_chat_rate``).
+
+    Whenever a token is free the request with the best rank goes first:
+    INTERACTIVE, then PUBLISH, then BULK, FIFO inside a lane. A request's
+    rank improves by one lane per ``aging`` seconds of waiting, so bulk loads
+    are slowed by moderator activity but never starved. Lower lanes also leave
+    part of each bucket unused (CHAT_RESERVE, GLOBAL_RESERVE) for the higher
+    ones. Queue waits are recorded per lane.
+
+    A ``RetryAfter`` pauses the chat for the time Telegram asked, halves the
+    chat's and the global rate, and queues the request again at the head of
+    its lane (up to ``max_retries`` times). Rates creep back to the
+    configured ones as sends succeed. Any other exception is passed to the
+    caller.
+    """
+
+    def __init__(self, global_rate: float = 30.0, chat_rate_per_minute: float = 20.0,
+                 chat_burst: int = 3, private_chat_rate: float = 1.0, max_retries: int = 3,
+                 aging: float = 30.0):
+        self.chat_rate = chat_rate_per_minute / 60
+        self.chat_burst = chat_burst
+        self.private_chat_rate = private_chat_rate
+        self.max_retries = max_retries
+        self.aging = aging
+
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[str, _ChatQueue] = {}
+        self._queued = [0] * len(Priority)
+        self._in_flight = 0
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.queue_wait = Histogram(DEFAULT_BUCKETS)
+        self.lane_wait = {priority: Histogram(DEFAULT_BUCKETS) for priority in Priority}
+        self.stats = {"sent": 0, "failed": 0, "retry_after": 0, "retried": 0}
+
+    # ===== QUEUEING =====
+    def _is_group(self, chat_id: ChatId) -> bool:
+        # Groups, supergroups and channels have negative ids or an @username
+        text = str(chat_id)
+        return text.startswith(("-", "@"))
+
+    def _chat(self, chat_id: ChatId) -> _ChatQueue:
+        key = str(chat_id)
+        chat = self._chats.get(key)
+        if chat is None:
+            if self._is_group(chat_id):
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            else:
+                bucket = TokenBucket(self.private_chat_rate, self.chat_burst)
+            chat = self._chats[key] = _ChatQueue(bucket)
+        return chat
+
+    async def submit(self, chat_id: ChatId, func: Callable[..., Awaitable[Any]], /, *args,
+                     priority: Priority = Priority.INTERACTIVE, **kwargs) -> Any:
+        """Queue ``func(*args, **kwargs)`` as a request to ``chat_id`` and await its result.
+
+        ``chat_id`` and ``func`` are positional-only so that ``kwargs`` can
+        carry the Bot API's own ``chat_id``.
+        """
+        loop = asyncio.get_running_loop()
+        self._ensure_started()
+        future = loop.create_future()
+        self._chat(chat_id).lanes[priority].append(_Job(func, args, kwargs, future, priority))
+        self._queued[priority] += 1
+        self._wakeup.set()
+        return await future
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    # ===== DISPATCH =====
+    def _next_job(self, now: float) -> Tuple[Optional[str], Optional[_Job], Optional[float]]:
+        """(chat key, job, moment it may run) for the best-ranked job that can run now.
+
+        If none can run yet, the job that becomes runnable soonest.
+        """
+        best = None  # (rank, queued_at, key, job)
+        soonest = None  # (ready_at, key, job)
+        for key, chat in self._chats.items():
+            if chat.busy:
+                continue
+            job = chat.head(now, self.aging)
+            if job is None:
+                continue
+            # A job that has waited a full aging period no longer leaves reserve for others
+            lane = job.priority if job.rank(now, self.aging) > job.priority - 1 else Priority.INTERACTIVE
+            ready_at = max(
+                chat.paused_until,
+                chat.bucket.ready_at(now, CHAT_RESERVE[lane]),
+                self.global_bucket.ready_at(now, GLOBAL_RESERVE[lane] * self.global_bucket.capacity),
+            )
+            if ready_at <= now:
+                candidate = (job.rank(now, self.aging), job.queued_at, key, job)
+                if best is None or candidate[:2] < best[:2]:
+                    best = candidate
+            elif soonest is None or ready_at < soonest[0]:
+                soonest = (ready_at, key, job)
+
+        if best is not None:
+            return best[2], best[3], now
+        if soonest is not None:
+            return soonest[1], soonest[2], soonest[0]
+        return None, None, None
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            key, job, ready_at = self._next_job(now)
+            if key is None:
+                self._wakeup.clear()
+                self._forget_idle_chats(now)
+                await self._wakeup.wait()
+                continue
+
+            if ready_at > now:
+                # A new submission may be for a chat that is ready sooner
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), ready_at - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            chat = self._chats[key]
+            chat.lanes[job.priority].popleft()
+            self._queued[job.priority] -= 1
+            chat.bucket.consume(now)
+            self.global_bucket.consume(now)
+
+            if job.attempts == 0:
+                self.queue_wait.observe(now - job.queued_at)
+                self.lane_wait[job.priority].observe(now - job.queued_at)
+            if job.future.cancelled():
+                continue
+            chat.busy = True
+            self._in_flight += 1
+            asyncio.get_running_loop().create_task(self._run(key, chat, job))
+
+    async def _run(self, key: str, chat: _ChatQueue, job: _Job):
+        job.attempts += 1
+        try:
+            result = await job.func(*job.args, **job.kwargs)
+        except RetryAfter as e:
+            self._throttle(key, chat, retry_after_seconds(e))
+            if job.attempts <= self.max_retries and not job.future.cancelled():
+                self.stats["retried"] += 1
+                chat.lanes[job.priority].appendleft(job)
+                self._queued[job.priority] += 1
+                self._wakeup.set()
+            elif not job.future.done():
+                self.stats["failed"] += 1
+                job.future.set_exception(e)
+        except Exception as e:
+            self.stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.stats["sent"] += 1
+            chat.bucket.recover()
+            self.global_bucket.recover()
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            chat.busy = False
+            self._in_flight -= 1
+            self._wakeup.set()
+
+    def _throttle(self, key: str, chat: _ChatQueue, retry_after: float):
+        now = time.monotonic()
+        self.stats["retry_after"] += 1
+        chat.paused_until = max(chat.paused_until, now + retry_after)
+        chat.bucket.slow_down(now)
+        self.global_bucket.slow_down(now)
+        logger.warning(
+            f"Rate limited in chat {key}: pausing it for {retry_after:.0f}s, "
+            f"chat rate {chat.bucket.rate * 60:.1f}/min, global rate {self.global_bucket.rate:.1f}/s"
+        )
+
+    def _forget_idle_chats(self, now: float):
+        """Drop chats with nothing queued whose bucket is full again (they would be recreated as-is)."""
+        for key in [key for key, chat in self._chats.items() if chat.idle(now)]:
+            del self._chats[key]
+
+    async def close(self):
+        """Stop the dispatcher; requests still queued fail with CancelledError."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for chat in self._chats.values():
+            for jobs in chat.lanes:
+                while jobs:
+                    jobs.popleft().future.cancel()
+        self._queued = [0] * len(Priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queued": sum(self._queued),
+            "in_flight": self._in_flight,
+            "chats": len(self._chats),
+            "global_rate": round(self.global_bucket.rate, 2),
+            "queue_wait": self.queue_wait.to_dict(),
+            "lanes": {
+                priority.name.lower(): {"queued": self._queued[priority], "wait": self.lane_wait[priority].to_dict()}
+                for priority in Priority
+            },
+        }
@@ -5,17 +5,30 @@ import logging
 import time
 from contextlib import asynccontextmanager
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import Deque, List, Optional, Dict, Any
+from collections import deque
 from dataclasses import dataclass, field
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.error import TelegramError, RetryAfter, TimedOut, NetworkError
 
 from bot.formatters import format_news_for_publication
+from cache import BoundedTTLCache
+from bot.services.send_scheduler import Priority, SendScheduler
 from config import TelegramConfig
 
 logger = logging.getLogger(__name__)
 
+# Most message IDs Telegram accepts in one deleteMessages call
+DELETE_BATCH_SIZE = 100
+
+# A text sent to the same chat again within this many seconds is treated as a duplicate
+DUPLICATE_WINDOW = 60
+DUPLICATE_CACHE_SIZE = 5000
+
+# Circuit breaker state changes kept for inspection (oldest are dropped)
+STATE_CHANGES_KEEP = 100
+
 
 class CircuitBreakerState(Enum):
     CLOSED = "closed"
@@ -29,7 +42,7 @@ class CircuitBreakerStats:
     last_failure_time: float = 0
     success_count: int = 0
     total_requests: int = 0
-    state_changes: List[tuple] = field(default_factory=list)
+    state_changes: Deque[tuple] = field(default_factory=lambda: deque(maxlen=STATE_CHANGES_KEEP))
 
 
 class CircuitBreaker:
@@ -97,7 +110,16 @@ class TelegramService:
     def __init__(self, config: TelegramConfig):
         self.config = config
         self.circuit_breaker = CircuitBreaker()
-        self._message_cache: Dict[str, int] = {}  # Cache for deduplication
+        # Recently sent message hashes, for deduplication
+        self._message_cache = BoundedTTLCache(maxsize=DUPLICATE_CACHE_SIZE, ttl=DUPLICATE_WINDOW)
+        # Every Bot API call that posts into a chat goes through this queue
+        self.scheduler = SendScheduler(
+            global_rate=config.global_rate,
+            chat_rate_per_minute=config.chat_rate_per_minute,
+            chat_burst=config.chat_burst,
+            private_chat_rate=config.private_chat_rate,
+            aging=config.lane_aging,
+        )
 
     def make_news_id(self, item: dict, index: int = 0) -> str:
         """Generate unique ID for news item."""
@@ -111,19 +133,25 @@ class TelegramService:
 
     async def send_with_retry(self, bot: Bot, chat_id: str, text: str,
                               reply_markup: Optional[InlineKeyboardMarkup] = None,
+                              priority: Priority = Priority.INTERACTIVE,
+                              deduplicate: bool = True,
                               **kwargs) -> Optional[Message]:
-        """Send message with exponential backoff retry logic."""
+        """Send message through the rate-limited queue, retrying network errors with backoff.
+
+        Flood limits are handled by the scheduler: it waits out RetryAfter and
+        slows down, so a successful send returns immediately. ``priority``
+        picks the scheduler lane. With ``deduplicate`` the same text to the
+        same chat within DUPLICATE_WINDOW is skipped.
+        """
 
         logger.info(f"TELEGRAM_SERVICE: Attempting to send message to chat_id={chat_id}")
         logger.info(f"TELEGRAM_SERVICE: Message text preview: {text[:100]}...")
 
         # Check for duplicate messages
         message_hash = hashlib.md5(f"{chat_id}:{text}".encode()).hexdigest()
-        if message_hash in self._message_cache:
-            recent_time = time.time() - self._message_cache[message_hash]
-            if recent_time < 60:  # Prevent duplicates within 1 minute
-                logger.warning(f"Duplicate message detected, skipping: {text[:50]}...")
-                return None
+        if deduplicate and self._message_cache.get(message_hash) is not None:  # Prevent duplicates within DUPLICATE_WINDOW
+            logger.warning(f"Duplicate message detected, skipping: {text[:50]}...")
+            return None
 
         async def _send():
             logger.info(f"TELEGRAM_SERVICE: Executing bot.send_message to {chat_id}")
@@ -139,25 +167,16 @@ class TelegramService:
 
         for attempt in range(self.config.retry_attempts):
             try:
-                message = await self.circuit_breaker.call(_send)
+                message = await self.circuit_breaker.call(self.scheduler.submit, chat_id, _send, priority=priority)
 
-                if message:
+                if message and deduplicate:
                     self._message_cache[message_hash] = time.time()
-                    # Clean old cache entries
-                    if len(self._message_cache) > 1000:
-                        current_time = time.time()
-                        self._message_cache = {
-                            k: v for k, v in self._message_cache.items()
-                            if current_time - v < 3600  # Keep only last hour
-                        }
-
-                await asyncio.sleep(self.config.flood_control_delay)
+
                 return message
 
             except RetryAfter as e:
-                wait_time = e.retry_after + 1
-                logger.warning(f"Rate limited, waiting {wait_time} seconds...")
-                await asyncio.sleep(wait_time)
+                # The scheduler already paused this chat; the next attempt queues behind the pause
+                logger.warning(f"Still rate limited after scheduler retries (chat_id: {chat_id}): {e}")
 
             except (TimedOut, NetworkError) as e:
                 wait_time = min(2 ** attempt, 60)  # Exponential backoff, max 60s
@@ -181,8 +200,17 @@ class TelegramService:
         logger.error(f"TELEGRAM_SERVICE: Failed to send message after {self.config.retry_attempts} attempts to chat_id: {chat_id}")
         return None
 
+    async def reply(self, bot: Bot, message: Message, text: str) -> Optional[Message]:
+        """Answer ``message`` in its chat through the INTERACTIVE lane of the scheduler.
+
+        Replies are not deduplicated: repeating a command gets an answer every time.
+        """
+        return await self.send_with_retry(bot, message.chat_id, text,
+                                          priority=Priority.INTERACTIVE, deduplicate=False)
+
     async def split_and_send_message(self, bot: Bot, chat_id: str, text: str,
-                                     max_length: int = None) -> List[int]:
+                                     max_length: int = None,
+                                     priority: Priority = Priority.INTERACTIVE) -> List[int]:
         """Split long text and send as multiple messages."""
         if max_length is None:
             max_length = self.config.max_message_length
@@ -190,7 +218,7 @@ class TelegramService:
         message_ids = []
 
         if len(text) <= max_length:
-            message = await self.send_with_retry(bot, chat_id, text)
+            message = await self.send_with_retry(bot, chat_id, text, priority=priority)
             if message:
                 message_ids.append(message.message_id)
             return message_ids
@@ -204,7 +232,7 @@ class TelegramService:
                 current_chunk += sentence + '. '
             else:
                 if current_chunk:
-                    message = await self.send_with_retry(bot, chat_id, current_chunk.strip())
+                    message = await self.send_with_retry(bot, chat_id, current_chunk.strip(), priority=priority)
                     if message:
                         message_ids.append(message.message_id)
                     current_chunk = sentence + '. '
@@ -212,7 +240,7 @@ class TelegramService:
                     # Handle very long sentences
                     while len(sentence) > max_length:
                         chunk = sentence[:max_length]
-                        message = await self.send_with_retry(bot, chat_id, chunk)
+                        message = await self.send_with_retry(bot, chat_id, chunk, priority=priority)
                         if message:
                             message_ids.append(message.message_id)
                         sentence = sentence[max_length:]
@@ -220,42 +248,95 @@ class TelegramService:
 
         # Send remaining text
         if current_chunk:
-            message = await self.send_with_retry(bot, chat_id, current_chunk.strip())
+            message = await self.send_with_retry(bot, chat_id, current_chunk.strip(), priority=priority)
             if message:
                 message_ids.append(message.message_id)
 
         return message_ids
 
     async def safe_delete_messages(self, bot: Bot, chat_id: str,
-                                   message_ids: List[int], news_id: str = "") -> int:
-        """Safely delete multiple messages."""
+                                   message_ids: List[int], news_id: str = "",
+                                   priority: Priority = Priority.PUBLISH) -> int:
+        """Safely delete multiple messages.
+
+        Uses the bulk deleteMessages call (DELETE_BATCH_SIZE IDs per request)
+        when the installed python-telegram-bot has it. A batch that fails, or
+        a bot without it, is deleted one message at a time instead: the
+        single deletes are queued together and paced by the scheduler.
+        """
         if not message_ids:
             logger.debug(f"No message IDs provided for deletion (news: {news_id})")
             return 0
 
-        deleted_count = 0
-        for message_id in message_ids:
-            if message_id is None:
-                logger.debug(f"Skipping None message_id for news {news_id}")
-                continue
+        # Drop None and duplicates, keep order
+        ids = list(dict.fromkeys(message_id for message_id in message_ids if message_id is not None))
+        if len(ids) < len(message_ids):
+            logger.debug(f"Skipping {len(message_ids) - len(ids)} empty or repeated message IDs for news {news_id}")
 
-            try:
-                await bot.delete_message(chat_id=chat_id, message_id=message_id)
-                deleted_count += 1
-                await asyncio.sleep(0.1)  # Small delay between deletions
-                logger.debug(f"Successfully deleted message {message_id} for news {news_id}")
+        batches = [ids[i:i + DELETE_BATCH_SIZE] for i in range(0, len(ids), DELETE_BATCH_SIZE)]
+        counts = await asyncio.gather(*(
+            self._delete_batch(bot, chat_id, batch, news_id, priority) for batch in batches
+        ))
+        deleted_count = sum(counts)
 
+        logger.info(f"Deleted {deleted_count}/{len(message_ids)} messages for news {news_id}")
+        return deleted_count
+
+    async def _delete_batch(self, bot: Bot, chat_id: str, message_ids: List[int],
+                            news_id: str, priority: Priority) -> int:
+        if len(message_ids) > 1 and hasattr(bot, "delete_messages"):
+            try:
+                # Telegram skips messages that are already gone and reports success for the rest
+                await self.scheduler.submit(chat_id, bot.delete_messages, chat_id=chat_id,
+                                            message_ids=message_ids, priority=priority)
+                return len(message_ids)
             except TelegramError as e:
-                # Check if it's a "message to delete not found" error
-                if "message to delete not found" in str(e).lower() or "message can't be deleted" in str(e).lower():
-                    logger.debug(f"Message {message_id} already deleted or not found for news {news_id}")
-                else:
-                    logger.warning(f"Failed to delete message {message_id} for news {news_id}: {e}")
+                logger.warning(f"Bulk delete of {len(message_ids)} messages failed for news {news_id}: {e}. "
+                               f"Deleting one by one")
             except Exception as e:
-                logger.error(f"Unexpected error deleting message {message_id} for news {news_id}: {e}")
+                logger.error(f"Unexpected error in bulk delete for news {news_id}: {e}. Deleting one by one")
 
-        logger.info(f"Deleted {deleted_count}/{len(message_ids)} messages for news {news_id}")
-        return deleted_count
+        results = await asyncio.gather(*(
+            self._delete_one(bot, chat_id, message_id, news_id, priority) for message_id in message_ids
+        ))
+        return sum(results)
+
+    async def _delete_one(self, bot: Bot, chat_id: str, message_id: int, news_id: str, priority: Priority) -> bool:
+        try:
+            await self.scheduler.submit(chat_id, bot.delete_message, chat_id=chat_id, message_id=message_id,
+                                        priority=priority)
+            logger.debug(f"Successfully deleted message {message_id} for news {news_id}")
+            return True
+
+        except TelegramError as e:
+            # Check if it's a "message to delete not found" error
+            if "message to delete not found" in str(e).lower() or "message can't be deleted" in str(e).lower():
+                logger.debug(f"Message {message_id} already deleted or not found for news {news_id}")
+            else:
+                logger.warning(f"Failed to delete message {message_id} for news {news_id}: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error deleting message {message_id} for news {news_id}: {e}")
+        return False
+
+    async def delete_news_messages(self, bot: Bot, news_item: dict, channel_id: str, message_id: Optional[int],
+                                   news_id: str = "", priority: Priority = Priority.PUBLISH) -> int:
+        """Delete a news item's edit previews and its moderation message in one go.
+
+        IDs are grouped by chat, so when the previews were posted in the
+        moderation chat everything goes out as a single deleteMessages call;
+        different chats are handled concurrently.
+        """
+        by_chat: Dict[str, List[int]] = {}
+        preview_chat_id = news_item.get("preview_chat_id")
+        if preview_chat_id and news_item.get("preview_message_ids"):
+            by_chat.setdefault(str(preview_chat_id), []).extend(news_item["preview_message_ids"])
+        if message_id is not None:
+            by_chat.setdefault(str(channel_id), []).append(message_id)
+
+        counts = await asyncio.gather(*(
+            self.safe_delete_messages(bot, chat_id, ids, news_id, priority) for chat_id, ids in by_chat.items()
+        ))
+        return sum(counts)
 
     def create_moderation_keyboard(self, news_id: str) -> InlineKeyboardMarkup:
         """Create keyboard for news moderation."""
@@ -299,7 +380,8 @@ class TelegramService:
             f"{url}"
         )
 
-    async def send_to_moderation(self, bot: Bot, news_item: dict, news_id: str) -> Optional[Message]:
+    async def send_to_moderation(self, bot: Bot, news_item: dict, news_id: str,
+                                 priority: Priority = Priority.BULK) -> Optional[Message]:
         """Send news to moderation channel."""
         try:
             text = self.format_moderation_message(news_item, news_id)
@@ -309,7 +391,8 @@ class TelegramService:
                 bot,
                 self.config.moderation_channel,
                 text,
-                reply_markup=keyboard
+                reply_markup=keyboard,
+                priority=priority
             )
 
             if message:
@@ -331,7 +414,8 @@ class TelegramService:
             message = await self.send_with_retry(
                 bot,
                 self.config.publish_channel,
-                publication_text
+                publication_text,
+                priority=Priority.PUBLISH
             )
 
             if message:
@@ -352,12 +436,15 @@ class TelegramService:
             updated_text = self.format_moderation_message(news_item, news_id, edited=True)
             keyboard = self.create_moderation_keyboard(news_id)
 
-            await bot.edit_message_text(
+            await self.scheduler.submit(
+                chat_id,
+                bot.edit_message_text,
                 chat_id=chat_id,
                 message_id=message_id,
                 text=updated_text,
                 reply_markup=keyboard,
-                disable_web_page_preview=True
+                disable_web_page_preview=True,
+                priority=Priority.INTERACTIVE
             )
 
             logger.info(f"Moderation message updated for news {news_id}")
@@ -367,6 +454,28 @@ class TelegramService:
             logger.error(f"Failed to update moderation message for news {news_id}: {e}")
             return False
 
+    async def annotate_moderation_message(self, bot: Bot, data_entry: dict, news_id: str, note: str) -> bool:
+        """Append ``note`` to a news item's moderation message, keeping its buttons."""
+        try:
+            text = self.format_moderation_message(
+                data_entry["news_data"], news_id, edited=data_entry["news_data"].get("edited", False)
+            )
+            await self.scheduler.submit(
+                data_entry["channel_id"],
+                bot.edit_message_text,
+                chat_id=data_entry["channel_id"],
+                message_id=data_entry["message_id"],
+                text=f"{text}\n\n{note}",
+                reply_markup=self.create_moderation_keyboard(news_id),
+                disable_web_page_preview=True,
+                priority=Priority.INTERACTIVE
+            )
+            return True
+
+        except TelegramError as e:
+            logger.error(f"Failed to annotate moderation message for news {news_id}: {e}")
+            return False
+
     def get_circuit_breaker_stats(self) -> dict:
         """Get circuit breaker statistics."""
         stats = self.circuit_breaker.stats
@@ -379,12 +488,21 @@ class TelegramService:
             "success_rate": (stats.success_count / max(stats.total_requests, 1)) * 100
         }
 
+    def get_send_stats(self) -> dict:
+        """Send queue statistics (sent, retries, queue depth, current global rate, queue wait)."""
+        return self.scheduler.get_stats()
+
+    async def close(self):
+        """Stop the send queue."""
+        await self.scheduler.close()
+
     async def health_check(self, bot: Bot) -> dict:
         """Perform health check on Telegram service."""
         health_info = {
             "telegram_api": "unknown",
             "circuit_breaker": self.circuit_breaker.state.value,
-            "cache_size": len(self._message_cache)
+            "cache_size": len(self._message_cache),
+            "send_queue": self.scheduler.get_stats()["queued"],
         }
 
         try:
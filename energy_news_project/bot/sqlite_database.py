@@ -0,0 +1,559 @@
+# bot/sqlite_database.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+import logging
+
+from bot.blob_store import BlobStore, default_blob_dir, inline_body
+from bot.database import apply_updates
+from bot.serialization import read_records
+from bot.sent_ids import SentIdSet
+from models import NewsItem, json_default
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    id          TEXT PRIMARY KEY,
+    news_data   TEXT NOT NULL,
+    message_id  INTEGER,
+    channel_id  TEXT,
+    status      TEXT,
+    created_at  TEXT,
+    updated_at  TEXT,
+    extra       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_news_status ON news(status);
+CREATE INDEX IF NOT EXISTS idx_news_created_at ON news(created_at);
+CREATE INDEX IF NOT EXISTS idx_news_message_id ON news(message_id);
+CREATE INDEX IF NOT EXISTS idx_news_url ON news(json_extract(news_data, '$.url'));
+CREATE TABLE IF NOT EXISTS sent_ids (id TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS news_changes (version INTEGER PRIMARY KEY AUTOINCREMENT, news_id TEXT NOT NULL);
+CREATE TRIGGER IF NOT EXISTS news_changes_insert AFTER INSERT ON news
+BEGIN INSERT INTO news_changes (news_id) VALUES (new.id); END;
+CREATE TRIGGER IF NOT EXISTS news_changes_update AFTER UPDATE ON news
+BEGIN INSERT INTO news_changes (news_id) VALUES (new.id); END;
+CREATE TRIGGER IF NOT EXISTS news_changes_delete AFTER DELETE ON news
+BEGIN INSERT INTO news_changes (news_id) VALUES (old.id); END;
+"""
+
+# Rows of news_changes kept for subscribers that fall behind
+CHANGES_KEEP = 10_000
+
+# Top-level record keys that have their own columns; anything else goes to `extra`
+RECORD_COLUMNS = ("news_data", "message_id", "channel_id", "status", "created_at", "updated_at")
+
+
+class SQLiteNewsDB:
+    """SafeNewsDB-compatible store on SQLite in WAL mode.
+
+    Every mutation is a per-row upsert/delete inside a transaction, so its cost does
+    not depend on database size. ``status`` and ``created_at`` are indexed for
+    statistics and expiry, ``message_id`` and the article URL for lookups.
+
+    SQLite already locks across processes. Triggers log every changed news ID
+    into ``news_changes``, whose row id is the store version; ``subscribe()``
+    callbacks hear about local commits directly and about other processes'
+    commits when ``PRAGMA data_version`` moves (polled every
+    ``watch_interval`` seconds once someone subscribes).
+
+    With ``retention_days`` the backup thread expires old rows every
+    ``expiry_interval`` seconds in transactions of at most
+    ``expiry_batch_size`` deletions.
+
+    Unlike SafeNewsDB, article bodies stay inline in ``news_data``: there is
+    no BlobStore and no lazy ``full_text`` loading here. Records are read one
+    row at a time and never held in memory as a whole, and a row update
+    rewrites only that row. The blob store is only used to inline
+    externalized bodies when migrating from news_db.json.
+    """
+
+    def __init__(self, db_path="data/news_db.sqlite3", backup_interval=3600,
+                 json_db_file: Optional[str] = None, json_sent_ids_file: Optional[str] = None,
+                 watch_interval: float = 0.5, retention_days: int = 0, expiry_interval: float = 300,
+                 expiry_batch_size: int = 500):
+        self.db_path = db_path
+        self.backup_interval = backup_interval
+        self.watch_interval = watch_interval
+        self.retention_days = retention_days
+        self.expiry_interval = expiry_interval
+        self.expiry_batch_size = expiry_batch_size
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One shared connection; access is serialized by the lock
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+        # Change notifications
+        self._listeners: List[Callable[[int, Optional[Set[str]]], None]] = []
+        self._watch_thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        if json_db_file or json_sent_ids_file:
+            self.migrate_from_json(json_db_file, json_sent_ids_file)
+
+        self._seen_version = self.version
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+        self._last_backup = time.time()
+        self._start_backup_thread()
+
+        logger.info(f"SQLite database initialized: {len(self)} news items ({self.db_path})")
+
+    # ===== ROW CONVERSION =====
+    @staticmethod
+    def _record_to_row(news_id: str, record: dict) -> tuple:
+        extra = {k: v for k, v in record.items() if k not in RECORD_COLUMNS}
+        return (
+            news_id,
+            json.dumps(record.get("news_data", {}), ensure_ascii=False, default=json_default),
+            record.get("message_id"),
+            record.get("channel_id"),
+            record.get("status"),
+            record.get("created_at"),
+            record.get("updated_at"),
+            json.dumps(extra, ensure_ascii=False, default=json_default) if extra else None,
+        )
+
+    @staticmethod
+    def _row_to_record(row: tuple) -> dict:
+        _, news_data, message_id, channel_id, status, created_at, updated_at, extra = row
+        record = {
+            "news_data": NewsItem.from_dict(json.loads(news_data)),
+            "message_id": message_id,
+            "channel_id": channel_id,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        if status is not None:
+            record["status"] = status
+        if extra:
+            record.update(json.loads(extra))
+        return record
+
+    def _upsert(self, news_id: str, record: dict):
+        self._conn.execute(
+            "INSERT INTO news (id, news_data, message_id, channel_id, status, created_at, updated_at, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET news_data=excluded.news_data, message_id=excluded.message_id, "
+            "channel_id=excluded.channel_id, status=excluded.status, created_at=excluded.created_at, "
+            "updated_at=excluded.updated_at, extra=excluded.extra",
+            self._record_to_row(news_id, record),
+        )
+
+    # ===== TRANSACTIONS =====
+    @contextmanager
+    def transaction(self):
+        """Context manager for database transactions (nested calls use savepoints)."""
+        with self._lock:
+            savepoint = f"sp_{self._depth}"
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            else:
+                self._conn.execute(f"SAVEPOINT {savepoint}")
+            self._depth += 1
+
+            try:
+                yield
+            except Exception as e:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                    logger.error(f"Transaction rolled back due to error: {e}")
+                else:
+                    self._conn.execute(f"ROLLBACK TO {savepoint}")
+                    self._conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("COMMIT")
+                else:
+                    self._conn.execute(f"RELEASE {savepoint}")
+
+        if self._listeners and not self._depth:
+            self._notify_changes()
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations into one SQLite transaction."""
+        with self.transaction():
+            yield self
+
+    # ===== PUBLIC API (same as SafeNewsDB) =====
+    def add_news(self, news_id: str, news_data: Union[NewsItem, dict], message_id: int, channel_id: str):
+        """Add news item to database."""
+        now = datetime.now().isoformat()
+        record = {
+            "news_data": NewsItem.from_dict(news_data),
+            "message_id": message_id,
+            "channel_id": channel_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self.transaction():
+            self._upsert(news_id, record)
+            self._conn.execute("INSERT OR IGNORE INTO sent_ids (id) VALUES (?)", (news_id,))
+            logger.debug(f"Added news: {news_id}")
+
+    def add_many(self, items: Iterable[Tuple[str, Union[NewsItem, dict], int, str]]) -> int:
+        """Add (news_id, news_data, message_id, channel_id) tuples in one transaction."""
+        now = datetime.now().isoformat()
+        rows, ids = [], []
+        for news_id, news_data, message_id, channel_id in items:
+            rows.append(self._record_to_row(news_id, {
+                "news_data": NewsItem.from_dict(news_data),
+                "message_id": message_id,
+                "channel_id": channel_id,
+                "created_at": now,
+                "updated_at": now,
+            }))
+            ids.append((news_id,))
+
+        with self.transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO news (id, news_data, message_id, channel_id, status, "
+                "created_at, updated_at, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.executemany("INSERT OR IGNORE INTO sent_ids (id) VALUES (?)", ids)
+        logger.debug(f"Added {len(rows)} news items in batch")
+        return len(rows)
+
+    def get_news(self, news_id: str) -> Optional[dict]:
+        """Get news item by ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM news WHERE id = ?", (news_id,)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def update_news(self, news_id: str, updates: dict):
+        """Update news item with support for nested keys like 'news_data.full_text'."""
+        with self.transaction():
+            record = self.get_news(news_id)
+            if record is None:
+                logger.warning(f"News {news_id} not found for update")
+                return False
+
+            apply_updates(record, updates)
+            self._upsert(news_id, record)
+            logger.debug(f"Successfully updated news {news_id}")
+            return True
+
+    def update_many(self, updates: Dict[str, dict]) -> int:
+        """Apply {news_id: updates} in one transaction; returns number of updated items."""
+        with self.transaction():
+            return sum(1 for news_id, news_updates in updates.items() if self.update_news(news_id, news_updates))
+
+    def delete_many(self, news_ids: Iterable[str]) -> int:
+        """Delete several news items in one transaction; returns number deleted."""
+        ids = [(news_id,) for news_id in news_ids]
+        with self.transaction():
+            # rowcount, unlike total_changes, leaves out the news_changes rows written by triggers
+            deleted = self._conn.executemany("DELETE FROM news WHERE id = ?", ids).rowcount
+            self._conn.executemany("DELETE FROM sent_ids WHERE id = ?", ids)
+        return deleted
+
+    def delete_news(self, news_id: str):
+        """Delete news item."""
+        with self.transaction():
+            deleted = self._conn.execute("DELETE FROM news WHERE id = ?", (news_id,)).rowcount
+            if deleted:
+                self._conn.execute("DELETE FROM sent_ids WHERE id = ?", (news_id,))
+                logger.debug(f"Deleted news: {news_id}")
+                return True
+            return False
+
+    def is_sent(self, news_id: str) -> bool:
+        """Check if news was already sent."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sent_ids WHERE id = ?", (news_id,)).fetchone() is not None
+
+    def get_all_news_ids(self) -> Set[str]:
+        """Get all news IDs."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM news")}
+
+    def find_by_url(self, url: str) -> Optional[str]:
+        """ID of the news item with this article URL, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM news WHERE json_extract(news_data, '$.url') = ? LIMIT 1", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def find_by_message_id(self, message_id: int) -> Optional[str]:
+        """ID of the news item whose moderation message has this ID, if any."""
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM news WHERE message_id = ? LIMIT 1", (message_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_ids_by_status(self, status: str) -> Set[str]:
+        """IDs of news items with the given status (no status means "pending")."""
+        with self._lock:
+            if status == "pending":
+                rows = self._conn.execute("SELECT id FROM news WHERE status IS NULL OR status = 'pending'")
+            else:
+                rows = self._conn.execute("SELECT id FROM news WHERE status = ?", (status,))
+            return {row[0] for row in rows}
+
+    def get_ids_created_before(self, cutoff: str, limit: Optional[int] = None) -> List[str]:
+        """IDs with created_at older than the ISO timestamp ``cutoff``, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM news WHERE created_at != '' AND created_at < ? ORDER BY created_at LIMIT ?",
+                (cutoff, -1 if limit is None else limit)
+            )
+            return [row[0] for row in rows]
+
+    def get_stats(self) -> dict:
+        """Get database statistics."""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT COALESCE(status, 'pending'), COUNT(*) FROM news GROUP BY 1"
+            ).fetchall())
+            sent_count = self._conn.execute("SELECT COUNT(*) FROM sent_ids").fetchone()[0]
+
+        size = sum(os.path.getsize(p) for p in (self.db_path, f"{self.db_path}-wal") if os.path.exists(p))
+        return {
+            "total_news": sum(counts.values()),
+            "sent_count": sent_count,
+            "pending": counts.get("pending", 0),
+            "published": counts.get("published", 0),
+            "rejected": counts.get("rejected", 0),
+            "db_size_mb": size / 1024 / 1024,
+        }
+
+    def cleanup_old_news(self, days: int = 30):
+        """Remove news older than specified days."""
+        removed_count = self.expire_old_news(days)
+        logger.info(f"Cleaned up {removed_count} old news items")
+        return removed_count
+
+    def expire_old_news(self, days: int, batch_size: Optional[int] = None) -> int:
+        """Delete news older than ``days``, oldest first, in transactions of at most ``batch_size``."""
+        batch_size = batch_size or self.expiry_batch_size
+        cutoff_str = (datetime.now() - timedelta(days=days)).isoformat()
+        removed_count = 0
+        while True:
+            with self.transaction():
+                expired = self.get_ids_created_before(cutoff_str, limit=batch_size)
+                removed = self.delete_many(expired) if expired else 0
+            if not removed:
+                break
+            removed_count += removed
+            time.sleep(0)
+
+        if removed_count:
+            logger.info(f"Expired {removed_count} news items older than {days} days")
+        return removed_count
+
+    def clear_all(self):
+        """Clear all data (use with caution)."""
+        with self.transaction():
+            self._conn.execute("DELETE FROM news")
+            self._conn.execute("DELETE FROM sent_ids")
+            logger.warning("Database cleared")
+
+    def force_save(self):
+        """Checkpoint the WAL into the main database file."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info("Database force saved")
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+    def __len__(self):
+        """Return number of news items."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+
+    def __contains__(self, news_id):
+        """Check if news ID exists."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM news WHERE id = ?", (news_id,)).fetchone() is not None
+
+    # Compatibility methods for legacy code
+    def save_db(self):
+        """Legacy compatibility method - maps to force_save()."""
+        self.force_save()
+
+    def save_sent_ids(self):
+        """Legacy compatibility method - maps to force_save()."""
+        self.force_save()
+
+    # ===== CHANGE NOTIFICATIONS =====
+    @property
+    def version(self) -> int:
+        """Version of the last committed change (the same in every process)."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(version), 0) FROM news_changes").fetchone()[0]
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[Set[str]]]:
+        """(current version, IDs changed after ``version``); IDs are None if that history was pruned."""
+        with self._lock:
+            oldest, latest = self._conn.execute("SELECT MIN(version), MAX(version) FROM news_changes").fetchone()
+            if latest is None or latest <= version:
+                return max(version, latest or 0), set()
+            if oldest > version + 1:
+                return latest, None
+            rows = self._conn.execute("SELECT news_id FROM news_changes WHERE version > ?", (version,))
+            return latest, {row[0] for row in rows}
+
+    def subscribe(self, callback: Callable[[int, Optional[Set[str]]], None]):
+        """Call ``callback(version, news_ids)`` after each commit, local or from another process."""
+        self._listeners.append(callback)
+        if self._watch_thread is None:
+            self._start_watch_thread()
+
+    def unsubscribe(self, callback: Callable[[int, Optional[Set[str]]], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def refresh(self) -> bool:
+        """Notify subscribers of commits made by other connections; True if there were any."""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+        self._notify_changes()
+        return True
+
+    def _notify_changes(self):
+        with self._lock:
+            version, news_ids = self.changes_since(self._seen_version)
+            if version == self._seen_version:
+                return
+            self._seen_version = version
+        for callback in list(self._listeners):
+            try:
+                callback(version, news_ids)
+            except Exception as e:
+                logger.error(f"Change listener failed: {e}")
+
+    def _start_watch_thread(self):
+        """Start background thread that polls for other processes' commits."""
+
+        def watch_worker():
+            while not self._closed:
+                time.sleep(self.watch_interval)
+                try:
+                    if not self._closed:
+                        self.refresh()
+                except Exception as e:
+                    logger.error(f"Change watcher error: {e}")
+
+        self._watch_thread = threading.Thread(target=watch_worker, name="SQLiteNewsDB-watch", daemon=True)
+        self._watch_thread.start()
+
+    def _prune_changes(self):
+        """Keep only the newest CHANGES_KEEP rows of news_changes."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM news_changes WHERE version <= (SELECT MAX(version) FROM news_changes) - ?",
+                (CHANGES_KEEP,)
+            )
+
+    # ===== MIGRATION =====
+    def migrate_from_json(self, db_file: Optional[str], sent_ids_file: Optional[str]) -> int:
+        """One-shot import of news_db.json / sent_ids.json; skipped once done."""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+            if done:
+                return 0
+
+            news_db: Dict[str, Any] = {}
+            sent_ids = []
+            if db_file and os.path.exists(db_file):
+                news_db = dict(read_records(db_file))
+
+                # SafeNewsDB keeps bodies in its blob store; rows hold them inline
+                blob_dir = default_blob_dir(db_file)
+                blobs = BlobStore(blob_dir, cache_size=0) if os.path.isdir(blob_dir) else None
+                for record in news_db.values():
+                    if isinstance(record, dict) and isinstance(record.get("news_data"), dict):
+                        record["news_data"] = inline_body(record["news_data"], blobs)
+            if sent_ids_file and os.path.exists(SentIdSet.paths_for(sent_ids_file)[0]):
+                # SafeNewsDB moved its sent IDs into the binary index
+                sent_store = SentIdSet(sent_ids_file)
+                sent_ids = list(sent_store)
+                sent_store.close()
+            elif sent_ids_file and os.path.exists(sent_ids_file):
+                with open(sent_ids_file, "r", encoding="utf-8") as f:
+                    sent_ids = json.load(f)
+
+            with self.transaction():
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO news (id, news_data, message_id, channel_id, status, "
+                    "created_at, updated_at, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self._record_to_row(news_id, record) for news_id, record in news_db.items()),
+                )
+                self._conn.executemany("INSERT OR IGNORE INTO sent_ids (id) VALUES (?)",
+                                       ((news_id,) for news_id in sent_ids))
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (datetime.now().isoformat(),)
+                )
+
+            logger.info(f"Migrated {len(news_db)} news items and {len(sent_ids)} sent IDs from JSON")
+            return len(news_db)
+
+    # ===== BACKUPS =====
+    def _start_backup_thread(self):
+        """Start background thread for periodic backups."""
+
+        def backup_worker():
+            while True:
+                try:
+                    # Check every 5 minutes, or more often when expiring
+                    time.sleep(min(300, self.expiry_interval) if self.retention_days else 300)
+                    if self.retention_days:
+                        self.expire_old_news(self.retention_days)
+                    if time.time() - self._last_backup > self.backup_interval:
+                        self._create_backup()
+                        self._prune_changes()
+                        self._last_backup = time.time()
+                except Exception as e:
+                    logger.error(f"Backup thread error: {e}")
+
+        backup_thread = threading.Thread(target=backup_worker, daemon=True)
+        backup_thread.start()
+
+    def _create_backup(self):
+        """Online backup through the SQLite backup API (keeps the last 10)."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = f"{self.db_path}.backup_{timestamp}"
+        try:
+            target = sqlite3.connect(backup_path)
+            try:
+                with self._lock:
+                    self._conn.backup(target)
+            finally:
+                target.close()
+            logger.info(f"Backup created: {backup_path}")
+
+            db_dir = os.path.dirname(self.db_path) or "."
+            prefix = f"{os.path.basename(self.db_path)}.backup_"
+            backups = sorted(f for f in os.listdir(db_dir) if f.startswith(prefix))
+            for old_backup in backups[:-10]:
+                os.remove(os.path.join(db_dir, old_backup))
+                logger.debug(f"Removed old backup: {old_backup}")
+        except Exception as e:
+            logger.error(f"Backup creation failed: {e}")
@@ -0,0 +1,128 @@
+# cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+
+class BoundedTTLCache:
+    """Mapping with a size limit and one time-to-live for every entry.
+
+    Entries are kept in write order (writing a key again moves it to the
+    end). With a single TTL that is also expiry order, so expired entries
+    are always at the front: every write drops them from there, and a write
+    past ``maxsize`` evicts the oldest entry. Both are O(1) per removed
+    entry and nothing ever scans the whole cache.
+
+    Reads through ``get`` and ``[]`` count hits and misses; ``in`` does not.
+    Not thread-safe: meant for state owned by one event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, expires_at: float, now: float) -> bool:
+        return self.ttl is not None and expires_at <= now
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop entries whose TTL has passed; returns how many were dropped."""
+        if self.ttl is None:
+            return 0
+        now = self.clock() if now is None else now
+        data = self._data
+        dropped = 0
+        while data:
+            key, (expires_at, _) = next(iter(data.items()))
+            if expires_at > now:
+                break
+            del data[key]
+            dropped += 1
+        self.expirations += dropped
+        return dropped
+
+    # ===== READS =====
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            if not self._expired(entry[0], self.clock()):
+                self.hits += 1
+                return entry[1]
+            del self._data[key]
+            self.expirations += 1
+        self.misses += 1
+        return default
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not self._expired(entry[0], self.clock())
+
+    def __len__(self) -> int:
+        self.expire()
+        return len(self._data)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        self.expire()
+        return ((key, value) for key, (_, value) in list(self._data.items()))
+
+    def values(self) -> Iterator[Any]:
+        return (value for _, value in self.items())
+
+    # ===== WRITES =====
+    def __setitem__(self, key: Hashable, value: Any):
+        now = self.clock()
+        data = self._data
+        data[key] = (now + self.ttl if self.ttl is not None else 0.0, value)
+        data.move_to_end(key)
+        self.expire(now)
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def setdefault(self, key: Hashable, default: Any) -> Any:
+        """Value for ``key``, storing ``default`` first if it is missing or expired (counted as a miss)."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = value = default
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None or self._expired(entry[0], self.clock()):
+            return default
+        return entry[1]
+
+    def __delitem__(self, key: Hashable):
+        del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
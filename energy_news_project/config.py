@@ -1,7 +1,7 @@
 # config.py
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 
 @dataclass
@@ -15,9 +15,46 @@ class TelegramConfig:
 
     # Настройки retry и задержек
     retry_attempts: int = int(os.getenv("TELEGRAM_RETRY_ATTEMPTS", "5"))
-    flood_control_delay: float = float(os.getenv("TELEGRAM_FLOOD_DELAY", "1.5"))
     max_message_length: int = int(os.getenv("TELEGRAM_MAX_MESSAGE_LENGTH", "4000"))
 
+    # Очередь отправки (token bucket): лимиты Telegram — ~30 сообщений в секунду на бота
+    # и ~20 в минуту в одну группу или канал; после RetryAfter скорость снижается сама
+    global_rate: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+    chat_rate_per_minute: float = float(os.getenv("TELEGRAM_CHAT_RATE", "20"))
+    chat_burst: int = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+    private_chat_rate: float = float(os.getenv("TELEGRAM_PRIVATE_CHAT_RATE", "1.0"))
+    # Очереди по приоритетам: ответы модератору, затем публикация и удаление, затем массовая
+    # загрузка в модерацию; каждые lane_aging секунд ожидания поднимают запрос на один уровень
+    lane_aging: float = float(os.getenv("TELEGRAM_LANE_AGING", "30"))
+
+    # Фоновые задачи модерации: публикация и удаление сообщений после нажатия кнопки
+    job_workers: int = int(os.getenv("BOT_JOB_WORKERS", "3"))
+    job_max_attempts: int = int(os.getenv("BOT_JOB_ATTEMPTS", "5"))
+
+    # Ограничение входящих обновлений (GCRA): запросов в минуту и размер всплеска на пользователя
+    # и на весь бот; администраторы (ID через запятую) не ограничиваются
+    user_rate_limit: float = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "10"))
+    user_burst: int = int(os.getenv("RATE_LIMIT_USER_BURST", "5"))
+    global_rate_limit: float = float(os.getenv("RATE_LIMIT_GLOBAL_PER_MINUTE", "30"))
+    global_burst: int = int(os.getenv("RATE_LIMIT_GLOBAL_BURST", "30"))
+    admin_ids: List[int] = field(default_factory=lambda: [
+        int(user_id) for user_id in os.getenv("TELEGRAM_ADMIN_IDS", "").split(",") if user_id.strip()
+    ])
+
+    # Режим получения обновлений: polling (getUpdates) или webhook (Telegram присылает их сам)
+    run_mode: str = os.getenv("TELEGRAM_RUN_MODE", "polling")  # polling | webhook
+    # Публичный https-адрес webhook вместе с путём, например https://bot.example.com/telegram
+    webhook_url: str = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+    webhook_listen: str = os.getenv("TELEGRAM_WEBHOOK_LISTEN", "0.0.0.0")
+    webhook_port: int = int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+    webhook_path: str = os.getenv("TELEGRAM_WEBHOOK_PATH", "telegram")
+    # Проверяется в заголовке X-Telegram-Bot-Api-Secret-Token; пусто — случайный при каждом запуске
+    webhook_secret: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    # Адрес Bot API, например локальной заглушки benchmarks/telegram_api.py; пусто — api.telegram.org
+    api_base_url: str = os.getenv("TELEGRAM_API_BASE_URL", "")
+    # Сколько обновлений обрабатывается одновременно; обновления одного пользователя — по очереди
+    concurrent_updates: int = int(os.getenv("BOT_CONCURRENT_UPDATES", "8"))
+
     # Circuit breaker настройки
     circuit_breaker_failure_threshold: int = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5"))
     circuit_breaker_recovery_timeout: float = float(os.getenv("CIRCUIT_BREAKER_TIMEOUT", "60.0"))
@@ -27,10 +64,47 @@ class TelegramConfig:
 class DatabaseConfig:
     """Конфигурация для базы данных."""
 
+    backend: str = os.getenv("DB_BACKEND", "json")  # json | sqlite
     db_file: str = os.getenv("DB_FILE", "data/news_db.json")
     sent_ids_file: str = os.getenv("SENT_IDS_FILE", "data/sent_ids.json")
     backup_interval: int = int(os.getenv("DB_BACKUP_INTERVAL", "3600"))  # 1 hour
-    auto_cleanup_days: int = int(os.getenv("DB_CLEANUP_DAYS", "30"))
+    auto_cleanup_days: int = int(os.getenv("DB_CLEANUP_DAYS", "30"))  # 0 — не удалять старые новости
+    # Фоновое удаление устаревших новостей: как часто (сек) и сколько за одну транзакцию
+    cleanup_interval: float = float(os.getenv("DB_CLEANUP_INTERVAL", "300"))
+    cleanup_batch_size: int = int(os.getenv("DB_CLEANUP_BATCH_SIZE", "500"))
+    # SQLite backend (news_db.json / sent_ids.json are imported once on first start)
+    sqlite_file: str = os.getenv("DB_SQLITE_FILE", "data/news_db.sqlite3")
+    # JSON backend: sync — запись на каждый коммит, deferred — фоновый сброс
+    durability: str = os.getenv("DB_DURABILITY", "deferred")
+    flush_interval: float = float(os.getenv("DB_FLUSH_INTERVAL", "1.0"))
+    flush_max_changes: int = int(os.getenv("DB_FLUSH_MAX_CHANGES", "100"))
+    # JSON backend: тексты статей хранятся отдельно, в памяти — только последние прочитанные
+    # (SQLite хранит тексты в строках таблицы)
+    blob_dir: str = os.getenv("DB_BLOB_DIR", "data/blobs")
+    blob_cache_size: int = int(os.getenv("DB_BLOB_CACHE_SIZE", "64"))
+    # Инкрементальные бэкапы: базовый снимок + сегменты изменений
+    backup_dir: str = os.getenv("DB_BACKUP_DIR", "data/backups")
+    # Через сколько дней ID отправленной новости «забывается» (0 — никогда)
+    sent_ids_ttl_days: int = int(os.getenv("DB_SENT_IDS_TTL_DAYS", "0"))
+    # Общая JSON-база для нескольких процессов (бот, CLI): блокировка файла + журнал изменений
+    shared: bool = os.getenv("DB_SHARED", "false").lower() == "true"
+    watch_interval: float = float(os.getenv("DB_WATCH_INTERVAL", "0.5"))
+    # Формат news_db.json: json (компактный), json-indent (старый, с отступами), msgpack
+    codec: str = os.getenv("DB_CODEC", "json")
+
+
+@dataclass
+class ParserConfig:
+    """Конфигурация асинхронного парсера (python main_parser.py --async / --daemon)."""
+
+    max_workers: int = int(os.getenv("PARSER_MAX_WORKERS", "10"))
+    request_timeout: int = int(os.getenv("PARSER_REQUEST_TIMEOUT", "30"))
+    # Метрики (гистограммы этапов, пропускная способность): .json — снимок JSON, иначе формат Prometheus;
+    # пусто — не записывать. В режиме демона файл обновляется каждые metrics_interval секунд
+    metrics_file: str = os.getenv("PARSER_METRICS_FILE", "logs/parser_metrics.prom")
+    metrics_interval: float = float(os.getenv("PARSER_METRICS_INTERVAL", "60"))
+    # Пауза между запусками в режиме демона, сек
+    daemon_interval: float = float(os.getenv("PARSER_DAEMON_INTERVAL", "1800"))
 
 
 @dataclass
@@ -39,6 +113,7 @@ class AppConfig:
 
     telegram: TelegramConfig
     database: DatabaseConfig
+    parser: ParserConfig
 
     # Общие настройки
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
@@ -50,7 +125,8 @@ class AppConfig:
         """Загрузить конфигурацию из переменных окружения."""
         return cls(
             telegram=TelegramConfig(),
-            database=DatabaseConfig()
+            database=DatabaseConfig(),
+            parser=ParserConfig()
         )
 
 
@@ -1,21 +1,58 @@
 # main_parser.py
+import argparse
+import asyncio
+
+from config import config
 from parser.rss_parser import parse_all_feeds
 from parser.html_parser_custom import parse_all_custom_sites
-from parser.stats import init_stats, generate_stats_report, save_results
+from parser.stats import init_stats, generate_stats_report, save_results, record_run
 from parser.nlp_filter import load_classification_model
 from parser.logger_monitor import logger
 from datetime import datetime
 
-if __name__ == "__main__":
-    logger.info("Запуск парсера новостей")
 
+def make_async_parser(metrics_file: str):
+    """AsyncRSSParser writing its metrics to ``metrics_file`` (nothing when empty)."""
+    from parser.async_rss_parser import AsyncRSSParser
+
+    return AsyncRSSParser(
+        max_workers=config.parser.max_workers,
+        timeout=config.parser.request_timeout,
+        metrics_path=metrics_file or None,
+        metrics_interval=config.parser.metrics_interval,
+    )
+
+
+def save_news(all_news, stats):
+    # --- Сохраняем результаты ---
+    if all_news:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        json_file, stats_file = save_results(all_news, stats, timestamp)
+        logger.info(f"Сохранено {len(all_news)} новостей в {json_file}")
+        logger.info(generate_stats_report(stats))
+    else:
+        logger.info("Новости не найдены")
+
+
+def run_once(use_async: bool, metrics_file: str):
     # --- Инициализация статистики и модели ---
     stats = init_stats()
     classifier = load_classification_model()
 
     # --- 1) Парсим RSS-фиды ---
-    logger.info("Парсинг RSS-фидов")
-    rss_news = parse_all_feeds(classifier=classifier, stats=stats)
+    metrics_snapshot = None
+    if use_async:
+        logger.info("Парсинг RSS-фидов (асинхронно)")
+
+        async def parse():
+            async with make_async_parser(metrics_file) as rss_parser:
+                result = await rss_parser.parse_all_feeds(classifier, stats)
+                return result.news_items, rss_parser.metrics.snapshot()
+
+        rss_news, metrics_snapshot = asyncio.run(parse())
+    else:
+        logger.info("Парсинг RSS-фидов")
+        rss_news = parse_all_feeds(classifier=classifier, stats=stats)
     logger.info(f"Найдено {len(rss_news)} новостей из RSS")
 
     # --- 2) Парсим кастомные HTML-сайты ---
@@ -28,10 +65,48 @@ if __name__ == "__main__":
     logger.info(f"Всего новостей: {len(all_news)}")
 
     # --- 4) Сохраняем результаты ---
-    if all_news:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        json_file, stats_file = save_results(all_news, stats, timestamp)
-        logger.info(f"Сохранено {len(all_news)} новостей в {json_file}")
-        logger.info(generate_stats_report(stats))
+    save_news(all_news, stats)
+
+    # --- 5) Запись в историю запусков (python -m parser.stats compare) ---
+    if use_async:
+        record = record_run(stats, metrics_snapshot, parser_name="async")
     else:
-        logger.info("Новости не найдены")
+        record = record_run(stats)
+    logger.info(f"Запуск записан в историю: {record['run_id']} ({record['duration']:.1f} сек)")
+
+
+def run_daemon(metrics_file: str):
+    """Асинхронный парсинг RSS каждые config.parser.daemon_interval секунд, до Ctrl+C."""
+    classifier = load_classification_model()
+
+    async def daemon():
+        async with make_async_parser(metrics_file) as rss_parser:
+            await rss_parser.run_daemon(
+                classifier,
+                interval=config.parser.daemon_interval,
+                on_result=lambda result: save_news(result.news_items, result.stats),
+            )
+
+    logger.info(f"Режим демона: запуск каждые {config.parser.daemon_interval:.0f} сек, "
+                f"метрики: {metrics_file or 'не записываются'}")
+    try:
+        asyncio.run(daemon())
+    except KeyboardInterrupt:
+        logger.info("Демон парсера остановлен")
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Парсер новостей энергетики")
+    cli.add_argument("--async", dest="use_async", action="store_true",
+                     help="Парсить RSS асинхронным парсером (с метриками)")
+    cli.add_argument("--daemon", action="store_true",
+                     help="Парсить RSS асинхронно по расписанию (PARSER_DAEMON_INTERVAL)")
+    cli.add_argument("--metrics-file", default=config.parser.metrics_file,
+                     help="Куда записывать метрики асинхронного парсера (пусто — не записывать)")
+    args = cli.parse_args()
+
+    logger.info("Запуск парсера новостей")
+    if args.daemon:
+        run_daemon(args.metrics_file)
+    else:
+        run_once(args.use_async, args.metrics_file)
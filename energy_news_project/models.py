@@ -0,0 +1,197 @@
+# models.py
+import sys
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+# Порядок ключей совпадает с форматом energy_news_*.json
+NEWS_FIELDS = (
+    "title", "url", "date", "source", "preview",
+    "full_text", "relevance_reason", "language", "processed_at",
+)
+
+_MISSING = object()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class NewsItem:
+    """Compact news record shared by the parser and the bot.
+
+    Known fields live in slots; ``source`` and ``language`` are interned since
+    they repeat across thousands of items. ``full_text`` may be a zero-argument
+    loader that is resolved on first access. Keys outside ``NEWS_FIELDS``
+    (``id``, ``edited``, ``preview_message_ids``...) go to ``extra``. Known
+    fields explicitly set to None are remembered in ``_nulls`` so the item
+    converts back to the same dict.
+
+    The item also behaves like the dict it replaces (``get``, ``[]``, ``in``),
+    so formatters and nested ``news_data.*`` updates keep working.
+    """
+
+    __slots__ = (
+        "title", "url", "date", "source", "preview",
+        "_full_text", "relevance_reason", "language", "processed_at", "extra", "_nulls",
+    )
+
+    def __init__(self, title: Optional[str] = None, url: Optional[str] = None, date: Optional[str] = None,
+                 source: Optional[str] = None, preview: Optional[str] = None,
+                 full_text: Union[str, Callable[[], str], None] = None,
+                 relevance_reason: Optional[str] = None, language: Optional[str] = None,
+                 processed_at: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
+        self.title = title
+        self.url = url
+        self.date = date
+        self.source = _intern(source)
+        self.preview = preview
+        self._full_text = full_text
+        self.relevance_reason = relevance_reason
+        self.language = _intern(language)
+        self.processed_at = processed_at
+        self.extra = extra or None
+        self._nulls: Optional[frozenset] = None
+
+    # ===== LAZY BODY =====
+    @property
+    def full_text(self) -> Optional[str]:
+        value = self._full_text
+        if callable(value):
+            value = self._full_text = value()
+        return value
+
+    @full_text.setter
+    def full_text(self, value: Union[str, Callable[[], str], None]):
+        self._full_text = value
+
+    @property
+    def full_text_loaded(self) -> bool:
+        return not callable(self._full_text)
+
+    # ===== CONVERSION =====
+    @classmethod
+    def from_dict(cls, data: Union[Dict[str, Any], "NewsItem"]) -> "NewsItem":
+        """New item from a dict or a copy of another item (callers may keep changing theirs)."""
+        if isinstance(data, NewsItem):
+            return data.copy()
+
+        get = data.get
+        extra = {key: value for key, value in data.items() if key not in NEWS_FIELDS}
+
+        item = cls(
+            get("title"), get("url"), get("date"), get("source"), get("preview"),
+            get("full_text"), get("relevance_reason"), get("language"), get("processed_at"),
+            extra,
+        )
+        nulls = [key for key in NEWS_FIELDS if key in data and data[key] is None]
+        if nulls:
+            item._nulls = frozenset(nulls)
+        return item
+
+    def to_dict(self, include_full_text: bool = True) -> Dict[str, Any]:
+        """Plain dict for JSON; unset known fields are omitted, ones set to None are kept."""
+        result = {}
+        nulls = self._nulls
+        for key in NEWS_FIELDS:
+            if key == "full_text":
+                if not include_full_text:
+                    continue
+                value = self.full_text
+            else:
+                value = getattr(self, key)
+            if value is not None or (nulls and key in nulls):
+                result[key] = value
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def copy(self) -> "NewsItem":
+        item = NewsItem(
+            self.title, self.url, self.date, self.source, self.preview,
+            self._full_text, self.relevance_reason, self.language, self.processed_at,
+            dict(self.extra) if self.extra else None,
+        )
+        item._nulls = self._nulls
+        return item
+
+    # ===== DICT COMPATIBILITY =====
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def _lookup(self, key: str) -> Any:
+        if key in NEWS_FIELDS:
+            value = self.full_text if key == "full_text" else getattr(self, key)
+            if value is None and not (self._nulls and key in self._nulls):
+                return _MISSING
+            return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key in NEWS_FIELDS:
+            if value is None:
+                self._nulls = (self._nulls or frozenset()) | {key}
+            elif self._nulls and key in self._nulls:
+                self._nulls = self._nulls - {key} or None
+            if key == "full_text":
+                self._full_text = value
+            else:
+                setattr(self, key, _intern(value) if key in ("source", "language") else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in NEWS_FIELDS:
+            if (self._full_text if key == "full_text" else getattr(self, key)) is not None:
+                return True
+            return bool(self._nulls) and key in self._nulls
+        return bool(self.extra) and key in self.extra
+
+    def keys(self):
+        return [key for key in self]
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __iter__(self) -> Iterator[str]:
+        for key in NEWS_FIELDS:
+            if key in self:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, NewsItem):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"NewsItem(source={self.source!r}, title={(self.title or '')[:40]!r}, url={self.url!r})"
+
+
+def news_to_dict(item: Union[NewsItem, Dict[str, Any]]) -> Dict[str, Any]:
+    """JSON-ready dict for either a NewsItem or a legacy dict."""
+    return item.to_dict() if isinstance(item, NewsItem) else item
+
+
+def json_default(value: Any) -> Any:
+    """``default=`` hook for json.dump so NewsItem serializes transparently."""
+    if isinstance(value, NewsItem):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -12,7 +12,10 @@ import hashlib
 
 from parser.utils import clean_text
 from parser.nlp_filter import is_energy_related, translate_text
-from parser.stats import update_stats
+from parser.stats import init_stats, update_stats, record_run, record_source_duration
+from parser.metrics import ParserMetrics
+from models import NewsItem
+from cache import BoundedTTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +33,7 @@ class FeedConfig:
 
 @dataclass
 class ParsingResult:
-    news_items: List[Dict] = field(default_factory=list)
+    news_items: List[NewsItem] = field(default_factory=list)
     errors: List[str] = field(default_factory=list)
     stats: Dict = field(default_factory=dict)
     processing_time: float = 0.0
@@ -39,12 +42,20 @@ class ParsingResult:
 class AsyncRSSParser:
     """High-performance async RSS parser with connection pooling and rate limiting."""
 
-    def __init__(self, max_workers: int = 10, timeout: int = 30, max_connections: int = 100):
+    def __init__(self, max_workers: int = 10, timeout: int = 30, max_connections: int = 100,
+                 metrics_path: Optional[str] = None, metrics_interval: float = 60.0):
         self.max_workers = max_workers
         self.timeout = timeout
         self.max_connections = max_connections
         self.session: Optional[aiohttp.ClientSession] = None
-        self._rate_limiters: Dict[str, float] = {}
+        # Last request time per domain; entries outlive any per-feed delay, then expire
+        self._rate_limiters = BoundedTTLCache(maxsize=1024, ttl=600)
+
+        # Instrumentation: exported at the end of each run and on a timer in daemon mode
+        self.metrics = ParserMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._metrics_task: Optional[asyncio.Task] = None
 
         # Feed configurations
         self.feeds = [
@@ -74,6 +85,7 @@ class AsyncRSSParser:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
+        await self.stop_metrics_exporter()
         await self._close_session()
 
     async def _create_session(self):
@@ -100,11 +112,27 @@ class AsyncRSSParser:
             connector=connector,
             timeout=timeout,
             headers=headers,
-            raise_for_status=False
+            raise_for_status=False,
+            trace_configs=[self._create_trace_config()]
         )
 
         logger.info("HTTP session created with connection pooling")
 
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        """Trace connection setup (DNS resolution included) into the metrics."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+
+        async def on_connection_create_end(session, ctx, params):
+            feed = (ctx.trace_request_ctx or {}).get("feed")
+            self.metrics.observe("dns_connect", time.perf_counter() - ctx.connect_start, feed)
+
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
     async def _close_session(self):
         """Close aiohttp session."""
         if self.session:
@@ -116,7 +144,7 @@ class AsyncRSSParser:
     async def _rate_limit(self, domain: str, delay: float):
         """Apply rate limiting per domain."""
         current_time = time.time()
-        last_request = self._rate_limiters.get(domain, 0)
+        last_request = self._rate_limiters.get(domain, 0.0)
 
         if current_time - last_request < delay:
             sleep_time = delay - (current_time - last_request)
@@ -124,21 +152,27 @@ class AsyncRSSParser:
 
         self._rate_limiters[domain] = time.time()
 
-    async def _fetch_content(self, url: str, headers: Optional[Dict] = None) -> Optional[bytes]:
+    async def _fetch_content(self, url: str, headers: Optional[Dict] = None,
+                             feed: Optional[str] = None, delay: float = 1.0) -> Optional[bytes]:
         """Fetch content from URL with retries and error handling."""
         if not self.session:
             raise RuntimeError("Session not initialized")
 
         domain = urlparse(url).netloc
-        await self._rate_limit(domain, 1.0)
+        with self.metrics.timer("rate_limit_wait", feed):
+            await self._rate_limit(domain, delay)
 
         request_headers = headers or {}
 
         for attempt in range(3):
             try:
-                async with self.session.get(url, headers=request_headers) as response:
+                start = time.perf_counter()
+                async with self.session.get(url, headers=request_headers,
+                                            trace_request_ctx={"feed": feed}) as response:
                     if response.status == 200:
                         content = await response.read()
+                        self.metrics.observe("download", time.perf_counter() - start, feed)
+                        self.metrics.add_bytes(feed, len(content))
                         return content
                     elif response.status == 429:
                         # Rate limited
@@ -157,10 +191,10 @@ class AsyncRSSParser:
 
         return None
 
-    async def _extract_full_text(self, url: str) -> str:
+    async def _extract_full_text(self, url: str, feed: Optional[str] = None, delay: float = 1.0) -> str:
         """Extract full text from article URL."""
         try:
-            content = await self._fetch_content(url)
+            content = await self._fetch_content(url, feed=feed, delay=delay)
             if not content:
                 return ""
 
@@ -201,26 +235,30 @@ class AsyncRSSParser:
                     return ""
 
             loop = asyncio.get_event_loop()
-            full_text = await loop.run_in_executor(None, parse_html, content)
+            with self.metrics.timer("extraction", feed):
+                full_text = await loop.run_in_executor(None, parse_html, content)
             return full_text
 
         except Exception as e:
             logger.error(f"Full text extraction error for {url}: {e}")
             return ""
 
-    async def _parse_single_feed(self, feed_config: FeedConfig, classifier, stats) -> List[Dict]:
+    async def _parse_single_feed(self, feed_config: FeedConfig, classifier, stats) -> List[NewsItem]:
         """Parse a single RSS feed."""
         if not feed_config.enabled:
             return []
 
         results = []
         cutoff_date = datetime.now() - timedelta(days=21)
+        feed_start = time.perf_counter()
 
         try:
             # Fetch RSS content
             content = await self._fetch_content(
                 feed_config.url,
-                feed_config.custom_headers
+                feed_config.custom_headers,
+                feed=feed_config.name,
+                delay=feed_config.rate_limit_delay
             )
 
             if not content:
@@ -232,7 +270,8 @@ class AsyncRSSParser:
                 return feedparser.parse(content_bytes)
 
             loop = asyncio.get_event_loop()
-            feed = await loop.run_in_executor(None, parse_rss, content)
+            with self.metrics.timer("feedparser", feed_config.name):
+                feed = await loop.run_in_executor(None, parse_rss, content)
 
             if not hasattr(feed, 'entries') or not feed.entries:
                 update_stats(stats, feed_config.name, "no_entries")
@@ -245,7 +284,9 @@ class AsyncRSSParser:
             semaphore = asyncio.Semaphore(5)  # Limit concurrent article processing
 
             async def process_entry(entry):
+                wait_start = time.perf_counter()
                 async with semaphore:
+                    self.metrics.observe("entry_queue_wait", time.perf_counter() - wait_start, feed_config.name)
                     return await self._process_entry(
                         entry, feed_config, classifier, cutoff_date
                     )
@@ -258,14 +299,17 @@ class AsyncRSSParser:
 
             # Collect successful results
             for result in entry_results:
-                if isinstance(result, dict):
+                if isinstance(result, NewsItem):
                     results.append(result)
                     update_stats(stats, feed_config.name, "accepted")
+                    self.metrics.count_item(feed_config.name, "accepted")
                 elif isinstance(result, Exception):
                     logger.error(f"Entry processing error in {feed_config.name}: {result}")
                     update_stats(stats, feed_config.name, "processing_error")
+                    self.metrics.count_item(feed_config.name, "processing_error")
                 else:
                     update_stats(stats, feed_config.name, "not_relevant")
+                    self.metrics.count_item(feed_config.name, "not_relevant")
 
             logger.info(f"Processed {len(results)} articles from {feed_config.name}")
 
@@ -273,9 +317,10 @@ class AsyncRSSParser:
             logger.error(f"Feed processing error for {feed_config.name}: {e}")
             update_stats(stats, feed_config.name, "feed_error")
 
+        record_source_duration(stats, feed_config.name, time.perf_counter() - feed_start)
         return results
 
-    async def _process_entry(self, entry, feed_config: FeedConfig, classifier, cutoff_date) -> Optional[Dict]:
+    async def _process_entry(self, entry, feed_config: FeedConfig, classifier, cutoff_date) -> Optional[NewsItem]:
         """Process a single feed entry."""
         try:
             # Check publication date
@@ -298,13 +343,14 @@ class AsyncRSSParser:
                 return None
 
             # Get full text
-            full_text = await self._extract_full_text(link)
+            full_text = await self._extract_full_text(link, feed_config.name, feed_config.rate_limit_delay)
 
             # Combine text for relevance check
             combined_text = f"{title} {summary} {full_text}".strip()
 
             # Translate if needed
             if feed_config.language == "en" and combined_text:
+                translation_start = time.perf_counter()
                 try:
                     combined_text = await asyncio.get_event_loop().run_in_executor(
                         None, translate_text, combined_text, "en", "ru", feed_config.name, link
@@ -318,24 +364,26 @@ class AsyncRSSParser:
                         )
                 except Exception as e:
                     logger.warning(f"Translation error for {link}: {e}")
+                self.metrics.observe("translation", time.perf_counter() - translation_start, feed_config.name)
 
             # Check relevance
-            relevant, reason = is_energy_related(combined_text, classifier)
+            with self.metrics.timer("classification", feed_config.name):
+                relevant, reason = is_energy_related(combined_text, classifier)
             if not relevant:
                 return None
 
             # Create news item
-            news_item = {
-                "title": clean_text(title),
-                "url": link,
-                "date": pub_date.strftime("%Y-%m-%d %H:%M"),
-                "source": feed_config.name,
-                "preview": clean_text(summary or combined_text)[:300] + "...",
-                "full_text": clean_text(full_text),
-                "relevance_reason": reason,
-                "language": feed_config.language,
-                "processed_at": datetime.now().isoformat()
-            }
+            news_item = NewsItem(
+                title=clean_text(title),
+                url=link,
+                date=pub_date.strftime("%Y-%m-%d %H:%M"),
+                source=feed_config.name,
+                preview=clean_text(summary or combined_text)[:300] + "...",
+                full_text=clean_text(full_text),
+                relevance_reason=reason,
+                language=feed_config.language,
+                processed_at=datetime.now().isoformat()
+            )
 
             return news_item
 
@@ -347,6 +395,7 @@ class AsyncRSSParser:
                               enabled_feeds: Optional[Set[str]] = None) -> ParsingResult:
         """Parse all RSS feeds concurrently."""
         start_time = time.time()
+        self.metrics.reset()
 
         # Filter feeds if specified
         feeds_to_process = self.feeds
@@ -359,7 +408,9 @@ class AsyncRSSParser:
         semaphore = asyncio.Semaphore(self.max_workers)
 
         async def parse_with_semaphore(feed_config):
+            wait_start = time.perf_counter()
             async with semaphore:
+                self.metrics.observe("queue_wait", time.perf_counter() - wait_start, feed_config.name)
                 return await self._parse_single_feed(feed_config, classifier, stats)
 
         # Process all feeds concurrently
@@ -386,7 +437,7 @@ class AsyncRSSParser:
             unique_news = []
 
             for item in all_news:
-                url = item.get('url', '')
+                url = item.url
                 if url and url not in seen_urls:
                     seen_urls.add(url)
                     unique_news.append(item)
@@ -395,8 +446,10 @@ class AsyncRSSParser:
 
             logger.info(
                 f"Parsing completed: {len(unique_news)} unique articles "
-                f"from {len(all_news)} total in {processing_time:.2f}s"
+                f"from {len(all_news)} total in {processing_time:.2f}s "
+                f"({self.metrics.items_per_second():.1f} items/s)"
             )
+            self._export_metrics()
 
             return ParsingResult(
                 news_items=unique_news,
@@ -413,6 +466,57 @@ class AsyncRSSParser:
                 processing_time=time.time() - start_time
             )
 
+    def _export_metrics(self):
+        """Write metrics to ``metrics_path`` if configured; never fails the run."""
+        if not self.metrics_path:
+            return
+        try:
+            self.metrics.export(self.metrics_path)
+        except Exception as e:
+            logger.error(f"Metrics export failed: {e}")
+
+    def start_metrics_exporter(self) -> Optional[asyncio.Task]:
+        """Export metrics every ``metrics_interval`` seconds in the background."""
+        if not self.metrics_path or self._metrics_task:
+            return self._metrics_task
+
+        async def exporter():
+            while True:
+                await asyncio.sleep(self.metrics_interval)
+                self._export_metrics()
+
+        self._metrics_task = asyncio.create_task(exporter())
+        logger.info(f"Metrics exporter started: {self.metrics_path} every {self.metrics_interval}s")
+        return self._metrics_task
+
+    async def stop_metrics_exporter(self):
+        """Stop the periodic exporter and write a final snapshot."""
+        if self._metrics_task:
+            self._metrics_task.cancel()
+            try:
+                await self._metrics_task
+            except asyncio.CancelledError:
+                pass
+            self._metrics_task = None
+            self._export_metrics()
+
+    async def run_daemon(self, classifier=None, interval: float = 1800.0, on_result=None):
+        """Parse all feeds every ``interval`` seconds until cancelled."""
+        self.start_metrics_exporter()
+        try:
+            while True:
+                stats = init_stats()
+                result = await self.parse_all_feeds(classifier, stats)
+                try:
+                    record_run(stats, self.metrics.snapshot(), parser_name="async")
+                except Exception as e:
+                    logger.error(f"Failed to record run history: {e}")
+                if on_result:
+                    on_result(result)
+                await asyncio.sleep(interval)
+        finally:
+            await self.stop_metrics_exporter()
+
     def add_feed(self, url: str, name: str, **kwargs):
         """Add a new feed configuration."""
         feed_config = FeedConfig(url=url, name=name, **kwargs)
@@ -462,7 +566,7 @@ class AsyncRSSParser:
 
 
 # Convenience function for backward compatibility
-async def parse_all_feeds(classifier=None, stats=None) -> List[Dict]:
+async def parse_all_feeds(classifier=None, stats=None) -> List[NewsItem]:
     """Parse all feeds using the async parser."""
     async with AsyncRSSParser() as parser:
         result = await parser.parse_all_feeds(classifier, stats)
@@ -3,6 +3,7 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 from parser.utils import clean_text
 from parser.nlp_filter import is_energy_related
+from models import NewsItem
 import logging
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
@@ -47,15 +48,15 @@ def parse_site(url, article_selector, title_selector, preview_selector=None, dat
 
             relevant, reason = is_energy_related(title + " " + preview)
             if relevant:
-                news_list.append({
-                    "title": title,
-                    "url": link,
-                    "date": date,
-                    "source": source_name,
-                    "preview": preview[:300] + "...",
-                    "full_text": "",
-                    "relevance_reason": reason,
-                })
+                news_list.append(NewsItem(
+                    title=title,
+                    url=link,
+                    date=date,
+                    source=source_name,
+                    preview=preview[:300] + "...",
+                    full_text="",
+                    relevance_reason=reason,
+                ))
     except requests.RequestException as e:
         logger.error(f"Ошибка запроса {source_name}: {e}")
     except Exception as e:
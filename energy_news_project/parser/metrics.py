@@ -0,0 +1,245 @@
+# parser/metrics.py
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stages of the parsing pipeline that are timed separately
+STAGES = (
+    "dns_connect",
+    "download",
+    "feedparser",
+    "extraction",
+    "translation",
+    "classification",
+    # Waiting, not working: for a feed slot (max_workers), for an article slot
+    # within a feed, and for the per-domain request delay
+    "queue_wait",
+    "entry_queue_wait",
+    "rate_limit_wait",
+)
+
+# Upper bounds (seconds) of histogram buckets, Prometheus style
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Finer buckets for in-process latencies (handlers, locks, database writes)
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with cumulative export and quantile estimates."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Record a single observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate quantile by linear interpolation inside the matching bucket."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, bucket_count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if bucket_count and seen + bucket_count >= rank:
+                fraction = (rank - seen) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return (le, cumulative count) pairs including +Inf."""
+        result = []
+        running = 0
+        for i, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            le = repr(float(self.buckets[i])) if i < len(self.buckets) else "+Inf"
+            result.append((le, running))
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class ParserMetrics:
+    """Per-stage and per-feed latency histograms plus throughput counters."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+        """Drop all collected data and restart the throughput clock."""
+        self.started_at = time.time()
+        self.stage_histograms: Dict[str, Histogram] = {stage: Histogram(self.buckets) for stage in STAGES}
+        self.feed_histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.bytes_downloaded: Dict[str, int] = {}
+        self.items: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, stage: str, seconds: float, feed: Optional[str] = None):
+        """Record duration of a pipeline stage, optionally attributed to a feed."""
+        histogram = self.stage_histograms.get(stage)
+        if histogram is None:
+            histogram = self.stage_histograms[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+        if feed:
+            key = (feed, stage)
+            feed_histogram = self.feed_histograms.get(key)
+            if feed_histogram is None:
+                feed_histogram = self.feed_histograms[key] = Histogram(self.buckets)
+            feed_histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, feed: Optional[str] = None):
+        """Time the wrapped block (also usable around awaits)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, feed)
+
+    def add_bytes(self, feed: Optional[str], size: int):
+        key = feed or "unknown"
+        self.bytes_downloaded[key] = self.bytes_downloaded.get(key, 0) + size
+
+    def count_item(self, feed: str, result: str):
+        """Count a processed feed entry by outcome (accepted, not_relevant, error)."""
+        key = (feed, result)
+        self.items[key] = self.items.get(key, 0) + 1
+
+    # ===== EXPORT =====
+    def elapsed(self) -> float:
+        return max(time.time() - self.started_at, 1e-9)
+
+    def items_per_second(self) -> float:
+        return sum(self.items.values()) / self.elapsed()
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable view of all metrics."""
+        feeds: Dict[str, Dict] = {}
+        for (feed, stage), histogram in self.feed_histograms.items():
+            feeds.setdefault(feed, {}).setdefault("stages", {})[stage] = histogram.to_dict()
+        for feed, size in self.bytes_downloaded.items():
+            feeds.setdefault(feed, {})["bytes_downloaded"] = size
+        for (feed, result), count in self.items.items():
+            feeds.setdefault(feed, {}).setdefault("items", {})[result] = count
+
+        return {
+            "timestamp": time.time(),
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "items_total": sum(self.items.values()),
+            "items_per_second": round(self.items_per_second(), 3),
+            "bytes_downloaded": sum(self.bytes_downloaded.values()),
+            "stages": {stage: h.to_dict() for stage, h in self.stage_histograms.items()},
+            "feeds": feeds,
+        }
+
+    def to_prometheus(self) -> str:
+        """Render metrics in Prometheus text exposition format."""
+        lines = [
+            "# HELP parser_stage_duration_seconds Duration of parser pipeline stages.",
+            "# TYPE parser_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in self.stage_histograms.items():
+            self._histogram_lines(lines, "parser_stage_duration_seconds", f'stage="{_escape_label(stage)}"', histogram)
+
+        lines += [
+            "# HELP parser_feed_stage_duration_seconds Duration of parser pipeline stages per feed.",
+            "# TYPE parser_feed_stage_duration_seconds histogram",
+        ]
+        for (feed, stage), histogram in sorted(self.feed_histograms.items()):
+            labels = f'feed="{_escape_label(feed)}",stage="{_escape_label(stage)}"'
+            self._histogram_lines(lines, "parser_feed_stage_duration_seconds", labels, histogram)
+
+        lines += [
+            "# HELP parser_bytes_downloaded_total Bytes downloaded per feed.",
+            "# TYPE parser_bytes_downloaded_total counter",
+        ]
+        for feed, size in sorted(self.bytes_downloaded.items()):
+            lines.append(f'parser_bytes_downloaded_total{{feed="{_escape_label(feed)}"}} {size}')
+
+        lines += [
+            "# HELP parser_items_total Processed feed entries per feed and outcome.",
+            "# TYPE parser_items_total counter",
+        ]
+        for (feed, result), count in sorted(self.items.items()):
+            lines.append(
+                f'parser_items_total{{feed="{_escape_label(feed)}",result="{_escape_label(result)}"}} {count}'
+            )
+
+        lines += [
+            "# HELP parser_items_per_second Processed entries per second since start of run.",
+            "# TYPE parser_items_per_second gauge",
+            f"parser_items_per_second {self.items_per_second():.6f}",
+            "# HELP parser_run_elapsed_seconds Seconds since start of run.",
+            "# TYPE parser_run_elapsed_seconds gauge",
+            f"parser_run_elapsed_seconds {self.elapsed():.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(lines: List[str], name: str, labels: str, histogram: Histogram):
+        for le, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def export(self, path: str, fmt: Optional[str] = None) -> str:
+        """Atomically write metrics to a Prometheus text file or JSON snapshot.
+
+        Format is taken from ``fmt`` ("prometheus" or "json") or from the file extension.
+        """
+        if fmt is None:
+            fmt = "json" if path.endswith(".json") else "prometheus"
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_file = f"{path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            if fmt == "json":
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            else:
+                f.write(self.to_prometheus())
+        os.replace(temp_file, path)
+
+        logger.debug(f"Parser metrics exported to {path}")
+        return path
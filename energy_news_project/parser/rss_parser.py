@@ -1,10 +1,12 @@
+import time
 import feedparser
 import requests
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from parser.utils import clean_text
 from parser.nlp_filter import is_energy_related
-from parser.stats import update_stats
+from models import NewsItem
+from parser.stats import update_stats, record_bytes, record_source_duration, record_timing
 import logging
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
@@ -74,9 +76,15 @@ def parse_feed(feed_url, source_name, classifier, stats):
     results = []
     three_weeks_ago = datetime.now() - timedelta(days=21)
     try:
+        start = time.perf_counter()
         response = session.get(feed_url, headers=HEADERS, timeout=30)
         response.raise_for_status()
+        record_timing(stats, source_name, "download", time.perf_counter() - start)
+        record_bytes(stats, source_name, len(response.content))
+
+        start = time.perf_counter()
         feed = feedparser.parse(response.content)
+        record_timing(stats, source_name, "feedparser", time.perf_counter() - start)
     except Exception as e:
         logger.error(f"Ошибка запроса RSS {feed_url}: {e}")
         update_stats(stats, source_name, "failed_request")
@@ -91,20 +99,24 @@ def parse_feed(feed_url, source_name, classifier, stats):
             continue
 
         content = entry.title + " " + getattr(entry, "summary", "")
+        start = time.perf_counter()
         full_text = get_full_text(entry.link)
+        record_timing(stats, source_name, "extraction", time.perf_counter() - start)
         combined_text = content + " " + full_text
 
+        start = time.perf_counter()
         relevant, reason = is_energy_related(combined_text, classifier)
+        record_timing(stats, source_name, "classification", time.perf_counter() - start)
         if relevant:
-            news = {
-                "title": entry.title,
-                "url": entry.link,
-                "date": pub_date.strftime("%Y-%m-%d %H:%M"),
-                "source": source_name,
-                "preview": combined_text[:300] + "...",
-                "full_text": full_text,
-                "relevance_reason": reason,
-            }
+            news = NewsItem(
+                title=entry.title,
+                url=entry.link,
+                date=pub_date.strftime("%Y-%m-%d %H:%M"),
+                source=source_name,
+                preview=combined_text[:300] + "...",
+                full_text=full_text,
+                relevance_reason=reason,
+            )
             results.append(news)
             update_stats(stats, source_name, "accepted")
         else:
@@ -114,6 +126,8 @@ def parse_feed(feed_url, source_name, classifier, stats):
 def parse_all_feeds(classifier=None, stats=None):
     all_news = []
     for feed in RSS_FEEDS:
+        start = time.perf_counter()
         news = parse_feed(feed["url"], feed["name"], classifier, stats)
+        record_source_duration(stats, feed["name"], time.perf_counter() - start)
         all_news.extend(news)
     return all_news
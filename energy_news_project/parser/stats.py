@@ -1,8 +1,21 @@
+import argparse
 import json
+import sys
 from collections import defaultdict
 from datetime import datetime
+from statistics import median
 import os
 
+from models import news_to_dict
+
+HISTORY_FILE = os.path.join("data", "run_history.jsonl")
+
+# Причины, которые означают, что источник не удалось скачать
+FETCH_FAILURE_REASONS = ("failed_request", "fetch_failed", "feed_error")
+# Причины, которые означают, что источник скачался, но свежих статей в нём нет
+STALE_REASONS = ("old_date", "no_entries")
+
+
 def init_stats():
     return {
         "total_articles": 0,
@@ -13,10 +26,15 @@ def init_stats():
         "start_time": datetime.now()
     }
 
-def update_stats(stats, source, reason):
-    source_stats = stats["source_details"].setdefault(
+
+def _source_stats(stats, source):
+    return stats["source_details"].setdefault(
         source, {"total": 0, "accepted": 0, "rejected": defaultdict(int), "errors": []}
     )
+
+
+def update_stats(stats, source, reason):
+    source_stats = _source_stats(stats, source)
     stats["total_articles"] += 1
     source_stats["total"] += 1
 
@@ -27,6 +45,29 @@ def update_stats(stats, source, reason):
         stats["rejected"][reason] += 1
         source_stats["rejected"][reason] += 1
 
+
+def record_source_duration(stats, source, seconds):
+    if stats is None:
+        return
+    source_stats = _source_stats(stats, source)
+    source_stats["duration"] = source_stats.get("duration", 0.0) + seconds
+
+
+def record_timing(stats, source, stage, seconds):
+    """Суммарное время этапа (download, extraction, classification...) по источнику."""
+    if stats is None:
+        return
+    timings = _source_stats(stats, source).setdefault("timings", {})
+    timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def record_bytes(stats, source, size):
+    if stats is None:
+        return
+    source_stats = _source_stats(stats, source)
+    source_stats["bytes"] = source_stats.get("bytes", 0) + size
+
+
 def generate_stats_report(stats):
     report = "\n===== СТАТИСТИКА ОБРАБОТКИ =====\n"
     report += f"Всего статей: {stats['total_articles']}\n"
@@ -34,6 +75,7 @@ def generate_stats_report(stats):
     report += f"Отклонено: {stats['total_articles'] - stats['accepted']}\n"
     return report
 
+
 def save_results(all_news, stats, timestamp):
     # Создаём папку data, если её нет
     os.makedirs("data", exist_ok=True)
@@ -42,9 +84,242 @@ def save_results(all_news, stats, timestamp):
     stats_filename = f"data/processing_stats_{timestamp}.txt"
 
     with open(json_filename, "w", encoding="utf-8") as f:
-        json.dump(all_news, f, indent=2, ensure_ascii=False)
+        json.dump([news_to_dict(item) for item in all_news], f, indent=2, ensure_ascii=False)
 
     with open(stats_filename, "w", encoding="utf-8") as f:
         f.write(generate_stats_report(stats))
 
     return json_filename, stats_filename
+
+
+# ===== ИСТОРИЯ ЗАПУСКОВ =====
+
+def _ratio(accepted, total):
+    return round(accepted / total, 4) if total else 0.0
+
+
+def build_run_record(stats, metrics_snapshot=None, parser_name="rss", finished_at=None):
+    """Структурированная запись о запуске для истории (одна строка JSONL)."""
+    finished_at = finished_at or datetime.now()
+    started_at = stats.get("start_time") or finished_at
+    feed_metrics = (metrics_snapshot or {}).get("feeds", {})
+
+    sources = {}
+    for name, details in stats["source_details"].items():
+        rejected = dict(details["rejected"])
+        timings = dict(details.get("timings", {}))
+        stages = feed_metrics.get(name, {}).get("stages", {})
+        for stage, histogram in stages.items():
+            timings.setdefault(stage, histogram["sum"])
+
+        sources[name] = {
+            "total": details["total"],
+            "accepted": details["accepted"],
+            "acceptance_ratio": _ratio(details["accepted"], details["total"]),
+            "rejected": rejected,
+            "fetch_failures": sum(rejected.get(r, 0) for r in FETCH_FAILURE_REASONS),
+            "duration": round(details.get("duration", 0.0), 3),
+            "bytes": details.get("bytes", feed_metrics.get(name, {}).get("bytes_downloaded", 0)),
+            "timings": {stage: round(value, 3) for stage, value in timings.items()},
+        }
+
+    stage_totals = {}
+    for source in sources.values():
+        for stage, value in source["timings"].items():
+            stage_totals[stage] = round(stage_totals.get(stage, 0.0) + value, 3)
+
+    return {
+        "run_id": started_at.strftime("%Y%m%d_%H%M%S"),
+        "parser": parser_name,
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "duration": round((finished_at - started_at).total_seconds(), 3),
+        "total": stats["total_articles"],
+        "accepted": stats["accepted"],
+        "acceptance_ratio": _ratio(stats["accepted"], stats["total_articles"]),
+        "rejected": dict(stats["rejected"]),
+        "fetch_failures": sum(s["fetch_failures"] for s in sources.values()),
+        "failed_sources": list(stats.get("failed_sources", [])),
+        "bytes": sum(s["bytes"] for s in sources.values()),
+        "stages": stage_totals,
+        "sources": sources,
+    }
+
+
+def append_run_record(record, path=HISTORY_FILE):
+    # История только дописывается: одна запись на строку
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return path
+
+
+def record_run(stats, metrics_snapshot=None, parser_name="rss", path=HISTORY_FILE):
+    record = build_run_record(stats, metrics_snapshot, parser_name)
+    append_run_record(record, path)
+    return record
+
+
+def load_run_history(path=HISTORY_FILE, limit=None):
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Оборванная последняя строка после аварийного завершения
+                continue
+    return records[-limit:] if limit else records
+
+
+def _fetch_failed(source):
+    """Источник не скачался: были ошибки загрузки и ни одной обработанной статьи.
+
+    Источник без статей и без ошибок (нет свежих записей) считается живым.
+    """
+    return source["fetch_failures"] > 0 and source["total"] <= source["fetch_failures"]
+
+
+def _fresh_articles(source):
+    """Сколько свежих статей источника дошло до классификации."""
+    stale = sum(source["rejected"].get(r, 0) for r in STALE_REASONS)
+    return source["total"] - source["fetch_failures"] - stale
+
+
+def compare_with_baseline(history, window=10, slowdown=1.5, min_seconds=1.0, min_ratio_drop=0.5):
+    """Сравнить последний запуск с медианой предыдущих ``window`` запусков.
+
+    Возвращает список предупреждений: замедления запуска, источников и этапов,
+    падение доли принятых и «мёртвые» источники.
+    """
+    if len(history) < 2:
+        return []
+
+    latest = history[-1]
+    baseline = history[-1 - window:-1]
+    findings = []
+
+    def check_slowdown(kind, name, current, previous_values):
+        if not previous_values:
+            return
+        base = median(previous_values)
+        if current > base * slowdown and current - base >= min_seconds:
+            findings.append({
+                "type": "slowdown", "kind": kind, "name": name,
+                "current": round(current, 3), "baseline": round(base, 3),
+                "ratio": round(current / base, 2) if base else None,
+            })
+
+    check_slowdown("run", "duration", latest["duration"], [r["duration"] for r in baseline])
+
+    for stage, value in latest.get("stages", {}).items():
+        check_slowdown("stage", stage, value,
+                       [r["stages"][stage] for r in baseline if stage in r.get("stages", {})])
+
+    baseline_sources = set()
+    for record in baseline:
+        baseline_sources.update(record.get("sources", {}))
+
+    for name in sorted(baseline_sources | set(latest.get("sources", {}))):
+        current = latest.get("sources", {}).get(name)
+        previous = [r["sources"][name] for r in baseline if name in r.get("sources", {})]
+        alive_before = [p for p in previous if not _fetch_failed(p)]
+
+        if current is None or _fetch_failed(current):
+            if alive_before:
+                findings.append({
+                    "type": "dead_source", "name": name,
+                    "reason": "нет данных" if current is None else "ошибка загрузки",
+                    "alive_in_baseline": len(alive_before),
+                })
+            continue
+
+        check_slowdown("source", name, current["duration"], [p["duration"] for p in previous])
+
+        if _fresh_articles(current) <= 0:
+            # Скачался, но свежих статей нет: долю принятых сравнивать не с чем
+            continue
+        ratios = [p["acceptance_ratio"] for p in alive_before if _fresh_articles(p) > 0]
+        if ratios:
+            base_ratio = median(ratios)
+            if base_ratio > 0 and current["acceptance_ratio"] < base_ratio * min_ratio_drop:
+                findings.append({
+                    "type": "acceptance_drop", "name": name,
+                    "current": current["acceptance_ratio"], "baseline": base_ratio,
+                })
+
+    return findings
+
+
+def format_findings(latest, findings):
+    lines = [
+        f"Запуск {latest['run_id']} ({latest['parser']}): {latest['duration']:.1f} с, "
+        f"статей {latest['total']}, принято {latest['accepted']} "
+        f"({latest['acceptance_ratio']:.0%}), ошибок загрузки {latest['fetch_failures']}"
+    ]
+    if not findings:
+        lines.append("✅ Отклонений от базовой линии не найдено")
+    for item in findings:
+        if item["type"] == "slowdown":
+            lines.append(f"🐢 Замедление [{item['kind']}] {item['name']}: "
+                         f"{item['current']:.2f} с против {item['baseline']:.2f} с")
+        elif item["type"] == "dead_source":
+            lines.append(f"💀 Источник не отвечает: {item['name']} ({item['reason']})")
+        elif item["type"] == "acceptance_drop":
+            lines.append(f"📉 Доля принятых упала: {item['name']}: "
+                         f"{item['current']:.0%} против {item['baseline']:.0%}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python -m parser.stats",
+                                         description="История запусков парсера")
+    arg_parser.add_argument("--history", default=HISTORY_FILE, help="Файл истории (JSONL)")
+    commands = arg_parser.add_subparsers(dest="command")
+
+    compare = commands.add_parser("compare", help="Сравнить последний запуск с базовой линией")
+    compare.add_argument("--window", type=int, default=10, help="Сколько прошлых запусков брать в базу")
+    compare.add_argument("--slowdown", type=float, default=1.5, help="Порог замедления (во сколько раз)")
+    compare.add_argument("--min-seconds", type=float, default=1.0, help="Минимальное абсолютное замедление")
+    compare.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+
+    show = commands.add_parser("history", help="Показать последние запуски")
+    show.add_argument("--limit", type=int, default=10)
+
+    args = arg_parser.parse_args(argv)
+    history = load_run_history(args.history)
+    if not history:
+        print(f"История запусков пуста: {args.history}")
+        return 1
+
+    if args.command == "history":
+        for record in history[-args.limit:]:
+            print(f"{record['run_id']}  {record['parser']:<5} {record['duration']:>8.1f} с  "
+                  f"статей {record['total']:>5}  принято {record['accepted']:>4}  "
+                  f"ошибок загрузки {record['fetch_failures']}")
+        return 0
+
+    window = getattr(args, "window", 10)
+    findings = compare_with_baseline(
+        history, window=window,
+        slowdown=getattr(args, "slowdown", 1.5),
+        min_seconds=getattr(args, "min_seconds", 1.0),
+    )
+    if getattr(args, "json", False):
+        print(json.dumps({"latest": history[-1]["run_id"], "findings": findings}, ensure_ascii=False, indent=2))
+    else:
+        print(format_findings(history[-1], findings))
+    return 2 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+# tests/test_jobs.py
+import asyncio
+import os
+import tempfile
+import unittest
+
+from bot.async_database import AsyncNewsDB
+from bot.database import SafeNewsDB
+from bot.jobs import JobRunner
+
+
+class SlowWriteDB(AsyncNewsDB):
+    """Writes that take a while, like a store flushing to a slow disk."""
+
+    async def update_news(self, news_id: str, updates: dict) -> bool:
+        await asyncio.sleep(0.02)
+        return await super().update_news(news_id, updates)
+
+
+class JobRunnerSubmitTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        data = self.directory.name
+        self.db = SlowWriteDB(SafeNewsDB(
+            db_file=os.path.join(data, "news_db.json"),
+            sent_ids_file=os.path.join(data, "sent_ids.json"),
+            backup_dir=os.path.join(data, "backups"),
+        ))
+        await self.db.add_news("n1", {"title": "Новость", "url": "https://example.com/1"}, 1, "-100")
+
+        self.runs = []
+        self.runner = JobRunner(self.db, workers=3, retry_delay=0.01)
+
+        async def publish(bot, news_id, record, done_steps):
+            self.runs.append(news_id)
+            await asyncio.sleep(0.05)
+
+        self.runner.register("approve", publish)
+        await self.runner.start(bot=None)
+
+    async def asyncTearDown(self):
+        await self.runner.stop()
+        self.db.close()
+        self.directory.cleanup()
+
+    async def test_concurrent_submits_run_the_job_once(self):
+        results = await asyncio.gather(self.runner.submit("n1", "approve"),
+                                       self.runner.submit("n1", "approve"))
+        await self.runner.stop()
+
+        self.assertEqual(sorted(results), [False, True])
+        self.assertEqual(self.runs, ["n1"])
+        self.assertIsNone(self.db.get_news("n1").get("pending_action"))
+
+
+if __name__ == "__main__":
+    unittest.main()
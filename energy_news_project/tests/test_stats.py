@@ -0,0 +1,57 @@
+# tests/test_stats.py
+import unittest
+from datetime import datetime, timedelta
+
+from parser.stats import (build_run_record, compare_with_baseline, init_stats,
+                          record_source_duration, update_stats)
+
+
+def run_record(day, sources):
+    """Запись запуска; ``sources`` — {источник: [причина, ...]} (пустой список — фид без статей)."""
+    stats = init_stats()
+    stats["start_time"] = datetime(2026, 1, 1) + timedelta(days=day)
+    for name, reasons in sources.items():
+        for reason in reasons:
+            update_stats(stats, name, reason)
+        record_source_duration(stats, name, 0.5)
+    return build_run_record(stats, finished_at=stats["start_time"] + timedelta(seconds=10))
+
+
+class CompareWithBaselineTest(unittest.TestCase):
+    def setUp(self):
+        self.history = [run_record(day, {"Feed": ["accepted", "not_relevant"]}) for day in range(5)]
+
+    def test_fetched_feed_without_fresh_entries_is_alive(self):
+        self.history.append(run_record(5, {"Feed": []}))
+
+        self.assertEqual(compare_with_baseline(self.history), [])
+
+    def test_fetched_feed_with_only_old_entries_is_alive(self):
+        self.history.append(run_record(5, {"Feed": ["old_date", "old_date"]}))
+
+        self.assertEqual(compare_with_baseline(self.history), [])
+
+    def test_acceptance_drop_is_still_reported(self):
+        self.history.append(run_record(5, {"Feed": ["not_relevant"] * 4}))
+
+        self.assertEqual([f["type"] for f in compare_with_baseline(self.history)], ["acceptance_drop"])
+
+    def test_failed_fetch_is_reported(self):
+        self.history.append(run_record(5, {"Feed": ["failed_request"]}))
+
+        findings = compare_with_baseline(self.history)
+
+        self.assertEqual([(f["type"], f["name"]) for f in findings], [("dead_source", "Feed")])
+        self.assertEqual(findings[0]["reason"], "ошибка загрузки")
+
+    def test_missing_source_is_reported(self):
+        self.history.append(run_record(5, {"Other": ["accepted"]}))
+
+        findings = compare_with_baseline(self.history)
+
+        self.assertIn(("dead_source", "Feed", "нет данных"),
+                      [(f["type"], f["name"], f.get("reason")) for f in findings])
+
+
+if __name__ == "__main__":
+    unittest.main()